@@ -4,6 +4,7 @@ from achar import search_and_scroll
 import os
 import time
 import threading
+import queue
 import json
 
 def check_timeout(start_time, timeout_seconds):
@@ -22,108 +23,169 @@ os.makedirs('static', exist_ok=True)
 # Definir o tempo limite para processamento de cada site (em segundos)
 SITE_PROCESSING_TIMEOUT = 30
 
+# Quantidade de navegadores processando sites em paralelo
+NUM_WORKERS = 4
+
+# Máximo de navegadores que um job pode pedir; pedidos acima disso são reduzidos
+MAX_WORKERS = 16
+
+# Perfis de execução selecionáveis por job em /process-column
+RUN_PROFILES = {
+    "debug": {
+        "headless": False,  # Navegador visível
+        "slow_mo": 100,     # Desacelerar para visualização
+        "args": ['--start-maximized'],  # Iniciar maximizado
+        "viewport": None
+    },
+    "throughput": {
+        "headless": True,
+        "slow_mo": 0,
+        "args": [],
+        "viewport": {"width": 1024, "height": 768}
+    }
+}
+DEFAULT_PROFILE = "debug"
+
 # Variável global para armazenar resultados em tempo real
 current_results = []
+current_profile = DEFAULT_PROFILE
 processing_complete = False
 processing_error = None
 
-def process_sites(sites):
-    global current_results, processing_complete, processing_error
-    
-    # Reiniciar variáveis globais
-    current_results = []
-    processing_complete = False
-    processing_error = None
-    
-    total_sites = len(sites)
-    
+def launch_browser(playwright, profile):
+    # Iniciar o navegador com as configurações do perfil
+    return playwright.chromium.launch(
+        headless=profile["headless"],
+        slow_mo=profile["slow_mo"],
+        args=profile["args"]
+    )
+
+def process_site(browser, index, site_data, profile):
+    """Processa um único site e grava o resultado na posição ``index``."""
+    result = current_results[index]
+    site_url = site_data.get("url", "")
+    search_term = site_data.get("term", "Giramille")  # default "Giramille" if não tiver
+    start_time = time.time()
+
+    try:
+        # Criar uma nova página para cada site
+        if profile["viewport"]:
+            page = browser.new_page(viewport=profile["viewport"])
+        else:
+            page = browser.new_page()
+        
+        # Configurar timeout para navegação
+        page.set_default_timeout(SITE_PROCESSING_TIMEOUT * 1000)
+        
+        # Navegação e processamento
+        print(f"Processando site {index + 1}: {site_url}")
+        
+        # Ir para DuckDuckGo
+        page.goto('https://duckduckgo.com', wait_until="load")
+        print("DuckDuckGo carregado")
+        
+        # Preencher e submeter a busca
+        page.click('#searchbox_input')
+        page.fill('#searchbox_input', site_url)
+        page.press('#searchbox_input', 'Enter')
+        print("Busca enviada")
+        
+        check_timeout(start_time, SITE_PROCESSING_TIMEOUT)
+        
+        # Esperar que os resultados da busca carreguem
+        page.wait_for_selector('h2', state='visible')
+        page.click('h2')
+        page.wait_for_load_state("load")
+        print("Página de resultado aberta")
+        
+        check_timeout(start_time, SITE_PROCESSING_TIMEOUT)
+        
+        # Tenta fazer a busca por "Giramille" na página
+        search_success = search_and_scroll(page, search_term)
+        print(f"Busca por 'Giramille': {'sucesso' if search_success else 'não encontrado'}")
+        
+        if search_success:
+            result["status"] = "Busca realizada"
+        else:
+            result["status"] = "Campo de busca não encontrado"
+    except TimeoutError as e:
+        result["status"] = f"Timeout: {str(e)}"
+        print(f"Timeout: {str(e)}")
+    except Exception as e:
+        result["status"] = f"Erro: {str(e)}"
+        print(f"Erro: {str(e)}")
+    finally:
+        # Atualizar o resultado atual com o tempo gasto no site
+        result["elapsed"] = round(time.time() - start_time, 2)
+        current_results[index] = result
+        
+        # Fechar a página
+        if 'page' in locals() and not page.is_closed():
+            page.close()
+
+def site_worker(worker_id, work_queue, sites, profile):
+    """Cada worker tem o seu próprio navegador e consome linhas da fila compartilhada."""
+    global processing_error
+
     try:
         with sync_playwright() as playwright:
-            # Iniciar o navegador com configurações específicas
-            browser = playwright.chromium.launch(
-                headless=False,  # Navegador visível
-                slow_mo=100,     # Desacelerar para visualização
-                args=['--start-maximized']  # Iniciar maximizado
-            )
-            
-            print(f"Navegador iniciado, processando {total_sites} sites...")
-            
-            for i in range(total_sites):
-                site_data = sites[i]
-                site_url = site_data.get("url", "")
-                search_term = site_data.get("term", "Giramille")  # default "Giramille" if não tiver
-
-                current_index = i + 1
-                result = {
-                    "url": site_url, 
-                    "status": "Processando...", 
-                    "progress": f"({current_index} de {total_sites})"
-                }
-                
-                # Adicionar ao array de resultados para atualização em tempo real
-                current_results.append(result)
-                
+            browser = launch_browser(playwright, profile)
+            print(f"[Worker {worker_id}] Navegador iniciado")
+
+            while True:
                 try:
-                    # Criar uma nova página para cada site
-                    page = browser.new_page()
-                    
-                    # Configurar timeout para navegação
-                    page.set_default_timeout(SITE_PROCESSING_TIMEOUT * 1000)
-                    start_time = time.time()
-                    
-                    # Navegação e processamento
-                    print(f"Processando site {current_index}/{total_sites}: {site_url}")
-                    
-                    # Ir para DuckDuckGo
-                    page.goto('https://duckduckgo.com', wait_until="load")
-                    print("DuckDuckGo carregado")
-                    
-                    # Preencher e submeter a busca
-                    page.click('#searchbox_input')
-                    page.fill('#searchbox_input', site_url)
-                    page.press('#searchbox_input', 'Enter')
-                    print("Busca enviada")
-                    
-                    check_timeout(start_time, SITE_PROCESSING_TIMEOUT)
-    
-                    
-                    # Esperar que os resultados da busca carreguem
-                    page.wait_for_selector('h2', state='visible')
-                    page.click('h2')
-                    page.wait_for_load_state("load")
-                    print("Página de resultado aberta")
-                    
-                    check_timeout(start_time, SITE_PROCESSING_TIMEOUT)
-                    
-                    # Tenta fazer a busca por "Giramille" na página
-                    search_success = search_and_scroll(page, search_term)
-                    print(f"Busca por 'Giramille': {'sucesso' if search_success else 'não encontrado'}")
-                    
-                    if search_success:
-                        result["status"] = "Busca realizada"
-                    else:
-                        result["status"] = "Campo de busca não encontrado"
-                except TimeoutError as e:
-                    result["status"] = f"Timeout: {str(e)}"
-                    print(f"Timeout: {str(e)}")
-                except Exception as e:
-                    result["status"] = f"Erro: {str(e)}"
-                    print(f"Erro: {str(e)}")
-                finally:
-                    # Atualizar o resultado atual
-                    current_results[i] = result
-                    
-                    # Fechar a página
-                    if 'page' in locals() and not page.is_closed():
-                        page.close()
+                    index = work_queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                process_site(browser, index, sites[index], profile)
 
-            # Fechar o navegador após processar todos os sites
+            # Fechar o navegador quando a fila esvaziar
             browser.close()
-            print("Navegador fechado, processamento concluído")
-            
+            print(f"[Worker {worker_id}] Navegador fechado")
+
     except Exception as e:
         processing_error = str(e)
-        print(f"Erro global: {str(e)}")
+        print(f"[Worker {worker_id}] Erro global: {str(e)}")
+
+def process_sites(sites, num_workers=NUM_WORKERS, profile_name=DEFAULT_PROFILE):
+    global current_results, current_profile, processing_complete, processing_error
+    
+    # Reiniciar variáveis globais
+    current_profile = profile_name
+    profile = RUN_PROFILES[profile_name]
+    processing_complete = False
+    processing_error = None
+    
+    total_sites = len(sites)
+
+    # Cada linha já tem o seu slot de resultado, preenchido pelos workers
+    current_results = [
+        {
+            "url": site_data.get("url", ""),
+            "status": "Processando...",
+            "progress": f"({i + 1} de {total_sites})",
+            "profile": profile_name,
+            "elapsed": None
+        }
+        for i, site_data in enumerate(sites)
+    ]
+
+    work_queue = queue.Queue()
+    for i in range(total_sites):
+        work_queue.put(i)
+
+    pool_size = max(1, min(num_workers, total_sites))
+    print(f"Processando {total_sites} sites com {pool_size} workers...")
+
+    workers = [
+        threading.Thread(target=site_worker, args=(n + 1, work_queue, sites, profile), daemon=True)
+        for n in range(pool_size)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
     
     # Marcar o processamento como concluído
     processing_complete = True
@@ -138,23 +200,43 @@ def process_column():
             return jsonify({'error': 'Dados ausentes ou formato inválido'}), 400
         
         column_array = data['columnData']
+        workers = data.get('workers')
+        if workers is None or workers == '':
+            workers = NUM_WORKERS
+        try:
+            num_workers = int(workers)
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Número de workers inválido: {workers}'}), 400
+        if num_workers < 1:
+            return jsonify({'error': f'Número de workers inválido: {workers}'}), 400
+        num_workers = min(num_workers, MAX_WORKERS)
+        profile_name = data.get('profile', DEFAULT_PROFILE)
+
+        if profile_name not in RUN_PROFILES:
+            return jsonify({'error': f'Perfil desconhecido: {profile_name}'}), 400
         
         # Iniciar o processamento em uma thread separada
-        threading.Thread(target=process_sites, args=(column_array,)).start()
+        threading.Thread(target=process_sites, args=(column_array, num_workers, profile_name)).start()
         
-        return jsonify({"message": "Processamento iniciado"})
+        return jsonify({"message": "Processamento iniciado", "profile": profile_name})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/check-progress', methods=['GET'])
 def check_progress():
-    global current_results, processing_complete, processing_error
+    global current_results, current_profile, processing_complete, processing_error
+
+    # Tempo médio por site, para medir o ganho de cada perfil
+    elapsed = [r["elapsed"] for r in current_results if r.get("elapsed") is not None]
+    average_site_seconds = round(sum(elapsed) / len(elapsed), 2) if elapsed else None
     
     return jsonify({
         "results": current_results,
         "complete": processing_complete,
-        "error": processing_error
+        "error": processing_error,
+        "profile": current_profile,
+        "average_site_seconds": average_site_seconds
     })
 
 # Rota para servir o arquivo HTML principal
@@ -322,6 +404,7 @@ if __name__ == '__main__':
                         
                         // Limpar tabela de resultados anteriores
                         document.getElementById('resultsBody').innerHTML = '';
+                        rowElements = [];
                         document.getElementById('resultsTable').style.display = 'none';
                         
                         // Mostrar mensagem de total de sites
@@ -395,10 +478,8 @@ if __name__ == '__main__':
                 const response = await fetch("/check-progress");
                 const data = await response.json();
                 
-                updateResultsTable(data.results);
-                
                 // Atualizar mensagem de progresso
-                const processedCount = data.results.filter(r => r.status !== "Processando...").length;
+                const processedCount = updateResultsTable(data.results);
                 document.getElementById('progressText').innerText = 
                     `${processedCount} de ${columnArrayLength} sites processados`;
                 
@@ -445,52 +526,59 @@ if __name__ == '__main__':
             }
         }
         
+        // Linha da tabela de cada índice, reaproveitada entre as consultas
+        let rowElements = [];
+
+        function statusClass(status) {
+            if (status === "Busca realizada") return "success";
+            if (status === "Campo de busca não encontrado") return "warning";
+            if (status.startsWith("Timeout")) return "warning";
+            if (status.startsWith("Erro")) return "error";
+            if (status === "Processando...") return "processing";
+            return "";
+        }
+
         function updateResultsTable(results) {
             const resultsBody = document.getElementById('resultsBody');
-            
-            // Limpar tabela existente
-            resultsBody.innerHTML = '';
-            
+            let processedCount = 0;
+
+            // Atualiza no lugar só as linhas que mudaram, sem recriar a tabela
             for (let i = 0; i < results.length; i++) {
                 const result = results[i];
-                const row = document.createElement('tr');
-                
-                // Adicionar número do índice
-                const indexCell = document.createElement('td');
-                indexCell.textContent = i + 1;
-                row.appendChild(indexCell);
-                
-                // Adicionar URL
-                const urlCell = document.createElement('td');
-                urlCell.textContent = result.url;
-                row.appendChild(urlCell);
-                
-                // Adicionar status
-                const statusCell = document.createElement('td');
-                statusCell.textContent = result.status;
-                
-                // Aplicar estilo baseado no status
-                if (result.status === "Busca realizada") {
-                    statusCell.className = "success";
-                } else if (result.status === "Campo de busca não encontrado") {
-                    statusCell.className = "warning";
-                } else if (result.status.startsWith("Timeout")) {
-                    statusCell.className = "warning";
-                } else if (result.status.startsWith("Erro")) {
-                    statusCell.className = "error";
-                } else if (result.status === "Processando...") {
-                    statusCell.className = "processing";
+                if (result.status !== "Processando...") {
+                    processedCount++;
                 }
-                
-                row.appendChild(statusCell);
-                
-                // Adicionar coluna de progresso
-                const progressCell = document.createElement('td');
-                progressCell.textContent = result.progress;
-                row.appendChild(progressCell);
-                
-                resultsBody.appendChild(row);
+
+                let row = rowElements[i];
+                if (!row) {
+                    row = document.createElement('tr');
+                    for (let c = 0; c < 4; c++) {
+                        row.appendChild(document.createElement('td'));
+                    }
+                    // Adicionar número do índice
+                    row.cells[0].textContent = i + 1;
+                    resultsBody.appendChild(row);
+                    rowElements[i] = row;
+                }
+
+                const shown = [result.url, result.status, result.progress].join("|");
+                if (row.dataset.shown === shown) {
+                    continue;
+                }
+                row.dataset.shown = shown;
+
+                row.cells[1].textContent = result.url;
+                row.cells[2].textContent = result.status;
+                row.cells[2].className = statusClass(result.status);
+                row.cells[3].textContent = result.progress;
             }
+
+            // Menos resultados que linhas (novo processamento): remove as sobras
+            while (rowElements.length > results.length) {
+                rowElements.pop().remove();
+            }
+
+            return processedCount;
         }
     </script>
 </body>
@@ -1,368 +1,518 @@
+import json
 import time 
-import re
-
-def search_and_scroll(page, search_term):
-    search_selectors = [
-        'input[type="search"]',
-        'input[placeholder*="search" i]',
-        'input[placeholder*="busca" i]',
-        'input[placeholder*="pesquisa" i]',
-        'input[aria-label*="search" i]',
-        'input[aria-label*="busca" i]',
-        'input[name="q"]',
-        'input[name="query"]',
-        'input[name*="search" i]',
-        'input[id*="search" i]',
-        'input[class*="search" i]',
-        '[role="search"] input',
-        'form[role="search"] input',
-        'form[action*="search"] input',
-        '.search input',
-        '.searchbox input',
-        '.search-box input',
-        '.searchBar input',
-        '.search-bar input',
-        '#search input',
-        '#searchbox input',
-        '#search-box input',
-        'textarea[aria-label*="search" i]',
-        '[role="combobox"]',
-        'input[id*="encontre" i]',
-        'input[name*="encontre" i]',
-        'input[placeholder*="encontre" i]',
-        'input[placeholder*="Com o que vamos brincar hoje?" i]',
-        'input[class*="encontre" i]',
-        'input[title*="encontre" i]',
-        'div[class*="encontre" i] input',
-        'form[id*="encontre" i] input[type="text"]',
-        ':text-matches("encontre", "i") >> .. >> input',
-        'button:has-text("encontre")',
-        'button:has-text("buscar cep")',
-        'button[aria-label="Search"]',
-        '.search-toggle',
-        'button:has-text("Search")',
-        'svg.search-icon'
-    ]
-
-    negative_phrases = [
-        # Português (more specific patterns)
-        rf"(não|não temos|não encontramos|0 resultados).*{re.escape(search_term)}",
-        rf"nenhum (resultado|item).*{re.escape(search_term)}",
-        rf"não (existe|encontramos|temos).*{re.escape(search_term)}",
-        rf"sem resultados.*{re.escape(search_term)}",
-        rf"sua busca por.*{re.escape(search_term)}.*não retornou",
-        rf"não encontramos nada para.*{re.escape(search_term)}",
-        rf"não localizamos.*{re.escape(search_term)}",
-        rf"não (há|existem).*{re.escape(search_term)}",
-        "lista vazia",
-        "resultado indisponível",
-        "nenhum resultado encontrado",
-        "não encontramos resultados",
-        "não encontramos",
-        "busca não retornou resultados",
-        
-        # English (more specific patterns)
-        rf"no (results|items).*{re.escape(search_term)}",
-        rf"we don't have.*{re.escape(search_term)}",
-        rf"(couldn't|didn't) find.*{re.escape(search_term)}",
-        rf"0 results for.*{re.escape(search_term)}",
-        rf"your search for.*{re.escape(search_term)}.*did not match",
-        rf"no.*{re.escape(search_term)}.*(available|found)",
-        rf"nothing (found|matches).*{re.escape(search_term)}",
-        "no items found",
-        "nothing found",
-        "empty results",
-        "product not available",
-        "out of stock",
-        "not found",
-        "search returned no",
-        "we couldn't find any"
-    ]
+from negative_matcher import find_negative_phrase
+from page_scripts import (FIND_SEARCH_CANDIDATES_SCRIPT, DETECT_TERM_SCRIPT, SCROLL_TO_END_SCRIPT,
+                          DISMISS_POPUPS_SCRIPT, POPUP_GUARD_SCRIPT, FIND_CEP_SCRIPT,
+                          FINGERPRINT_RESULTS_SCRIPT)
+from search_templates import build_search_url, site_domain
+from metrics import timed
+from deadline import Deadline, DeadlineExceeded, PHASE_BUDGETS
+from cep_memory import DEFAULT_CEP
+from fingerprints import fingerprint, FINGERPRINT_ITEMS, FINGERPRINT_MAX_CHARS
+
+# Quantos candidatos a barra de busca a descoberta devolve, do melhor para o pior
+MAX_SEARCH_CANDIDATES = 5
+
+# Chamadas ao navegador gastas num candidato que falha (clique, preenchimento, Enter e esperas)
+SEARCH_ATTEMPT_ROUND_TRIPS = 6
+
+SEARCH_SELECTORS = [
+    'input[type="search"]',
+    'input[placeholder*="search" i]',
+    'input[placeholder*="busca" i]',
+    'input[placeholder*="pesquisa" i]',
+    'input[aria-label*="search" i]',
+    'input[aria-label*="busca" i]',
+    'input[name="q"]',
+    'input[name="query"]',
+    'input[name*="search" i]',
+    'input[id*="search" i]',
+    'input[class*="search" i]',
+    '[role="search"] input',
+    'form[role="search"] input',
+    'form[action*="search"] input',
+    '.search input',
+    '.searchbox input',
+    '.search-box input',
+    '.searchBar input',
+    '.search-bar input',
+    '#search input',
+    '#searchbox input',
+    '#search-box input',
+    'textarea[aria-label*="search" i]',
+    '[role="combobox"]',
+    'input[id*="encontre" i]',
+    'input[name*="encontre" i]',
+    'input[placeholder*="encontre" i]',
+    'input[placeholder*="Com o que vamos brincar hoje?" i]',
+    'input[class*="encontre" i]',
+    'input[title*="encontre" i]',
+    'div[class*="encontre" i] input',
+    'form[id*="encontre" i] input[type="text"]',
+    ':text-matches("encontre", "i") >> .. >> input',
+    'button:has-text("encontre")',
+    'button:has-text("buscar cep")',
+    'button[aria-label="Search"]',
+    '.search-toggle',
+    'button:has-text("Search")',
+    'svg.search-icon'
+]
+
+# Containers onde uma ocorrência do termo indica um produto de verdade
+PRODUCT_CONTAINERS = [
+    '.product', '.produto', '.item', '.card', '.goods', '.merchandise',
+    '.product-item', '.product-card', '.product-grid', '.product-list',
+    '.search-result', '.result-item', '.result-list', '.listing',
+    '.catalog-item', '.store-item', '.shop-item', '.goods-item',
+    '.product-desc', '.product-content', '.product-info',
+    '.product-title', '.product-name', '.item-title', '.item-name',
+    '.search-results', '.results-container', '.items-container',
+    '.vitrine', '.prateleira', '.box-produto',
+    '[itemprop="description"]', '[itemtype="http://schema.org/Product"]'
+]
+PRODUCT_CONTAINER_SELECTOR = ", ".join(PRODUCT_CONTAINERS)
+
+# Confiança mínima para considerar o termo encontrado
+TERM_CONFIDENCE_THRESHOLD = 0.35
+
+# Quantas ocorrências (com trecho de texto) a detecção devolve para diagnóstico
+MAX_TERM_MATCHES = 10
+
+# Rolagem: termina após esse tempo sem a página crescer, ou no tempo máximo (ms)
+SCROLL_QUIET_MS = 1500
+SCROLL_MAX_MS = 20000
+
+# Para de rolar assim que o termo aparecer num container de produto
+SCROLL_STOP_ON_TERM = True
+
+
+# Controles explícitos de fechar popups, em ordem de preferência
+POPUP_CLOSE_SELECTORS = [
+    '[aria-label*="fechar" i]', '[aria-label*="close" i]',
+    'button:has-text("×")', 'button:has-text("Fechar")', 
+    'button:has-text("Close")', '.close-btn', '.popup-close',
+    '#close-button', '[data-testid="close-button"]'
+]
+
+# Seletores de aceite de cookies (comuns na UE)
+POPUP_CONSENT_SELECTORS = [
+    # English selectors
+    'button:has-text("Accept cookies")',
+    'button:has-text("Accept all cookies")',
+    'button:has-text("Accept All")',
+    'button:has-text("Allow cookies")',
+    'button:has-text("Allow all cookies")',
+    'button:has-text("Agree")',
+    'button:has-text("I agree")',
+    'button:has-text("Consent")',
+    'button:has-text("Continue")',
+    'button:has-text("Got it")',
+    'button:has-text("OK")',
+
+    # Portuguese selectors
+    'button:has-text("Aceitar cookies")',
+    'button:has-text("Aceitar todos os cookies")',
+    'button:has-text("Permitir cookies")',
+    'button:has-text("Permitir todos")',
+    'button:has-text("Concordar")',
+    'button:has-text("Eu concordo")',
+    'button:has-text("Continuar")',
+    'button:has-text("Entendi")',
+
+    # ID and class selectors 
+    '#accept-cookies',
+    '#cookie-accept',
+    '#cookie-agree',
+    '#cookie-consent',
+    '.cookie-accept',
+    '.cookie-agree',
+    '.cookie-consent',
+    '.cookie-banner-accept',
+    '.cookie-button-accept',
+
+    # generic selectors
+    'button[id*="cookie"]',
+    'button[class*="cookie"]',
+    'button[id*="accept"]',
+    'button[class*="accept"]',
+    'button[id*="agree"]',
+    'button[class*="agree"]'
+]
+
+POPUP_SELECTORS = POPUP_CLOSE_SELECTORS + POPUP_CONSENT_SELECTORS
+
+# Overlays que, sem nenhum controle reconhecido e cobrindo a tela, são escondidos
+POPUP_OVERLAY_SELECTORS = [
+    '.overlay', '.modal', '[class*="popup" i]',
+    '[id*="popup" i]', '.blocker'
+]
+
+# Campos de CEP e botões que confirmam o CEP, em ordem de preferência
+CEP_FIELD_SELECTORS = [
+    'input[id*="cep" i]',
+    'input[name*="cep" i]',
+    'input[placeholder*="cep" i]',
+    'input[class*="cep" i]',
+    '#cep',
+    '#postalCode'
+]
+CEP_BUTTON_SELECTORS = [
+    'button[type="submit"]',
+    'button:has-text("Confirmar")',
+    'button:has-text("Aplicar")',
+    'button:has-text("quero ofertas")'
+]
+
+# Quantas vezes o script de popups roda seguido (um popup pode revelar outro)
+POPUP_DISMISS_PASSES = 2
+
+# Por quanto tempo, após carregar cada documento, o guarda fecha popups tardios (ms)
+POPUP_GUARD_MS = 15000
+
+
+def find_search_candidates(page, selectors=SEARCH_SELECTORS):
+    """Avalia todos os seletores de busca dentro da página numa única chamada."""
+    return page.evaluate(FIND_SEARCH_CANDIDATES_SCRIPT, [selectors, MAX_SEARCH_CANDIDATES])
+
+
+def default_position(candidates, winner):
+    """Posição que o vencedor teria com a lista de seletores na ordem original.
+
+    A pontuação do script dá 10 pontos por posição do seletor na lista; troca
+    a posição na lista aprendida pela posição na SEARCH_SELECTORS.
+    """
+    total = len(SEARCH_SELECTORS)
+
+    def default_score(candidate):
+        original = SEARCH_SELECTORS.index(candidate["selector"]) if candidate["selector"] in SEARCH_SELECTORS else total
+        return candidate["score"] + (candidate["selectorIndex"] - original) * 10
+
+    return sum(1 for candidate in candidates if default_score(candidate) > default_score(winner))
+
+
+def scroll_to_end(page, stop_term=None, quiet_ms=SCROLL_QUIET_MS, max_ms=SCROLL_MAX_MS):
+    """Rola até o fim da página, esperando o conteúdo carregado sob demanda."""
+    try:
+        return page.evaluate(SCROLL_TO_END_SCRIPT, [quiet_ms, max_ms, stop_term, PRODUCT_CONTAINER_SELECTOR])
+    except Exception as e:
+        # Uma navegação no meio da rolagem destrói o contexto do script
+        print(f"[WARNING] Rolagem interrompida: {e}")
+        return {"jumps": 0, "height": None, "reason": "error", "elapsedMs": 0}
+
+
+def detect_term(page, search_term):
+    """Procura o termo em todos os textos da página numa única chamada."""
+    return page.evaluate(DETECT_TERM_SCRIPT, [search_term, PRODUCT_CONTAINER_SELECTOR, MAX_TERM_MATCHES])
+
+
+def fingerprint_results(page):
+    """Impressão digital dos cards de produto da listagem, ou None se não houver cards reconhecidos."""
+    try:
+        listing = page.evaluate(FINGERPRINT_RESULTS_SCRIPT,
+                                [PRODUCT_CONTAINER_SELECTOR, FINGERPRINT_ITEMS, FINGERPRINT_MAX_CHARS])
+    except Exception as e:
+        print(f"[WARNING] Impressão digital indisponível: {e}")
+        return None
+    if not listing["text"]:
+        return None
+    return fingerprint(page.url, listing)
+
+
+def score_term_matches(counts):
+    """Converte as ocorrências encontradas numa confiança entre 0 e 1."""
+    if counts["visibleProduct"]:
+        # Ocorrência visível dentro de um card/listagem de produto
+        return min(1.0, 0.7 + 0.1 * (counts["visibleProduct"] - 1))
+    if counts["visibleOther"]:
+        # Visível, mas fora de um container de produto conhecido
+        return min(0.6, 0.35 + 0.05 * (counts["visibleOther"] - 1))
+    if counts["echo"]:
+        # Só o eco da busca ("resultados para ...") ou o cabeçalho da página
+        return 0.1
+    if counts["hidden"]:
+        return 0.05
+    return 0.0
+
+
+def check_results(page, search_term, details, stop_on_term=SCROLL_STOP_ON_TERM, deadline=None, fingerprints=None):
+    """Rola a página de resultados e decide se o termo foi encontrado."""
+    timings = details.setdefault("timings", {})
+    deadline = deadline or Deadline()
+    domain = site_domain(page.url)
+
+    # Listagem igual à da última visita: reaproveita o veredito e pula rolagem e detecção
+    digest = None
+    if fingerprints is not None:
+        with timed(timings, "fingerprint"), deadline.limit(page, "fingerprint"):
+            digest = fingerprint_results(page)
+        verdict = fingerprints.lookup(domain, search_term, digest) if digest else None
+        details["fingerprint_hit"] = verdict is not None
+        if verdict is not None:
+            print(f"Result page unchanged since the last check, reusing verdict (confidence {verdict['confidence']:.2f})")
+            details["confidence"] = verdict["confidence"]
+            if verdict["negative_phrase"]:
+                details["negative_phrase"] = verdict["negative_phrase"]
+            return {
+                "term_found": verdict["term_found"],
+                "negative_phrase": verdict["negative_phrase"],
+                "counts": verdict["counts"]
+            }
+
+    outcome = scan_results(page, search_term, details, stop_on_term, deadline)
+    if digest:
+        fingerprints.remember(domain, search_term, digest, dict(outcome, confidence=details["confidence"]))
+    return outcome
+
+
+def scan_results(page, search_term, details, stop_on_term, deadline):
+    """Rolagem e detecção completas da página de resultados."""
+    timings = details.setdefault("timings", {})
+
+    # Rola até o fim e para assim que a página parar de crescer; a rolagem cabe
+    # no orçamento dela e deixa tempo para a detecção avaliar o que já carregou
+    with timed(timings, "scroll"), deadline.limit(page, "scroll"):
+        max_ms = deadline.timeout_ms("scroll", cap_ms=SCROLL_MAX_MS, reserve=PHASE_BUDGETS["detect"])
+        scroll = scroll_to_end(page, search_term if stop_on_term else None, max_ms=max_ms)
+    print(f"Scroll finished ({scroll['reason']}) after {scroll['jumps']} jumps in {scroll['elapsedMs']} ms")
+
+    # Verifica se há mensagem negativa (padrão único, compilado e em cache)
+    with timed(timings, "detect"), deadline.limit(page, "detect"):
+        page_text = page.locator("body").inner_text(timeout=deadline.timeout_ms("detect"))
+        negative_phrase = find_negative_phrase(page_text, search_term)
+
+    if negative_phrase:
+        print(f"Negative phrase detected: '{negative_phrase}'")
+        details["confidence"] = 0.0
+        details["negative_phrase"] = negative_phrase
+        return {"term_found": False, "negative_phrase": negative_phrase, "counts": None}
+
+    # Detecção do termo numa única passada dentro da página
+    with timed(timings, "detect"), deadline.limit(page, "detect"):
+        detection = detect_term(page, search_term)
+    confidence = score_term_matches(detection["counts"])
+    print(f"Term detection: {detection['counts']} -> confidence {confidence:.2f}")
+
+    details["confidence"] = confidence
+    details["matches"] = detection["matches"]
+    return {
+        "term_found": confidence >= TERM_CONFIDENCE_THRESHOLD,
+        "negative_phrase": None,
+        "counts": detection["counts"]
+    }
+
+
+def search_with_template(page, search_term, entry, details, stop_on_term, deadline, fingerprints=None):
+    """Abre a URL de resultados aprendida. Devolve None se o template não serviu."""
+    url = build_search_url(entry, search_term)
+    print(f"Using learned search URL: {url}")
+
+    with timed(details.setdefault("timings", {}), "navigate"), deadline.limit(page, "navigate"):
+        response = page.goto(url, wait_until="load", timeout=deadline.timeout_ms("navigate"))
+    if response is not None and response.status >= 400:
+        return None
+
+    outcome = check_results(page, search_term, details, stop_on_term, deadline, fingerprints)
+
+    # Sem frase negativa e sem nenhuma ocorrência do termo (nem o eco da busca):
+    # provavelmente a loja mudou a URL e caímos numa página que não é de resultados
+    if outcome["negative_phrase"] is None and outcome["counts"]["total"] == 0:
+        return None
+
+    return outcome["term_found"]
+
+
+def search_and_scroll(page, search_term, details=None, stop_on_term=SCROLL_STOP_ON_TERM, templates=None,
+                      deadline=None, cep=DEFAULT_CEP, cep_memory=None, selector_memory=None, fingerprints=None):
+    if details is None:
+        details = {}
+    deadline = deadline or Deadline()
+    timings = details.setdefault("timings", {})
+    landing_url = page.url
+    domain = site_domain(landing_url)
+
+    # Atalho: URL de resultados já aprendida para esta loja
+    entry = templates.get(domain) if templates is not None else None
+    if entry:
+        try:
+            term_found = search_with_template(page, search_term, entry, details, stop_on_term, deadline,
+                                              fingerprints)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            deadline.check()
+            print(f"Error with learned search URL: {str(e)}")
+            term_found = None
+
+        if term_found is not None:
+            templates.mark_used(domain)
+            details["used_template"] = True
+            return True, term_found
+
+        templates.mark_failed(domain)
+        # Descarta o resultado do template, mas mantém o tempo que ele custou
+        details.clear()
+        details["timings"] = timings
+        with timed(timings, "navigate"), deadline.limit(page, "navigate"):
+            page.goto(landing_url, wait_until="load", timeout=deadline.timeout_ms("navigate"))
 
     print(f"Looking for search bar to enter: {search_term}")
     
     # Fecha popups e lida com CEP
-    close_popups(page)
-    handle_cep_prompt(page, default_cep="22071-001")
-    page.wait_for_timeout(2000)
+    with timed(timings, "close_popups"), deadline.limit(page, "close_popups"):
+        close_popups(page, deadline, selector_memory)
+    with timed(timings, "cep"), deadline.limit(page, "cep"):
+        handle_cep_prompt(page, default_cep=cep, deadline=deadline, memory=cep_memory,
+                          selector_memory=selector_memory)
+    with timed(timings, "settle"), deadline.limit(page, "settle"):
+        page.wait_for_timeout(deadline.timeout_ms("settle", cap_ms=2000))
     
-    for selector in search_selectors:
+    # Seletores que já funcionaram nesta loja vão na frente, depois os mais populares
+    learned = selector_memory.learned("search", domain) if selector_memory is not None else []
+    selectors = selector_memory.order("search", domain, SEARCH_SELECTORS) if selector_memory is not None else SEARCH_SELECTORS
+
+    # Descoberta da barra de busca numa única ida e volta à página
+    with timed(timings, "discovery"), deadline.limit(page, "discovery"):
         try:
-            elements = page.locator(selector)
-            count = elements.count()
-
-            if count == 0:
-                continue
-
-            print(f"Trying to use: {selector}")
-
-            for i in range(count):
-                try:
-                    element = elements.nth(i)
-
-                    if not element.is_visible():
-                        continue
-
-                    print(f"Element {i} is visible, proceeding")
-
-                    # Interação com o elemento de busca
-                    element.click()
-                    page.wait_for_timeout(500)
-                    element.fill(search_term)
-                    page.wait_for_timeout(500)
-                    element.press('Enter')
-                    page.wait_for_load_state("load") 
-
-                    # Scroll até o final da página
-                    previous_height = page.evaluate("document.body.scrollHeight")
-                    scroll_count = 0
-                    max_scrolls = 50
-
-                    while scroll_count < max_scrolls:
-                        page.keyboard.press("PageDown")
-                        page.wait_for_timeout(1000)
-                        new_height = page.evaluate("document.body.scrollHeight")
-                        
-                        if new_height == previous_height:
-                            break
-                            
-                        previous_height = new_height
-                        scroll_count += 1
-
-                    print(f"Reached bottom of page after {scroll_count} scrolls")
-
-                    # Verifica se há mensagem negativa (mais rigoroso)
-                    page_text = page.locator("body").inner_text().lower()
-                    search_term_lower = search_term.lower()
-                    
-                    negative_detected = False
-                    for phrase in negative_phrases:
-                        try:
-                            if re.search(phrase, page_text, flags=re.IGNORECASE):
-                                print(f"Negative phrase detected: '{phrase}'")
-                                negative_detected = True
-                                break
-                        except re.error:
-                            print(f"Invalid regex pattern: {phrase}")
-                            continue
-                    
-                    if negative_detected:
-                        return True, False
-
-                    # Verificação mais robusta do termo de busca
-                    valid_contexts = [
-                        # Containers de produtos
-                        '.product', '.produto', '.item', '.card', '.goods', '.merchandise',
-                        '.product-item', '.product-card', '.product-grid', '.product-list',
-                        '.search-result', '.result-item', '.result-list', '.listing', 
-                        '.catalog-item', '.store-item', '.shop-item', '.goods-item',
-                        
-                        # Elementos de conteúdo
-                        '.description', '.descricao', '.content', '.conteudo', 
-                        '.product-desc', '.product-content', '.product-info',
-                        '.product-title', '.product-name', '.item-title', '.item-name',
-                        
-                        # Seções de página
-                        '.main-content', '.page-content', '.container', '.wrapper',
-                        '.search-results', '.results-container', '.items-container',
-                        
-                        # Elementos estruturais
-                        '.text', '.txt', '.body', '.details', '.specs', '.features',
-                        
-                        # Tags HTML relevantes
-                        'article', 'section', 'main', 'div', 'span', 'li',
-                        
-                        # Plataformas específicas
-                        '.vitrine', '.prateleira', '.box-produto', 
-                        '[itemprop="description"]', '[itemtype="http://schema.org/Product"]'
-                    ]
-                    
-                    # Primeiro verifica em contextos específicos
-                    term_found = False
-                    for context in valid_contexts:
-                        try:
-                            locator = page.locator(f"{context}:has-text('{search_term}')")
-                            if locator.count() > 0:
-                                # Verifica se o texto está visível
-                                for j in range(locator.count()):
-                                    if locator.nth(j).is_visible():
-                                        term_found = True
-                                        print(f"Found term in valid context: {context}")
-                                        break
-                                if term_found:
-                                    break
-                        except:
-                            continue
-                    
-                    # Se não encontrou em contextos específicos, verifica em elementos de texto relevantes
-                    if not term_found:
-                        relevant_text_locators = [
-                            ('h1', 1), ('h2', 2), ('h3', 3), ('h4', 4),  # Títulos
-                            ('p', 1), ('span', 1), ('div', 1),              # Parágrafos e containers
-                            ('li', 1), ('td', 1),                           # Listas e tabelas
-                            ('article', 1), ('section', 1)                  # Seções de conteúdo
-                        ]
-                        
-                        for tag, min_count in relevant_text_locators:
-                            try:
-                                locator = page.locator(f"{tag}:has-text('{search_term}')")
-                                if locator.count() >= min_count:
-                                    for j in range(locator.count()):
-                                        if locator.nth(j).is_visible():
-                                            term_found = True
-                                            print(f"Found term in relevant text element: {tag}")
-                                            break
-                                    if term_found:
-                                        break
-                            except:
-                                continue
-                    
-                    # Verificação final - se encontrou o termo mas não em contexto válido
-                    if not term_found:
-                        # Verifica se o termo aparece na página (como último recurso)
-                        all_text = page.locator("body").inner_text()
-                        if search_term.lower() in all_text.lower():
-                            print("Term found but not in valid context - possible false positive")
-                            term_found = False
-                        else:
-                            term_found = False
-
-                    return True, term_found
-
-                except Exception as e:
-                    print(f"Error with element {i} of selector {selector}: {str(e)}")
-                    continue
+            candidates = find_search_candidates(page, selectors)
+        except Exception as e:
+            print(f"Error discovering search bar: {str(e)}")
+            candidates = []
+    if learned:
+        # A pontuação favorece campos de texto; o seletor aprendido passa na frente mesmo assim
+        candidates.sort(key=lambda candidate: candidate["selector"] not in learned)
+    print(f"Search bar discovery: {len(candidates)} candidates in {timings['discovery'] * 1000:.0f} ms")
+
+    # Usa o melhor candidato; os seguintes só entram se a interação falhar
+    for position, candidate in enumerate(candidates):
+        selector = candidate["selector"]
+        try:
+            element = page.locator(f'[data-achar-candidate="{candidate["rank"]}"]')
+            print(f"Trying to use: {selector} ({candidate['tag']})")
+
+            # Interação com o elemento de busca
+            with timed(timings, "submit"), deadline.limit(page, "submit"):
+                # Cada chamada recebe só o que sobrou do orçamento de "submit"
+                element.click(timeout=deadline.timeout_ms("submit"))
+                page.wait_for_timeout(deadline.timeout_ms("submit", cap_ms=500))
+                element.fill(search_term, timeout=deadline.timeout_ms("submit"))
+                page.wait_for_timeout(deadline.timeout_ms("submit", cap_ms=500))
+                element.press('Enter', timeout=deadline.timeout_ms("submit"))
+                page.wait_for_load_state("load", timeout=deadline.timeout_ms("submit"))
+
+            outcome = check_results(page, search_term, details, stop_on_term, deadline, fingerprints)
+
+            # Guarda o formato da URL de resultados para as próximas visitas
+            if templates is not None:
+                templates.learn(site_domain(page.url), page.url, search_term)
+            if selector_memory is not None:
+                saved = max(default_position(candidates, candidate) - position, 0) * SEARCH_ATTEMPT_ROUND_TRIPS
+                selector_memory.record("search", domain, selector, saved)
 
+            return True, outcome["term_found"]
+
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Error with selector {selector}: {str(e)}")
+            # Timeout de uma chamada limitada pelo prazo: o site acabou, não o candidato
+            deadline.check()
+            print(f"Error with candidate {candidate['rank']} of selector {selector}: {str(e)}")
             continue
-    
+
     print("Search bar not found")
     return False, False
 
 
-def close_popups(page):
-    """Fecha popups de forma segura sem travar o fluxo principal."""
+def close_popups(page, deadline=None, selector_memory=None):
+    """Fecha popups de forma segura sem travar o fluxo principal.
+
+    Um único script dentro da página escolhe o melhor controle de cada popup
+    e clica nele; uma segunda passada pega popups revelados pela primeira.
+    Com ``deadline``, não começa outra passada depois que o orçamento acaba.
+    Com ``selector_memory``, os controles que já fecharam popups na loja têm
+    preferência.
+    """
+    deadline = deadline or Deadline()
+    domain = site_domain(page.url)
+    selectors = POPUP_SELECTORS
+    if selector_memory is not None:
+        selectors = selector_memory.order("popup", domain, POPUP_SELECTORS)
     try:
-        # 1. Diálogos JavaScript (alertas, confirmações)
-        page.on("dialog", lambda dialog: dialog.dismiss())
-        
-        # 2. Seletores prioritários (botões explícitos de fechar)
-        priority_selectors = [
-            '[aria-label*="fechar" i]', '[aria-label*="close" i]',
-            'button:has-text("×")', 'button:has-text("Fechar")', 
-            'button:has-text("Close")', '.close-btn', '.popup-close',
-            '#close-button', '[data-testid="close-button"]'
-        ]
-        
-        # 3. Seletores de cookies (comuns na UE)
-        cookie_selectors = [
-            # English selectors
-            'button:has-text("Accept cookies")',
-            'button:has-text("Accept all cookies")',
-            'button:has-text("Accept All")',
-            'button:has-text("Allow cookies")',
-            'button:has-text("Allow all cookies")',
-            'button:has-text("Agree")',
-            'button:has-text("I agree")',
-            'button:has-text("Consent")',
-            'button:has-text("Continue")',
-            'button:has-text("Got it")',
-            'button:has-text("OK")',
-            
-            # Portuguese selectors
-            'button:has-text("Aceitar cookies")',
-            'button:has-text("Aceitar todos os cookies")',
-            'button:has-text("Permitir cookies")',
-            'button:has-text("Permitir todos")',
-            'button:has-text("Concordar")',
-            'button:has-text("Eu concordo")',
-            'button:has-text("Continuar")',
-            'button:has-text("Entendi")',
-            
-            # ID and class selectors 
-            '#accept-cookies',
-            '#cookie-accept',
-            '#cookie-agree',
-            '#cookie-consent',
-            '.cookie-accept',
-            '.cookie-agree',
-            '.cookie-consent',
-            '.cookie-banner-accept',
-            '.cookie-button-accept',
-            
-            # generic selectors
-            'button[id*="cookie"]',
-            'button[class*="cookie"]',
-            'button[id*="accept"]',
-            'button[class*="accept"]',
-            'button[id*="agree"]',
-            'button[class*="agree"]'
-        ]
-        
-        # Tentar fechar popups prioritários
-        for selector in priority_selectors + cookie_selectors:
-            try:
-                elements = page.query_selector_all(selector)
-                for element in elements:
-                    if element.is_visible():
-                        element.click(timeout=1000)
-                        page.wait_for_timeout(200)  # Pequena pausa
-            except:
-                continue
-        
-        # 4. Fechar overlays genéricos (se nenhum botão foi encontrado)
-        overlay_selectors = [
-            '.overlay', '.modal', '[class*="popup" i]', 
-            '[id*="popup" i]', '.blocker'
-        ]
-        for selector in overlay_selectors:
-            try:
-                overlay = page.query_selector(selector)
-                if overlay and overlay.is_visible():
-                    # Clica no canto superior direito (fallback)
-                    overlay.click(position={"x": 90, "y": 10})
-            except:
-                continue
-                
+        for _ in range(POPUP_DISMISS_PASSES):
+            if deadline.phase_expired("close_popups"):
+                print("[WARNING] Orçamento de popups esgotado, seguindo com o que foi fechado")
+                return
+            dismissed = page.evaluate(DISMISS_POPUPS_SCRIPT, [selectors, POPUP_OVERLAY_SELECTORS])
+            if not dismissed["clicked"] and not dismissed["hidden"]:
+                return
+            if selector_memory is not None:
+                for control in dismissed["clicked"]:
+                    selector_memory.record("popup", domain, control["selector"])
+            print(f"[Popups] Fechados: {[c['text'] or c['selector'] for c in dismissed['clicked']]}"
+                  f", overlays escondidos: {dismissed['hidden']}")
+            page.wait_for_timeout(deadline.timeout_ms("close_popups", cap_ms=200))  # Animação de saída
+
     except Exception as e:
         print(f"[WARNING] Erro ao fechar popups: {e}")  # Log sem travar
 
 
-def handle_cep_prompt(page, default_cep="00000-000"):
-    """Detecta e preenche campos de CEP quando exigidos."""
-    cep_selectors = [
-        'input[id*="cep" i]',
-        'input[name*="cep" i]',
-        'input[placeholder*="cep" i]',
-        'input[class*="cep" i]',
-        '#cep',
-        '#postalCode'
-    ]
-    
-    for selector in cep_selectors:
-        try:
-            cep_field = page.locator(selector).first
-            if cep_field.is_visible(timeout=3000):
-                print(f"[CEP] Campo encontrado: {selector}")
-                cep_field.fill(default_cep)
-                # Submeter o formulário (se houver botão)
-                submit_buttons = [
-                    'button[type="submit"]',
-                    'button:has-text("Confirmar")',
-                    'button:has-text("Aplicar")',
-                    'button:has-text("quero ofertas")'
-                ]
-                for btn_selector in submit_buttons:
-                    try:
-                        btn = page.locator(btn_selector).first
-                        if btn.is_visible():
-                            btn.click()
-                            page.wait_for_timeout(1000)  # Espera recarregar
-                            print(f"[CEP] Clicou no botao Ofertas")
-                            return True  # CEP preenchido com sucesso
-                    except:
-                        continue
-        except:
-            continue
-    return False  # Nenhum campo de CEP encontrado
\ No newline at end of file
+def arm_popup_guard(context):
+    """Prepara o contexto: diálogos JS recusados e guarda contra popups tardios.
+
+    Chamado uma única vez por contexto (BrowserManager), e não a cada página.
+    """
+    context.on("dialog", lambda dialog: dialog.dismiss())
+    context.add_init_script(POPUP_GUARD_SCRIPT % (
+        json.dumps(POPUP_SELECTORS), json.dumps(POPUP_OVERLAY_SELECTORS), POPUP_GUARD_MS
+    ))
+
+
+def handle_cep_prompt(page, default_cep=DEFAULT_CEP, deadline=None, memory=None, selector_memory=None):
+    """Detecta e preenche campos de CEP quando exigidos.
+
+    A detecção é um único script na página, sem esperas por seletor. Com
+    ``memory``, pula domínios que nunca pediram CEP; com ``selector_memory``,
+    tenta primeiro o campo e o botão que já funcionaram no domínio.
+    """
+    deadline = deadline or Deadline()
+    domain = site_domain(page.url)
+    field_selectors, button_selectors = CEP_FIELD_SELECTORS, CEP_BUTTON_SELECTORS
+
+    if memory is not None and not memory.should_check(domain):
+        return False
+    if selector_memory is not None:
+        field_selectors = selector_memory.order("cep_field", domain, CEP_FIELD_SELECTORS)
+        button_selectors = selector_memory.order("cep_button", domain, CEP_BUTTON_SELECTORS)
+
+    try:
+        found = page.evaluate(FIND_CEP_SCRIPT, [field_selectors, button_selectors])
+    except Exception as e:
+        print(f"[CEP] Erro ao procurar o campo: {e}")
+        return False
+
+    if not found["field"]:
+        if memory is not None:
+            memory.record(domain)
+        return False  # Nenhum campo de CEP encontrado
+
+    try:
+        print(f"[CEP] Campo encontrado: {found['field']}")
+        page.locator('[data-achar-cep="field"]').fill(default_cep, timeout=deadline.timeout_ms("cep"))
+
+        # Submeter o formulário (pelo botão, se houver, ou com Enter)
+        if found["button"]:
+            page.locator('[data-achar-cep="button"]').click(timeout=deadline.timeout_ms("cep"))
+            print(f"[CEP] Clicou no botão: {found['button']}")
+        else:
+            page.locator('[data-achar-cep="field"]').press("Enter", timeout=deadline.timeout_ms("cep"))
+        page.wait_for_timeout(deadline.timeout_ms("cep", cap_ms=1000))  # Espera recarregar
+    except Exception as e:
+        print(f"[CEP] Falha ao preencher o CEP: {e}")
+        return False
+
+    if memory is not None:
+        memory.record(domain, found["field"], found["button"])
+    if selector_memory is not None:
+        selector_memory.record("cep_field", domain, found["field"])
+        if found["button"]:
+            selector_memory.record("cep_button", domain, found["button"])
+    return True  # CEP preenchido com sucesso
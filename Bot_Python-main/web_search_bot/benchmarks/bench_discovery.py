@@ -0,0 +1,79 @@
+"""Compara o custo da descoberta da barra de busca: varredura antiga x script único.
+
+Uso (a partir de web_search_bot/):
+    python benchmarks/bench_discovery.py https://loja1.com.br https://loja2.com.br
+    python benchmarks/bench_discovery.py --file lojas.txt
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.sync_api import sync_playwright
+from achar import SEARCH_SELECTORS, find_search_candidates
+
+
+def legacy_discovery(page):
+    """Varredura antiga: count() e is_visible() por seletor, uma ida e volta cada."""
+    for selector in SEARCH_SELECTORS:
+        try:
+            elements = page.locator(selector)
+            count = elements.count()
+            for i in range(count):
+                if elements.nth(i).is_visible():
+                    return selector
+        except Exception:
+            continue
+    return None
+
+
+def measure(page, url):
+    page.goto(url, wait_until="load")
+
+    start = time.time()
+    legacy_selector = legacy_discovery(page)
+    legacy_ms = (time.time() - start) * 1000
+
+    start = time.time()
+    candidates = find_search_candidates(page)
+    single_ms = (time.time() - start) * 1000
+
+    best = candidates[0]["selector"] if candidates else None
+    return legacy_ms, single_ms, legacy_selector, best
+
+
+def main(urls):
+    rows = []
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True)
+        for url in urls:
+            page = browser.new_page()
+            try:
+                legacy_ms, single_ms, legacy_selector, best = measure(page, url)
+                rows.append((legacy_ms, single_ms))
+                print(f"{url}\n  antiga: {legacy_ms:8.0f} ms  ({legacy_selector})"
+                      f"\n  única:  {single_ms:8.0f} ms  ({best})")
+            except Exception as e:
+                print(f"{url}\n  erro: {e}")
+            finally:
+                page.close()
+        browser.close()
+
+    if rows:
+        legacy_total = sum(r[0] for r in rows)
+        single_total = sum(r[1] for r in rows)
+        print(f"\n{len(rows)} páginas - média antiga {legacy_total / len(rows):.0f} ms, "
+              f"média única {single_total / len(rows):.0f} ms "
+              f"({legacy_total / max(single_total, 1):.1f}x)")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if len(args) == 2 and args[0] == '--file':
+        with open(args[1], encoding='utf-8') as f:
+            args = [line.strip() for line in f if line.strip()]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    main(args)
@@ -0,0 +1,96 @@
+"""Microbenchmark do detector de frases negativas sobre textos de vários megabytes.
+
+Compara a varredura antiga (uma re.search com ".*" por frase, recompilada a
+cada site) com o padrão único e limitado de negative_matcher.
+
+Uso (a partir de web_search_bot/):
+    python benchmarks/bench_negative_matcher.py [megabytes] [repeticoes]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from negative_matcher import NEGATIVE_PHRASES, compile_negative_matcher, find_negative_phrase
+
+SEARCH_TERM = "Giramille"
+
+WORDS = [
+    "boneca", "carrinho", "quebra-cabeça", "livro", "pelúcia", "jogo", "infantil",
+    "novo", "nosso", "produto", "oferta", "frete", "grátis", "resultado", "loja",
+    "brinquedo", "educativo", "kit", "promoção", "compre", "agora", "parcelado"
+]
+
+
+def legacy_find(page_text, search_term):
+    phrases = [
+        p.replace("{gap}", ".*").replace("{term}", re.escape(search_term))
+        for p in NEGATIVE_PHRASES
+    ]
+    text = page_text.lower()
+    for phrase in phrases:
+        if re.search(phrase, text, flags=re.IGNORECASE):
+            return phrase
+    return None
+
+
+def make_page_text(megabytes, with_term, line_words=400, seed=42):
+    """Texto sem frase negativa, o pior caso: todas as frases precisam ser testadas.
+
+    Com ``with_term`` cada linha (um card de produto) cita o termo uma vez.
+    """
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < megabytes * 1024 * 1024:
+        words = [rng.choice(WORDS) for _ in range(line_words)]
+        if with_term:
+            words.insert(rng.randrange(line_words), SEARCH_TERM)
+        line = " ".join(words)
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_scenario(name, page_text, repeat):
+    compile_negative_matcher.cache_clear()
+    cold, _ = timed(find_negative_phrase, page_text, SEARCH_TERM, repeat=1)
+    warm, new_result = timed(find_negative_phrase, page_text, SEARCH_TERM, repeat=repeat)
+    legacy, legacy_result = timed(legacy_find, page_text, SEARCH_TERM, repeat=repeat)
+
+    print(f"{name} ({len(page_text) / 1024 / 1024:.1f} MB)")
+    print(f"  antigo (uma re.search com .* por frase): {legacy * 1000:9.1f} ms -> {legacy_result}")
+    print(f"  novo, compilando:                        {cold * 1000:9.1f} ms")
+    print(f"  novo, em cache:                          {warm * 1000:9.1f} ms -> {new_result}")
+    print(f"  ganho: {legacy / warm:.1f}x")
+
+
+def main(megabytes=4.0, repeat=3):
+    print(f"Termo '{SEARCH_TERM}', {repeat} repetições (melhor tempo)\n")
+    run_scenario("Página sem o termo", make_page_text(megabytes, with_term=False), repeat)
+    run_scenario("Listagem com o termo em cada card", make_page_text(megabytes, with_term=True), repeat)
+
+    # Uma página negativa no fim do texto, para conferir que a frase certa é apontada
+    negative_text = make_page_text(1, with_term=True) + \
+        f"\nsua busca por {SEARCH_TERM.lower()} não retornou resultados"
+    print(f"\nPágina negativa -> {find_negative_phrase(negative_text, SEARCH_TERM)}")
+    print(compile_negative_matcher.cache_info())
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(float(args[0]) if args else 4.0, int(args[1]) if len(args) > 1 else 3)
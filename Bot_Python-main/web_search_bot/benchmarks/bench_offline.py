@@ -0,0 +1,248 @@
+"""Benchmark offline do bot contra lojas sintéticas servidas localmente.
+
+Sobe o servidor de benchmarks/synthetic_store.py e mede, sem acesso à rede:
+  1. close_popups e handle_cep_prompt isolados (tempo e acerto);
+  2. search_and_scroll em cada loja (tempo por fase e acerto da detecção);
+  3. o process_sites completo, um loop do job (sites por minuto).
+Compara com o baseline salvo, se houver.
+
+Uso (a partir de web_search_bot/):
+    python benchmarks/bench_offline.py [--stores N] [--workers N] [--profile throughput]
+    python benchmarks/bench_offline.py --save-baseline
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Caches, histórico e agendamento do benchmark ficam numa pasta temporária,
+# sem misturar com o data/ de produção
+os.chdir(tempfile.mkdtemp(prefix="achar-bench-"))
+
+from playwright.sync_api import sync_playwright
+from achar import search_and_scroll, close_popups, handle_cep_prompt
+from jobs import Job
+from metrics import PHASES, timed
+from synthetic_store import STORE_TERM, DEFAULT_STORE_COUNT, build_stores, start_server, store_url
+import main
+
+BASELINE_PATH = os.path.join(BOT_DIR, 'benchmarks', 'offline_baseline.json')
+
+# Tempo máximo de cada operação do Playwright nas lojas locais (ms)
+PAGE_TIMEOUT_MS = 10000
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def bench_components(browser, stores, base_url):
+    """close_popups e handle_cep_prompt isolados, cada um numa página recém-aberta."""
+    timings = {"close_popups": [], "cep": []}
+    popup_hits = popup_total = cep_hits = 0
+
+    for store in stores:
+        page = browser.new_page()
+        page.set_default_timeout(PAGE_TIMEOUT_MS)
+        try:
+            page.goto(store_url(base_url, store), wait_until="load")
+
+            spent = {}
+            with timed(spent, "close_popups"):
+                close_popups(page)
+            if store["popup"] != "none":
+                popup_total += 1
+                # O modal de CEP não é popup: fica para o handle_cep_prompt
+                remaining = page.evaluate("() => [...document.querySelectorAll('[data-popup]')]"
+                                          ".filter(el => el.getBoundingClientRect().height > 0).length")
+                popup_hits += remaining == 0
+
+            with timed(spent, "cep"):
+                filled = handle_cep_prompt(page, default_cep="22071-001")
+            cep_hits += bool(filled) == store["cep"]
+
+            for phase, seconds in spent.items():
+                timings[phase].append(seconds)
+        finally:
+            page.close()
+
+    return {
+        "timings": timings,
+        "popups_closed": f"{popup_hits}/{popup_total}",
+        "cep_correct": f"{cep_hits}/{len(stores)}",
+    }
+
+
+def bench_search(browser, stores, base_url):
+    """search_and_scroll em cada loja, com o tempo de cada fase e o acerto."""
+    timings = {phase: [] for phase in PHASES}
+    confusion = {"tp": 0, "fp": 0, "tn": 0, "fn": 0}
+    bar_hits = 0
+    misses = []
+
+    for store in stores:
+        page = browser.new_page()
+        page.set_default_timeout(PAGE_TIMEOUT_MS)
+        details = {"timings": {}}
+        try:
+            with timed(details["timings"], "navigate"):
+                page.goto(store_url(base_url, store), wait_until="load")
+            field_found, term_found = search_and_scroll(page, STORE_TERM, details)
+        except Exception as e:
+            print(f"  loja {store['id']}: erro {e}")
+            field_found, term_found = False, False
+        finally:
+            page.close()
+
+        for phase, seconds in details["timings"].items():
+            timings.setdefault(phase, []).append(seconds)
+
+        bar_hits += field_found == store["has_search_bar"]
+        key = ("t" if term_found == store["term_present"] else "f") + ("p" if term_found else "n")
+        confusion[key] += 1
+        if key in ("fp", "fn") or field_found != store["has_search_bar"]:
+            misses.append(f"loja {store['id']} ({store['search']}/{store['popup']}/"
+                          f"{'cep' if store['cep'] else 'sem cep'}/{store['results']}): "
+                          f"barra={field_found} termo={term_found}")
+
+    return {
+        "timings": timings,
+        "search_bar_correct": f"{bar_hits}/{len(stores)}",
+        "accuracy": round((confusion["tp"] + confusion["tn"]) / len(stores), 3),
+        "confusion": confusion,
+        "misses": misses,
+    }
+
+
+def bench_process_sites(stores, base_url, workers, profile_name):
+    """Um loop completo do process_sites, com os workers e o pool de navegadores reais."""
+    sites = [{"url": store_url(base_url, store), "term": STORE_TERM} for store in stores]
+    job = Job(sites, profile_name, workers)
+
+    runner = threading.Thread(target=main.process_sites, args=(job,), daemon=True)
+    start = time.time()
+    runner.start()
+    while not job.loop_complete and runner.is_alive():
+        time.sleep(0.2)
+    elapsed = time.time() - start
+    job.cancel()
+    runner.join()
+
+    rows = job.table.rows()
+    correct = sum(
+        (row["status_content_search"] == "Termo encontrado") == store["term_present"]
+        for row, store in zip(rows, stores)
+    )
+    return {
+        "seconds": round(elapsed, 2),
+        "sites_per_minute": round(len(sites) / elapsed * 60, 2),
+        "accuracy": round(correct / len(stores), 3),
+    }
+
+
+def phase_summary(timings):
+    summary = {}
+    for phase, values in timings.items():
+        if values:
+            summary[phase] = {
+                "p50": round(percentile(values, 0.5), 3),
+                "p90": round(percentile(values, 0.9), 3),
+                "p99": round(percentile(values, 0.99), 3),
+                "n": len(values),
+            }
+    return summary
+
+
+def compare(label, current, baseline, lower_is_better=True):
+    if baseline in (None, 0) or current is None:
+        return f"{label}: {current}"
+    change = (current - baseline) / baseline * 100
+    better = change < 0 if lower_is_better else change > 0
+    return f"{label}: {current} (baseline {baseline}, {change:+.1f}% {'melhor' if better else 'pior'})"
+
+
+def report(results, baseline):
+    base = baseline or {}
+
+    print("\n== Componentes isolados ==")
+    print(f"popups fechados: {results['components']['popups_closed']}, "
+          f"CEP correto: {results['components']['cep_correct']}")
+    for phase, stats in results["components"]["phases"].items():
+        base_p50 = base.get("components", {}).get("phases", {}).get(phase, {}).get("p50")
+        print(f"  {compare(f'{phase:12s} p50', stats['p50'], base_p50)}  p90 {stats['p90']}  p99 {stats['p99']}")
+
+    print("\n== search_and_scroll ==")
+    search = results["search"]
+    print(f"barra de busca correta: {search['search_bar_correct']}, matriz: {search['confusion']}")
+    print(compare("acurácia", search["accuracy"], base.get("search", {}).get("accuracy"), lower_is_better=False))
+    for phase, stats in search["phases"].items():
+        base_p50 = base.get("search", {}).get("phases", {}).get(phase, {}).get("p50")
+        print(f"  {compare(f'{phase:12s} p50', stats['p50'], base_p50)}  p90 {stats['p90']}  p99 {stats['p99']}")
+    for miss in search["misses"]:
+        print(f"  erro: {miss}")
+
+    print("\n== process_sites (1 loop) ==")
+    full = results["process_sites"]
+    base_full = base.get("process_sites", {})
+    print(compare("sites por minuto", full["sites_per_minute"], base_full.get("sites_per_minute"), lower_is_better=False))
+    print(compare("acurácia", full["accuracy"], base_full.get("accuracy"), lower_is_better=False))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stores", type=int, default=DEFAULT_STORE_COUNT)
+    parser.add_argument("--workers", type=int, default=main.NUM_WORKERS)
+    parser.add_argument("--profile", default="throughput", choices=sorted(main.RUN_PROFILES))
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="grava o resultado como novo baseline")
+    args = parser.parse_args()
+
+    stores = build_stores(args.stores)
+    server, base_url = start_server(stores)
+    print(f"{len(stores)} lojas sintéticas em {base_url}")
+
+    results = {"stores": len(stores), "workers": args.workers, "profile": args.profile}
+    try:
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch(headless=True)
+            components = bench_components(browser, stores, base_url)
+            components["phases"] = phase_summary(components.pop("timings"))
+            results["components"] = components
+
+            search = bench_search(browser, stores, base_url)
+            search["phases"] = phase_summary(search.pop("timings"))
+            results["search"] = search
+            browser.close()
+
+        # Fora do "with": o process_sites abre o próprio Playwright em cada worker
+        results["process_sites"] = bench_process_sites(stores, base_url, args.workers, args.profile)
+    finally:
+        server.shutdown()
+
+    baseline = None
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("stores") != results["stores"]:
+            print(f"[WARNING] Baseline com {baseline.get('stores')} lojas; comparação aproximada")
+
+    report(results, baseline)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nBaseline gravado em {BASELINE_PATH}")
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,244 @@
+"""Servidor HTTP local com lojas sintéticas para os benchmarks offline.
+
+Cada loja combina uma variante de barra de busca, de popup, de modal de CEP
+e de página de resultados, e sabe a resposta certa (tem barra? o termo está
+num produto?). Para navegar pelas lojas manualmente:
+    python benchmarks/synthetic_store.py [porta]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+import html
+import sys
+import threading
+import time
+
+
+# Termo buscado nas lojas sintéticas
+STORE_TERM = "Giramille"
+
+# Quantidade padrão de lojas geradas
+DEFAULT_STORE_COUNT = 24
+
+# Páginas de resultados carregadas pela rolagem infinita e produtos por página
+RESULT_PAGES = 4
+PRODUCTS_PER_PAGE = 12
+
+# Atraso de cada página carregada sob demanda, imitando uma API lenta (segundos)
+MORE_DELAY_SECONDS = 0.2
+
+ENTER_SCRIPT = """
+<script>
+document.getElementById('b').addEventListener('keydown', (e) => {
+    if (e.key === 'Enter') location.href = 'busca?q=' + encodeURIComponent(e.target.value);
+});
+</script>
+"""
+
+# Variante -> (HTML da barra de busca, a barra é utilizável?)
+SEARCH_VARIANTS = {
+    "type-search": ('<form action="busca"><input type="search" name="q"></form>', True),
+    "placeholder-busca": ('<input id="b" placeholder="Busca de produtos">' + ENTER_SCRIPT, True),
+    "search-bar-class": ('<div class="search-bar"><input type="text" id="b"></div>' + ENTER_SCRIPT, True),
+    "name-q": ('<form action="busca"><input type="text" name="q"><button>Ir</button></form>', True),
+    "brincar": ('<input id="b" placeholder="Com o que vamos brincar hoje?">' + ENTER_SCRIPT, True),
+    "combobox": ('<input id="b" role="combobox" aria-label="Pesquisar">' + ENTER_SCRIPT, True),
+    # Campo escondido atrás de um botão: existe, mas a descoberta só enxerga o botão
+    "toggle": ('<button class="search-toggle" onclick="document.getElementById(\'b\').hidden = false">'
+               'Lupa</button><input id="b" type="text" hidden>' + ENTER_SCRIPT, True),
+    "none": ('', False),
+}
+
+POPUP_VARIANTS = {
+    "none": '',
+    "cookie": (
+        '<div class="cookie-banner" data-popup style="position:fixed;bottom:0;left:0;right:0;'
+        'background:#eee;padding:16px;z-index:900"><p>Usamos cookies.</p>'
+        '<button class="cookie-accept" onclick="this.parentElement.hidden = true">Aceitar cookies</button></div>'
+    ),
+    # Overlay de tela cheia: enquanto aberto, intercepta os cliques na barra de busca
+    "newsletter": (
+        '<div class="newsletter-popup" data-popup style="position:fixed;inset:0;'
+        'background:rgba(0,0,0,.5);z-index:1000"><div style="background:#fff;margin:100px auto;'
+        'width:300px;padding:20px"><p>Assine a nossa newsletter!</p>'
+        '<button class="popup-close" aria-label="Fechar" '
+        'onclick="this.closest(\'[data-popup]\').hidden = true">×</button></div></div>'
+    ),
+}
+
+CEP_MODAL = (
+    '<div class="cep-modal" data-cep style="position:fixed;top:40px;right:40px;background:#fff;'
+    'border:1px solid #999;padding:16px;z-index:950"><p>Informe o seu CEP para ver as ofertas</p>'
+    '<input id="cep" placeholder="Digite seu CEP">'
+    '<button type="submit" onclick="this.parentElement.hidden = true">Confirmar</button></div>'
+)
+
+# Tipo de página de resultados -> o termo aparece num produto?
+RESULT_VARIANTS = {
+    "found": True,       # produto com o termo na primeira página
+    "deep": True,        # produto com o termo só na última página da rolagem infinita
+    "none": False,       # "nenhum resultado encontrado"
+    "echo": False,       # só o eco da busca ("resultados para ..."), produtos sem o termo
+    "hidden": False,     # termo só num elemento escondido
+}
+
+FILLER_PRODUCTS = [
+    "Boneca de pano", "Carrinho de madeira", "Jogo da memória", "Pião colorido",
+    "Bola de futebol", "Massinha de modelar", "Kit de pintura", "Dominó infantil",
+    "Ursinho de pelúcia", "Blocos de montar", "Cubo mágico", "Patinete",
+]
+
+# Carrega a próxima página de produtos quando a rolagem chega perto do fim
+INFINITE_SCROLL_SCRIPT = """
+<script>
+let nextPage = 1, loading = false;
+window.addEventListener('scroll', async () => {
+    if (loading || nextPage >= %d) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 200) return;
+    loading = true;
+    const response = await fetch('more?q={query}&page=' + nextPage);
+    document.getElementById('list').insertAdjacentHTML('beforeend', await response.text());
+    nextPage += 1;
+    loading = false;
+});
+</script>
+""" % RESULT_PAGES
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>{title}</title>
+<style>[hidden] {{ display: none !important; }} .product-card {{ height: 120px; border: 1px solid #ddd; margin: 8px; }}</style>
+</head><body>
+<header><h2>{title}</h2>{search}</header>
+{body}
+{popup}{cep}
+</body></html>"""
+
+
+def build_stores(count=DEFAULT_STORE_COUNT):
+    """Catálogo determinístico de lojas, cada uma com a sua resposta esperada."""
+    searches = list(SEARCH_VARIANTS)
+    popups = list(POPUP_VARIANTS)
+    results = list(RESULT_VARIANTS)
+
+    stores = []
+    for i in range(count):
+        search = searches[i % len(searches)]
+        result = results[(i // 2) % len(results)]
+        stores.append({
+            "id": i,
+            "search": search,
+            "popup": popups[(i // 3) % len(popups)],
+            "cep": i % 4 == 1,
+            "results": result,
+            "has_search_bar": SEARCH_VARIANTS[search][1],
+            "term_present": RESULT_VARIANTS[result],
+        })
+    return stores
+
+
+def product_card(name):
+    return f'<div class="product-card"><h3 class="product-name">{html.escape(name)}</h3><span>R$ 49,90</span></div>'
+
+
+def results_page_products(store, page):
+    """Produtos de uma página de resultados da loja."""
+    names = [f"{FILLER_PRODUCTS[(page * 5 + n) % len(FILLER_PRODUCTS)]} {page * PRODUCTS_PER_PAGE + n}"
+             for n in range(PRODUCTS_PER_PAGE)]
+    term_page = {"found": 0, "deep": RESULT_PAGES - 1}.get(store["results"])
+    if term_page == page:
+        names[PRODUCTS_PER_PAGE // 2] = f"Quebra-cabeça {STORE_TERM} 100 peças"
+    return "".join(product_card(name) for name in names)
+
+
+def landing_page(store):
+    search_html = SEARCH_VARIANTS[store["search"]][0]
+    body = '<main><p>Bem-vindo! Confira as nossas ofertas.</p>' + "".join(
+        product_card(name) for name in FILLER_PRODUCTS[:4]) + '</main>'
+    return PAGE_TEMPLATE.format(
+        title=f"Loja {store['id']}", search=search_html, body=body,
+        popup=POPUP_VARIANTS[store["popup"]], cep=CEP_MODAL if store["cep"] else ""
+    )
+
+
+def search_page(store, query):
+    echo = f'<h1>Resultados para "{html.escape(query)}"</h1>'
+
+    if store["results"] == "none":
+        body = (f'<p>Nenhum resultado encontrado para "{html.escape(query)}".</p>'
+                '<h4>Você também pode gostar</h4><div class="recommendations">'
+                + "".join(product_card(name) for name in FILLER_PRODUCTS[:4]) + '</div>')
+    else:
+        hidden = (f'<div style="display:none">{STORE_TERM} em promoção</div>'
+                  if store["results"] == "hidden" else "")
+        body = (echo + hidden + '<div class="product-list" id="list">' + results_page_products(store, 0)
+                + '</div>' + INFINITE_SCROLL_SCRIPT.replace("{query}", quote(query)))
+
+    return PAGE_TEMPLATE.format(
+        title=f"Loja {store['id']} - busca", search=SEARCH_VARIANTS[store["search"]][0],
+        body=body, popup="", cep=""
+    )
+
+
+class StoreHandler(BaseHTTPRequestHandler):
+    stores = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        parts = [part for part in url.path.split("/") if part]
+
+        if len(parts) < 2 or parts[0] != "store" or not parts[1].isdigit() or int(parts[1]) >= len(self.stores):
+            return self._send(404, "<h1>Página não encontrada</h1>")
+
+        store = self.stores[int(parts[1])]
+        action = parts[2] if len(parts) > 2 else ""
+        query = params.get("q", [""])[0]
+
+        if action == "":
+            return self._send(200, landing_page(store))
+        if action == "busca":
+            return self._send(200, search_page(store, query))
+        if action == "more":
+            time.sleep(MORE_DELAY_SECONDS)
+            page = int(params.get("page", ["1"])[0])
+            return self._send(200, results_page_products(store, page))
+        return self._send(404, "<h1>Página não encontrada</h1>")
+
+    def _send(self, status, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(stores, port=0):
+    """Sobe o servidor numa thread; devolve (servidor, URL base)."""
+    handler = type("BoundStoreHandler", (StoreHandler,), {"stores": stores})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def store_url(base_url, store):
+    """URL da loja num host próprio: as memórias do bot são por domínio (templates, CEP,
+    seletores, impressões digitais) e não podem ser compartilhadas entre as lojas.
+    O Chromium resolve qualquer *.localhost para o 127.0.0.1 do servidor."""
+    return f"http://store-{store['id']}.localhost:{urlparse(base_url).port}/store/{store['id']}/"
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    stores = build_stores()
+    server, base_url = start_server(stores, port)
+    for store in stores:
+        print(f"{store_url(base_url, store)}  busca={store['search']} popup={store['popup']} "
+              f"cep={store['cep']} resultados={store['results']}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
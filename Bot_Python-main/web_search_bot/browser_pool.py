@@ -0,0 +1,204 @@
+from playwright.sync_api import sync_playwright
+import threading
+
+try:
+    import psutil  # Mede a memória do navegador e permite ao watchdog encerrá-lo (requirements.txt)
+except ImportError:
+    psutil = None
+
+
+# Quantas páginas um contexto atende antes de ser trocado (limpa cookies/cache)
+MAX_PAGES_PER_CONTEXT = 25
+
+# Quantas páginas um navegador atende antes de ser reiniciado
+MAX_PAGES_PER_BROWSER = 300
+
+# Reinicia o navegador quando a memória (RSS) dele passar desse limite, em MB
+MAX_BROWSER_RSS_MB = 1500
+
+# Os drivers do Playwright são iniciados um por vez para identificar o processo de cada um
+_driver_lock = threading.Lock()
+
+
+def _child_pids(pid=None):
+    """Filhos diretos do processo ``pid`` (o atual, se None)."""
+    if psutil is None:
+        return set()
+    try:
+        return {p.pid for p in psutil.Process(pid).children()}
+    except psutil.Error:
+        return set()
+
+
+class BrowserManager:
+    """Mantém um navegador aquecido entre os loops e entrega páginas de contextos reciclados.
+
+    A API síncrona do Playwright só pode ser usada pela thread que a iniciou,
+    por isso cada worker cria e usa o seu próprio BrowserManager.
+    """
+
+    def __init__(self, profile, blocker=None, max_pages_per_context=MAX_PAGES_PER_CONTEXT,
+                 max_pages_per_browser=MAX_PAGES_PER_BROWSER, max_rss_mb=MAX_BROWSER_RSS_MB,
+                 context_hooks=()):
+        self.profile = profile
+        self.blocker = blocker
+        # Funções chamadas com cada contexto novo (handlers e init scripts, uma vez por contexto)
+        self.context_hooks = list(context_hooks)
+        self.max_pages_per_context = max_pages_per_context
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_rss_mb = max_rss_mb
+
+        self.playwright = None
+        # Processo do driver (node) deste manager: os navegadores dele são filhos desse processo
+        self.driver_pid = None
+        self.browser = None
+        self.browser_pids = set()
+        self.context = None
+        self.context_pages = 0
+        self.browser_pages = 0
+        self.launches = 0
+
+    def start(self):
+        # O driver é filho direto deste processo; os navegadores de outros workers são
+        # filhos dos drivers deles, então não aparecem nesta diferença
+        with _driver_lock:
+            before = _child_pids()
+            self.playwright = sync_playwright().start()
+            new_pids = _child_pids() - before
+        self.driver_pid = next(iter(new_pids)) if len(new_pids) == 1 else None
+
+    def stop(self):
+        self._close_browser()
+        if self.playwright:
+            self.playwright.stop()
+            self.playwright = None
+
+    def new_page(self):
+        """Devolve uma página nova, trocando contexto ou navegador quando necessário."""
+        if not self._browser_healthy():
+            if self.browser is not None:
+                print("[Browser] Navegador caiu, iniciando outro")
+            self._launch()
+        elif self._browser_needs_recycle():
+            self._launch()
+
+        if self.context is None or self.context_pages >= self.max_pages_per_context:
+            self._new_context()
+
+        try:
+            page = self.context.new_page()
+        except Exception as e:
+            # Contexto quebrado: descarta o navegador inteiro e tenta uma vez mais
+            print(f"[Browser] Falha ao abrir página ({e}), reiniciando navegador")
+            self._launch()
+            self._new_context()
+            page = self.context.new_page()
+
+        self.context_pages += 1
+        self.browser_pages += 1
+        return page
+
+    def release(self, page):
+        try:
+            if not page.is_closed():
+                page.close()
+        except Exception:
+            pass
+
+    def kill(self):
+        """Mata os processos do navegador. Não usa o Playwright, então pode ser
+        chamado de outra thread (watchdog); a próxima new_page() relança."""
+        if psutil is None or not self.browser_pids:
+            print("[Browser] Sem psutil, não foi possível encerrar o navegador travado")
+            return False
+
+        for pid in list(self.browser_pids):
+            try:
+                process = psutil.Process(pid)
+                for child in process.children(recursive=True):
+                    child.kill()
+                process.kill()
+            except psutil.Error:
+                continue
+        print("[Browser] Navegador encerrado pelo watchdog")
+        return True
+
+    def rss_mb(self):
+        """Memória somada dos processos do navegador, ou None sem psutil."""
+        if psutil is None or not self.browser_pids:
+            return None
+
+        total = 0
+        for pid in self.browser_pids:
+            try:
+                process = psutil.Process(pid)
+                total += process.memory_info().rss
+                for child in process.children(recursive=True):
+                    total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    def _browser_healthy(self):
+        try:
+            return self.browser is not None and self.browser.is_connected()
+        except Exception:
+            return False
+
+    def _browser_needs_recycle(self):
+        if self.browser_pages >= self.max_pages_per_browser:
+            print(f"[Browser] {self.browser_pages} páginas atendidas, reciclando navegador")
+            return True
+
+        rss = self.rss_mb()
+        if rss is not None and rss > self.max_rss_mb:
+            print(f"[Browser] Memória em {rss:.0f} MB, reciclando navegador")
+            return True
+
+        return False
+
+    def _launch(self):
+        self._close_browser()
+
+        # Só o driver deste manager lança navegadores como filhos diretos, então a
+        # diferença não pega processos dos navegadores de outros workers
+        before = _child_pids(self.driver_pid) if self.driver_pid else set()
+        self.browser = self.playwright.chromium.launch(
+            headless=self.profile["headless"],
+            slow_mo=self.profile["slow_mo"],
+            args=self.profile["args"]
+        )
+        # Apenas os processos raiz novos; os filhos (renderers) são somados em rss_mb()
+        self.browser_pids = _child_pids(self.driver_pid) - before if self.driver_pid else set()
+
+        self.browser_pages = 0
+        self.launches += 1
+
+    def _new_context(self):
+        if self.context is not None:
+            try:
+                self.context.close()
+            except Exception:
+                pass
+
+        if self.profile["viewport"]:
+            self.context = self.browser.new_context(viewport=self.profile["viewport"])
+        else:
+            self.context = self.browser.new_context()
+        self.context_pages = 0
+
+        if self.blocker is not None:
+            self.blocker.attach(self.context)
+        for hook in self.context_hooks:
+            hook(self.context)
+
+    def _close_browser(self):
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception:
+                pass
+        self.browser = None
+        self.browser_pids = set()
+        self.context = None
+        self.context_pages = 0
@@ -0,0 +1,69 @@
+import re
+import threading
+import time
+
+
+# CEP usado quando o job não informa outro
+DEFAULT_CEP = "22071-001"
+
+# Formato aceito no CEP informado pelo usuário (com ou sem hífen)
+CEP_PATTERN = re.compile(r"^\d{5}-?\d{3}$")
+
+# Domínio que nunca pediu CEP volta a ser verificado depois desse tempo (segundos)
+CEP_RECHECK_SECONDS = 7 * 24 * 3600
+
+
+def valid_cep(value):
+    return bool(CEP_PATTERN.match(str(value).strip()))
+
+
+class CepMemory:
+    """Memória, por domínio, de lojas que pedem CEP e de como preenchê-lo.
+
+    Guarda se o domínio já mostrou um campo de CEP e quais seletores de campo
+    e de botão funcionaram (a ordem de tentativa fica com o SelectorMemory).
+    Um domínio que nunca pediu CEP pula a verificação até ``recheck`` segundos
+    depois da última checagem.
+    """
+
+    def __init__(self, store, recheck=CEP_RECHECK_SECONDS):
+        self.store = store
+        self.recheck = recheck
+        self._lock = threading.Lock()
+        self.counters = {"filled": 0, "absent": 0, "skipped": 0}
+
+    def get(self, domain):
+        return self.store.get(domain)
+
+    def should_check(self, domain):
+        entry = self.store.get(domain)
+        if entry is None or entry["gate"]:
+            return True
+        if time.time() - entry["checked_at"] >= self.recheck:
+            return True
+        self._count("skipped")
+        return False
+
+    def record(self, domain, field=None, button=None):
+        """Registra a checagem: com ``field``, o domínio tem (ou já teve) CEP."""
+        def update(entry):
+            entry = entry or {"gate": False, "field": None, "button": None}
+            entry["checked_at"] = time.time()
+            if field:
+                entry.update({"gate": True, "field": field, "button": button, "filled_at": time.time()})
+            return entry
+
+        entry = self.store.update(domain, update)
+        self._count("filled" if field else "absent")
+        return entry
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["known"] = len(self.store)
+        stats["gates"] = sum(1 for _, entry in self.store.items() if entry["gate"])
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
@@ -0,0 +1,123 @@
+from contextlib import contextmanager
+import threading
+import time
+
+
+# Prazo total padrão de um site (segundos)
+SITE_DEADLINE_SECONDS = 30
+
+# Orçamento máximo de cada fase (segundos). Nenhuma chamada do Playwright dentro
+# da fase espera mais que o orçamento dela nem mais que o que resta do prazo do site
+PHASE_BUDGETS = {
+    "page": 10,
+    "resolve": 15,
+    "navigate": 12,
+    "close_popups": 3,
+    "cep": 4,
+    "settle": 2,
+    "discovery": 3,
+    "submit": 8,
+    "fingerprint": 2,
+    "scroll": 10,
+    "detect": 4,
+}
+
+# Folga após o prazo antes de o watchdog derrubar o navegador (segundos)
+WATCHDOG_GRACE_SECONDS = 5
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """Prazo de um site, repassado por todas as fases do processamento.
+
+    ``limit(page, fase)`` ajusta os timeouts padrão da página para o menor
+    valor entre o que resta do orçamento da fase e o tempo restante do site;
+    cada chamada do Playwright dentro da fase passa ``timeout_ms(fase)``,
+    recalculado na hora, para que chamadas seguidas não ganhem o orçamento
+    inteiro de novo. O orçamento é a soma de todas as entradas na fase.
+    Fases opcionais (popups, CEP, rolagem) consultam ``phase_expired`` para
+    parar no meio e devolver o que já têm, em vez de estourar o prazo.
+    """
+
+    def __init__(self, seconds=SITE_DEADLINE_SECONDS, budgets=None):
+        self.seconds = seconds
+        self.budgets = budgets or PHASE_BUDGETS
+        self.started = time.time()
+        # Tempo já gasto em cada fase (entradas anteriores) e início da entrada atual
+        self._phase_used = {}
+        self._phase_entered = {}
+
+    def remaining(self):
+        return self.seconds - (time.time() - self.started)
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        if self.expired:
+            raise DeadlineExceeded(f"Tempo limite de {self.seconds}s excedido")
+
+    def phase_remaining(self, phase, reserve=0):
+        """Tempo que a fase ainda pode gastar, guardando ``reserve`` segundos para as seguintes."""
+        remaining = self.remaining() - reserve
+        budget = self.budgets.get(phase)
+        if budget is not None:
+            used = self._phase_used.get(phase, 0)
+            if phase in self._phase_entered:
+                used += time.time() - self._phase_entered[phase]
+            remaining = min(remaining, budget - used)
+        return remaining
+
+    def phase_expired(self, phase):
+        return self.phase_remaining(phase) <= 0
+
+    def timeout_ms(self, phase, cap_ms=None, reserve=0):
+        """Timeout (ms) para uma chamada do Playwright feita dentro da fase."""
+        ms = int(self.phase_remaining(phase, reserve) * 1000)
+        if cap_ms is not None:
+            ms = min(ms, cap_ms)
+        return max(ms, 1)
+
+    @contextmanager
+    def limit(self, page, phase):
+        """Entra na fase: confere o prazo e limita os timeouts padrão da página."""
+        self.check()
+        self._phase_entered[phase] = time.time()
+        timeout = self.timeout_ms(phase)
+        page.set_default_timeout(timeout)
+        page.set_default_navigation_timeout(timeout)
+        try:
+            yield
+        finally:
+            entered = self._phase_entered.pop(phase)
+            self._phase_used[phase] = self._phase_used.get(phase, 0) + time.time() - entered
+
+
+class Watchdog:
+    """Chama ``on_expire`` se o site passar do prazo mais a folga.
+
+    A API síncrona do Playwright não pode ser usada de outra thread, então o
+    watchdog não mexe na página: ``on_expire`` derruba o processo do navegador,
+    o que faz a chamada travada falhar na thread do worker.
+    """
+
+    def __init__(self, deadline, on_expire, grace=WATCHDOG_GRACE_SECONDS):
+        self.fired = False
+        self._on_expire = on_expire
+        self._timer = threading.Timer(max(deadline.remaining(), 0) + grace, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def cancel(self):
+        self._timer.cancel()
+
+    def _fire(self):
+        self.fired = True
+        try:
+            self._on_expire()
+        except Exception as e:
+            print(f"[Watchdog] Falha ao encerrar o navegador: {e}")
@@ -0,0 +1,88 @@
+from datetime import datetime
+from metrics import PHASES
+import csv
+import io
+import os
+import tempfile
+
+try:
+    import openpyxl  # Opcional: exportação em .xlsx
+except ImportError:
+    openpyxl = None
+
+
+# Linhas escritas por pedaço enviado no CSV
+EXPORT_CSV_CHUNK_ROWS = 500
+
+# Tamanho dos pedaços lidos do .xlsx temporário ao enviá-lo (bytes)
+EXPORT_FILE_CHUNK_BYTES = 64 * 1024
+
+# Colunas da exportação: (campo do resultado, cabeçalho); os tempos por fase vêm depois
+EXPORT_COLUMNS = [
+    ("loop", "Loop"),
+    ("row_index", "Linha"),
+    ("url", "Site"),
+    ("term", "Termo"),
+    ("status_search_bar", "Barra de busca"),
+    ("status_content_search", "Resultado"),
+    ("confidence", "Confiança"),
+    ("elapsed", "Tempo total (s)"),
+    ("recorded_at", "Verificado em"),
+]
+
+
+def export_header():
+    return [title for _, title in EXPORT_COLUMNS] + [f"{phase} (s)" for phase in PHASES]
+
+
+def export_values(result):
+    """Uma linha da planilha: colunas fixas e o tempo de cada fase."""
+    values = []
+    for field, _ in EXPORT_COLUMNS:
+        value = result.get(field)
+        if field == "row_index" and value is not None:
+            value += 1
+        elif field == "recorded_at" and value is not None:
+            value = datetime.fromtimestamp(value).isoformat(sep=" ", timespec="seconds")
+        values.append(value)
+    timings = result.get("timings") or {}
+    return values + [timings.get(phase) for phase in PHASES]
+
+
+def csv_chunks(results, chunk_rows=EXPORT_CSV_CHUNK_ROWS):
+    """Gera o CSV em pedaços, sem montar o arquivo inteiro na memória."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM para o Excel abrir os acentos em UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(export_header())
+
+    for count, result in enumerate(results, start=1):
+        writer.writerow(export_values(result))
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def xlsx_chunks(results, chunk_bytes=EXPORT_FILE_CHUNK_BYTES):
+    """Escreve o .xlsx em modo write_only num temporário e o envia em pedaços."""
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Resultados")
+    worksheet.append(export_header())
+    for result in results:
+        worksheet.append(export_values(result))
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
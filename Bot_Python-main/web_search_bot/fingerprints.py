@@ -0,0 +1,75 @@
+from urllib.parse import urlparse
+import hashlib
+import threading
+import time
+
+
+# Quantos cards de produto entram na impressão digital da listagem
+FINGERPRINT_ITEMS = 20
+
+# Texto máximo (caracteres) avaliado na impressão digital
+FINGERPRINT_MAX_CHARS = 20000
+
+# Mesmo com a listagem igual, a verificação completa é refeita depois desse tempo (segundos)
+FINGERPRINT_MAX_AGE_SECONDS = 24 * 3600
+
+
+def fingerprint(url, listing):
+    """Hash da URL de resultados (sem o domínio) e do texto normalizado da listagem."""
+    parsed = urlparse(url)
+    source = f"{parsed.path}?{parsed.query}\n{listing['items']}\n{listing['text']}"
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+class ResultFingerprints:
+    """Veredito da última verificação de cada página de resultados (domínio e termo).
+
+    Logo após a busca, a listagem vira uma impressão digital; se ela for a
+    mesma da visita anterior, o veredito guardado é reaproveitado e a rolagem
+    e a detecção são puladas. Vereditos com mais de ``max_age`` segundos são
+    refeitos mesmo com a listagem igual.
+    """
+
+    def __init__(self, store, max_age=FINGERPRINT_MAX_AGE_SECONDS):
+        self.store = store
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "changed": 0, "expired": 0, "new": 0}
+
+    def lookup(self, domain, term, digest):
+        """Veredito guardado se a listagem não mudou, senão None."""
+        entry = self.store.get(self._key(domain, term))
+        if entry is None:
+            self._count("new")
+            return None
+        if entry["fingerprint"] != digest:
+            self._count("changed")
+            return None
+        if time.time() - entry["checked_at"] >= self.max_age:
+            self._count("expired")
+            return None
+        self._count("hits")
+        return entry["verdict"]
+
+    def remember(self, domain, term, digest, verdict):
+        self.store.set(self._key(domain, term), {
+            "fingerprint": digest,
+            "verdict": verdict,
+            "checked_at": time.time()
+        })
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        checked = sum(stats.values())
+        stats["hit_rate"] = round(stats["hits"] / checked, 3) if checked else 0
+        stats["known"] = len(self.store)
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    @staticmethod
+    def _key(domain, term):
+        return f"{domain}|{term.lower()}"
@@ -0,0 +1,114 @@
+from json_store import DATA_DIR
+import csv
+import os
+import time
+
+try:
+    import openpyxl  # Opcional: leitura das planilhas .xlsx enviadas em /upload
+except ImportError:
+    openpyxl = None
+
+
+# Extensões aceitas em /upload (.xls continua sendo lido no navegador)
+UPLOAD_EXTENSIONS = (".xlsx", ".csv")
+
+# Pasta onde o upload fica enquanto é lido; o arquivo é apagado no fim da leitura
+UPLOAD_DIR = os.path.join(DATA_DIR, 'uploads')
+
+# Sites lidos que são entregues ao job de uma vez
+INGEST_BATCH_SIZE = 200
+
+# Tempo máximo que um site lido espera antes de ser entregue ao job (segundos)
+INGEST_FLUSH_SECONDS = 0.5
+
+# Separadores reconhecidos nos .csv (o Excel em português grava com ";")
+CSV_DELIMITERS = ",;\t"
+
+# Codificações tentadas nos .csv, em ordem (o "CSV" do Excel em português é cp1252)
+CSV_ENCODINGS = ("utf-8-sig", "cp1252")
+
+DEFAULT_TERM = "Giramille"
+
+
+def row_to_site(values, sheet_number):
+    """Mesma regra do script.js: coluna A é o site, coluna B o termo (opcional)."""
+    if not values or values[0] is None:
+        return None
+    url = str(values[0]).strip()
+    if not url:
+        return None
+    term = str(values[1]).strip() if len(values) >= 2 and values[1] is not None else ""
+    return {"url": url, "term": term or DEFAULT_TERM, "sheet": f"Sheet - {sheet_number}"}
+
+
+def iter_csv_rows(path):
+    # O erro de decodificação pode aparecer no meio do arquivo: relê com a
+    # próxima codificação pulando as linhas já entregues
+    yielded = 0
+    for encoding in CSV_ENCODINGS:
+        try:
+            with open(path, newline='', encoding=encoding) as f:
+                try:
+                    dialect = csv.Sniffer().sniff(f.read(4096), delimiters=CSV_DELIMITERS)
+                except csv.Error:
+                    dialect = csv.excel
+                f.seek(0)
+                for index, values in enumerate(csv.reader(f, dialect)):
+                    if index < yielded:
+                        continue
+                    yield 1, values
+                    yielded += 1
+            return
+        except UnicodeDecodeError as e:
+            if encoding == CSV_ENCODINGS[-1]:
+                raise
+            print(f"[WARNING] {os.path.basename(path)} não é {encoding} ({e}); relendo com a próxima codificação")
+
+
+def iter_xlsx_rows(path):
+    # read_only lê as linhas sob demanda, sem carregar a planilha inteira na memória
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet_number, worksheet in enumerate(workbook.worksheets, start=1):
+            for values in worksheet.iter_rows(values_only=True):
+                yield sheet_number, values
+    finally:
+        workbook.close()
+
+
+def iter_sites(path):
+    """Sites da planilha, na ordem em que são lidos, sem ler o arquivo inteiro antes."""
+    reader = iter_xlsx_rows if path.lower().endswith(".xlsx") else iter_csv_rows
+    for sheet_number, values in reader(path):
+        site = row_to_site(values, sheet_number)
+        if site is not None:
+            yield site
+
+
+def ingest_upload(job, path, batch_size=INGEST_BATCH_SIZE, flush_seconds=INGEST_FLUSH_SECONDS):
+    """Lê o upload e entrega os sites ao job em lotes, enquanto o job já processa os primeiros."""
+    batch = []
+    last_flush = time.time()
+    error = None
+    try:
+        for site in iter_sites(path):
+            if job.cancelled:
+                break
+            batch.append(site)
+            if len(batch) >= batch_size or time.time() - last_flush >= flush_seconds:
+                job.add_sites(batch)
+                batch = []
+                last_flush = time.time()
+        if batch:
+            job.add_sites(batch)
+    except Exception as e:
+        error = f"Erro ao ler a planilha: {str(e)}"
+        print(f"[Upload] Job {job.id}: {error}")
+    finally:
+        job.finish_ingest(error)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    print(f"[Upload] Job {job.id}: {len(job.sites)} sites lidos")
@@ -0,0 +1,192 @@
+from results import ResultTable
+from cep_memory import DEFAULT_CEP
+import queue
+import threading
+import time
+import uuid
+
+
+# Quantos jobs processam ao mesmo tempo; os demais esperam na fila
+MAX_CONCURRENT_JOBS = 2
+
+# Tamanho máximo da fila de jobs aguardando vaga
+MAX_QUEUED_JOBS = 10
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    """Uma planilha enviada para processamento, com resultados e controle próprios."""
+
+    def __init__(self, sites, profile_name, num_workers, job_id=None, loops=0, created_at=None,
+                 cep=DEFAULT_CEP, mode="threads", ingesting=False):
+        # job_id/loops/created_at preenchidos quando o job é retomado do histórico
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.sites = sites
+        self.profile_name = profile_name
+        self.num_workers = num_workers
+        # CEP usado nas lojas que pedem um; cada linha pode trazer o seu
+        self.cep = cep
+        # "threads" (workers no processo do Flask) ou "processes" (shards.py)
+        self.mode = mode
+        self.created_at = created_at or time.time()
+
+        self.table = ResultTable()
+        self.state = "queued"  # queued, running, paused, cancelled, finished, failed
+        self.started = False
+        self.loops = loops
+        self.loop_complete = False
+        self.error = None
+        # Job criado por /upload: os sites chegam aos poucos por add_sites() (ingest.py)
+        # e ``ingesting`` fica verdadeiro até a planilha terminar de ser lida
+        self.uploaded = ingesting
+        self.ingesting = ingesting
+        self._sites_added = threading.Condition()
+
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def pause(self):
+        if self.state in ("queued", "running"):
+            self._running.clear()
+            self.state = "paused"
+            self.table.notify()
+
+    def resume(self):
+        if self.state == "paused":
+            self.state = "running" if self.started else "queued"
+            self._running.set()
+            self.table.notify()
+
+    def cancel(self):
+        self._cancelled.set()
+        # Acorda quem estiver parado na pausa para que veja o cancelamento
+        self._running.set()
+        if self.state not in ("finished", "failed"):
+            self.state = "cancelled"
+        self.table.notify()
+
+    def add_sites(self, sites):
+        with self._sites_added:
+            self.sites.extend(sites)
+            self._sites_added.notify_all()
+
+    def finish_ingest(self, error=None):
+        with self._sites_added:
+            self.ingesting = False
+            if error:
+                self.error = error
+            self._sites_added.notify_all()
+
+    def wait_for_sites(self, known, timeout):
+        """Espera chegarem sites além dos ``known`` primeiros; devolve (total, leitura terminada)."""
+        with self._sites_added:
+            if len(self.sites) <= known and self.ingesting and not self.cancelled:
+                self._sites_added.wait(timeout)
+            return len(self.sites), not self.ingesting
+
+    def wait(self, seconds):
+        """Dorme até ``seconds`` passarem ou o job ser cancelado."""
+        self._cancelled.wait(seconds)
+
+    def wait_if_paused(self):
+        """Bloqueia os workers enquanto o job estiver pausado."""
+        while not self._running.wait(timeout=1):
+            if self.cancelled:
+                return
+
+    def summary(self):
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "profile": self.profile_name,
+            "workers": self.num_workers,
+            "cep": self.cep,
+            "mode": self.mode,
+            "sites": len(self.sites),
+            "ingesting": self.ingesting,
+            "loops": self.loops,
+            "created_at": self.created_at,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """Fila limitada de jobs executados por um número fixo de threads.
+
+    ``runner(job)`` processa o job até ele ser cancelado (ou terminar);
+    cada thread executa um job por vez, o que limita a concorrência.
+    """
+
+    def __init__(self, runner, max_concurrent=MAX_CONCURRENT_JOBS, max_queued=MAX_QUEUED_JOBS):
+        self.runner = runner
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+        for n in range(max_concurrent):
+            threading.Thread(target=self._run, name=f"job-runner-{n + 1}", daemon=True).start()
+
+    def submit(self, sites, profile_name, num_workers, **options):
+        job = Job(sites, profile_name, num_workers, **options)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise JobQueueFull(f"Fila de jobs cheia ({self._queue.maxsize} aguardando)")
+
+        with self._lock:
+            self._jobs[job.id] = job
+        print(f"[Jobs] Job {job.id} na fila ({len(sites)} sites, perfil {profile_name})")
+        return job
+
+    def register(self, job):
+        """Lista um job que não vai para a fila (ex.: um job que não pôde ser retomado)."""
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self):
+        with self._lock:
+            if not self._jobs:
+                return None
+            return max(self._jobs.values(), key=lambda job: job.created_at)
+
+    def list(self):
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda job: job.created_at)
+        return [job.summary() for job in jobs]
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job.cancelled:
+                    continue
+
+                # Um job pausado ainda na fila começa pausado: os workers esperam
+                job.started = True
+                if job.state == "queued":
+                    job.state = "running"
+                print(f"[Jobs] Job {job.id} iniciado")
+                self.runner(job)
+                if job.state in ("running", "paused"):
+                    job.state = "finished"
+
+            except Exception as e:
+                job.error = str(e)
+                job.state = "failed"
+                print(f"[Jobs] Job {job.id} falhou: {str(e)}")
+
+            finally:
+                job.table.notify()
+                self._queue.task_done()
@@ -0,0 +1,121 @@
+from contextlib import contextmanager
+import json
+import os
+import threading
+
+try:
+    import fcntl  # Trava do arquivo entre processos (shards.py); indisponível no Windows
+except ImportError:
+    fcntl = None
+
+try:
+    import msvcrt  # Equivalente do fcntl no Windows
+except ImportError:
+    msvcrt = None
+
+
+# Pasta onde ficam os caches e memórias persistidas entre execuções
+DATA_DIR = 'data'
+
+
+class JsonStore:
+    """Dicionário persistido num arquivo JSON, seguro para uso entre threads e processos.
+
+    Cada alteração relê o arquivo sob uma trava de arquivo, aplica só a chave
+    alterada e regrava tudo (via arquivo temporário + rename), então os
+    processos de shards.py não apagam o que os outros aprenderam. As leituras
+    recarregam o arquivo quando outro processo o alterou. É suficiente para
+    os caches pequenos do bot.
+    """
+
+    def __init__(self, filename, data_dir=DATA_DIR):
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, filename)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._data = self._load()
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._refresh()
+            return self._data.get(key, default)
+
+    def set(self, key, value):
+        with self._lock, self._file_lock():
+            self._data = self._load()
+            self._data[key] = value
+            self._save()
+
+    def update(self, key, func, default=None):
+        """Aplica ``func`` ao valor atual da chave e grava o resultado."""
+        with self._lock, self._file_lock():
+            self._data = self._load()
+            value = func(self._data.get(key, default))
+            self._data[key] = value
+            self._save()
+            return value
+
+    def delete(self, key):
+        with self._lock, self._file_lock():
+            self._data = self._load()
+            if self._data.pop(key, None) is not None:
+                self._save()
+
+    def items(self):
+        with self._lock:
+            self._refresh()
+            return list(self._data.items())
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._data)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self):
+        # Outro processo gravou o arquivo desde a última leitura
+        if self._stat() != self._mtime:
+            self._data = self._load()
+
+    def _load(self):
+        self._mtime = self._stat()
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            print(f"[WARNING] Ignorando {self.path} corrompido: {e}")
+            return {}
+
+    @contextmanager
+    def _file_lock(self):
+        """Trava exclusiva do arquivo entre processos, num .lock ao lado dele."""
+        with open(f"{self.path}.lock", 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _save(self):
+        # Um temporário por processo: os processos de shards.py gravam os mesmos arquivos
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._mtime = self._stat()
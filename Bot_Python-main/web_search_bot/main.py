@@ -1,17 +1,29 @@
-from flask import Flask, request, jsonify, send_from_directory
-from playwright.sync_api import sync_playwright
-from achar import search_and_scroll
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
+from achar import arm_popup_guard
+from browser_pool import BrowserManager
+from request_blocking import RequestBlocker
+from json_store import JsonStore
+from sqlite_store import SqliteStore
+from resolver import UrlResolver
+from jobs import Job, JobManager, JobQueueFull
+from result_store import ResultStore, RESULT_QUERY_LIMIT
+from search_templates import SearchTemplates, site_domain
+from metrics import Metrics
+from site_checker import SiteChecker
+from shards import ShardPool
+from ingest import ingest_upload, openpyxl, UPLOAD_DIR, UPLOAD_EXTENSIONS, INGEST_FLUSH_SECONDS
+from export import csv_chunks, xlsx_chunks
+from scheduler import RevisitScheduler
+from cep_memory import CepMemory, DEFAULT_CEP, valid_cep
+from fingerprints import ResultFingerprints
+from selector_memory import SelectorMemory
 import os
 import time
 import threading
+import queue
 import json
 import asyncio
-
-
-def check_timeout(start_time, timeout_seconds):
-    if time.time() - start_time > timeout_seconds:
-        raise TimeoutError(f"Tempo limite de {timeout_seconds}s excedido")
-
+import uuid
 
 
 # Configurar o aplicativo Flask
@@ -23,112 +35,374 @@ os.makedirs('static', exist_ok=True)
 # Definir o tempo limite para processamento de cada site (em segundos)
 SITE_PROCESSING_TIMEOUT = 30
 
-# Variável global para armazenar resultados em tempo real
-current_results = []
-processing_complete = False
-processing_error = None
-
-def process_sites(sites):
-    global current_results, processing_complete, processing_error, number_of_loops
-    number_of_loops = 0
+# Quantidade de navegadores processando sites em paralelo
+NUM_WORKERS = 4
+
+# Máximo de navegadores que um job pode pedir; pedidos acima disso são reduzidos
+MAX_WORKERS = 16
+
+# Como os navegadores de um job rodam:
+#  - "threads": uma thread por navegador, dentro do processo do Flask
+#  - "processes": um processo por navegador (shards.py), para usar todos os núcleos
+EXECUTION_MODES = ("threads", "processes")
+DEFAULT_MODE = "threads"
+
+# Navegadores padrão no modo "processes": um por núcleo
+PROCESS_WORKERS = min(os.cpu_count() or 1, MAX_WORKERS)
+
+# Intervalo de keep-alive do stream de progresso quando nada muda (segundos)
+PROGRESS_KEEPALIVE_SECONDS = 15
+
+# Janela em que alterações seguidas são agrupadas num único evento (segundos)
+PROGRESS_STREAM_BATCH_SECONDS = 0.5
+
+# Perfis de execução selecionáveis por job em /process-column
+#  - "debug": navegador visível e lento, para acompanhar o que o bot faz
+#  - "throughput": headless, sem slow_mo, viewport pequeno e bloqueio de imagens,
+#    fontes, mídia e rastreadores (request_blocking.py), para produção
+RUN_PROFILES = {
+    "debug": {
+        "headless": False,
+        "slow_mo": 300,
+        "args": ['--start-maximized',
+                 '--disable-notifications',
+                 '--disable-infobars'],
+        "viewport": None,
+        "block_resources": False
+    },
+    "throughput": {
+        "headless": True,
+        "slow_mo": 0,
+        "args": ['--disable-notifications',
+                 '--disable-infobars'],
+        "viewport": {"width": 1024, "height": 768},
+        "block_resources": True
+    }
+}
+DEFAULT_PROFILE = "debug"
+
+
+def init_services():
+    """Caches, memórias, histórico e fila de jobs do processo do Flask.
+
+    Ficam numa função, e não no nível do módulo, porque o spawn de shards.py
+    reimporta este arquivo como __mp_main__ em cada processo de worker, que
+    não deve abrir o SQLite nem iniciar as threads dos jobs.
+    """
+    global url_resolver, search_templates, cep_memory, revisit_scheduler, selector_memory
+    global result_fingerprints, site_checker, result_store, metrics, job_manager
+
+    # Cache de URLs resolvidas, compartilhado por todos os workers e loops
+    url_resolver = UrlResolver(JsonStore('url_cache.json'))
+
+    # URLs de resultados aprendidas por domínio, para pular a barra de busca
+    search_templates = SearchTemplates(JsonStore('search_templates.json'))
+
+    # Lojas que pedem CEP e onde ficam o campo e o botão, por domínio; uma entrada por
+    # domínio verificado, então fica no SQLite (o cep_domains.json antigo é importado)
+    cep_store = SqliteStore('cep_domains')
+    cep_store.import_json(JsonStore('cep_domains.json'))
+    cep_memory = CepMemory(cep_store)
+
+    # Próxima verificação de cada site, conforme a volatilidade e as falhas; muda a cada
+    # site verificado, então fica numa tabela do SQLite (o schedule.json antigo é importado)
+    schedule_store = SqliteStore('schedule')
+    schedule_store.import_json(JsonStore('schedule.json'))
+    revisit_scheduler = RevisitScheduler(schedule_store)
+
+    # Ordem aprendida dos seletores de busca, popup e CEP, por domínio; gravada a cada
+    # busca, popup e CEP, então fica no SQLite (o selectors.json antigo é importado)
+    selector_store = SqliteStore('selectors')
+    selector_store.import_json(JsonStore('selectors.json'))
+    selector_memory = SelectorMemory(selector_store)
+
+    # Impressão digital e veredito da última página de resultados de cada loja e termo;
+    # também muda a cada site, então fica no SQLite como o agendador
+    result_fingerprints = ResultFingerprints(SqliteStore('fingerprints'))
+
+    # Verificação de um site, usada pelos workers em thread
+    site_checker = SiteChecker(url_resolver, search_templates, cep_memory, selector_memory, result_fingerprints,
+                               SITE_PROCESSING_TIMEOUT)
+
+    # Histórico de resultados em SQLite, gravado em lotes fora dos workers
+    result_store = ResultStore()
+
+    # Histogramas por fase e contadores de resultado expostos em /metrics
+    metrics = Metrics()
+
+    # Fila de jobs: cada job roda process_sites com os seus próprios workers
+    job_manager = JobManager(process_sites)
+
+
+def process_site(manager, job, index, site_data):
+    """Processa um único site e grava o resultado na posição ``index`` do job."""
+    result = job.table.get(index)
+    # Tempo por fase (segundos), preenchido pelo SiteChecker, pelo resolver e pelo achar
+    timings = {}
+    outcome = site_checker.check(manager, site_data, site_data.get("cep") or job.cep, result, timings)
+    record_site(job, index, site_data, result, timings, outcome)
+
+
+def record_site(job, index, site_data, result, timings, outcome):
+    """Grava o resultado de um site na tabela do job, no histórico, no agendador e nas métricas."""
+    site_url = site_data.get("url", "")
+    search_term = site_data.get("term", "Giramille")
+    metrics.observe_site(site_domain(result["resolved_url"] or "") or site_url, timings, outcome, result["elapsed"])
+    job.table.set(index, result)
+    result_store.record(job.id, result["number_of_loops"], index, search_term, result)
+    revisit_scheduler.record(site_url, search_term, result, scope=job.id)
+
+
+def site_worker(worker_id, work_queue, job):
+    """Cada worker mantém o seu navegador aquecido entre os loops e consome a fila do job."""
+    profile = RUN_PROFILES[job.profile_name]
+    blocker = RequestBlocker() if profile["block_resources"] else None
+    manager = BrowserManager(profile, blocker, context_hooks=[arm_popup_guard])
+    try:
+        manager.start()
+        print(f"[Job {job.id}][Worker {worker_id}] Playwright iniciado")
+    except Exception as e:
+        job.error = str(e)
+        print(f"[Job {job.id}][Worker {worker_id}] Erro global: {str(e)}")
 
-    while True:  # 🔄 Loop infinito
-        number_of_loops += 1
-        # Reiniciar variáveis globais a cada ciclo
-        current_results = []
-        processing_complete = False
-        processing_error = None
+    while True:
+        index = work_queue.get()
+        try:
+            if index is None:
+                break
+            job.wait_if_paused()
+            # Cancelado: só esvazia a fila, sem abrir mais páginas
+            if not job.cancelled:
+                process_site(manager, job, index, job.sites[index])
+        finally:
+            work_queue.task_done()
+
+    manager.stop()
+    print(f"[Job {job.id}][Worker {worker_id}] Navegador fechado")
+
+
+def process_sites(job):
+    """Executa o job em loop contínuo até ele ser cancelado."""
+    sites = job.sites
+    total_sites = len(sites)
+    # Primeiro loop de um upload: o total só é conhecido no fim da leitura
+    streaming = job.uploaded and not job.loops
+
+    # Os workers (e os seus navegadores) vivem durante todos os loops
+    pool_size = max(1, job.num_workers if streaming else min(job.num_workers, total_sites))
+    if job.mode == "processes":
+        shard_pool = ShardPool(RUN_PROFILES[job.profile_name], pool_size, SITE_PROCESSING_TIMEOUT)
+        shard_pool.start()
+    else:
+        shard_pool = None
+        work_queue = queue.Queue()
+        workers = [
+            threading.Thread(target=site_worker, args=(n + 1, work_queue, job), daemon=True)
+            for n in range(pool_size)
+        ]
+        for worker in workers:
+            worker.start()
+
+    def record_shard_result(index, result, timings, outcome):
+        record_site(job, index, sites[index], result, timings, outcome)
+
+    def new_row(i, number_of_loops):
+        return {
+            "url": sites[i].get("url", ""),
+            "worksheetNumber": number_of_loops,
+            "status": "Processando...",
+            "status_search_bar": "Processando...",
+            "status_content_search": "Processando...",
+            "progress": f"({i + 1} de {len(sites)})",
+            "number_of_loops": number_of_loops,
+            "profile": job.profile_name,
+            "elapsed": None,
+            "timings": None,
+            "confidence": None,
+            "resolved_url": None,
+            "blocked_requests": None,
+            "bytes_saved": None,
+            "fingerprint_hit": None
+        }
+
+    def seeded_row(i, previous):
+        """Linha de um site que ainda não venceu: o último resultado do histórico, ou a espera."""
+        if previous is None:
+            row = new_row(i, job.loops)
+            row.update({"status": "Aguardando verificação", "status_search_bar": "Aguardando verificação",
+                        "status_content_search": "-"})
+            return row
+        # O resultado é de outro loop (ou job): não conta nos acertos de impressão digital deste loop
+        return dict(previous, progress=f"({i + 1} de {len(sites)})", number_of_loops=job.loops,
+                    worksheetNumber=job.loops, fingerprint_hit=None)
+
+    def take_new_sites(timeout):
+        """Linhas novas do upload em andamento, já na tabela; devolve (tarefas, leitura terminada)."""
+        known = len(job.table)
+        total, finished = job.wait_for_sites(known, timeout)
+        rows = [new_row(i, job.loops) for i in range(known, total)]
+        job.table.extend(rows)
+        tasks = [(i, sites[i], sites[i].get("cep") or job.cep, row) for i, row in zip(range(known, total), rows)]
+        return tasks, finished or job.cancelled
+
+    if streaming:
+        # Os sites são processados conforme a planilha é lida
+        job.loops = 1
+        job.loop_complete = False
+        result_store.save_job(job)
+        print(f"[Job {job.id}] Loop 1: processando o upload enquanto ele é lido, com {pool_size} workers (perfil {job.profile_name}, modo {job.mode})...")
+
+        if shard_pool is not None:
+            shard_pool.run(job, [], record_shard_result, feed=lambda: take_new_sites(0))
+        else:
+            finished = False
+            while not finished:
+                tasks, finished = take_new_sites(INGEST_FLUSH_SECONDS)
+                for task in tasks:
+                    work_queue.put(task[0])
+            work_queue.join()
 
         total_sites = len(sites)
+        if total_sites == 0 and not job.cancelled:
+            job.error = job.error or "Nenhuma URL encontrada na planilha"
+            job.state = "failed"
+        job.loop_complete = True
+        job.table.notify()
+        print(f"[Job {job.id}] Loop 1 concluído ({total_sites} sites)")
+
+    # Job retomado após uma parada: as linhas já feitas do loop interrompido voltam
+    # para a tabela e o agendador só devolve as que ainda não foram verificadas
+    done_rows = result_store.loop_rows(job.id, job.loops) if job.loops else {}
+    resuming = bool(done_rows)
+
+    # A tabela mostra todos os sites antes de qualquer espera: os que não vencerem
+    # ficam com o último resultado gravado até o agendador devolvê-los
+    if total_sites and len(job.table) != total_sites:
+        previous = result_store.last_results(sites)
+        job.table.reset([
+            done_rows[i] if i in done_rows
+            else seeded_row(i, previous.get((site.get("url", ""), site.get("term", "Giramille"))))
+            for i, site in enumerate(sites)
+        ])
+
+    while total_sites and not job.cancelled:  # 🔄 Loop contínuo até o cancelamento
+        # Só os sites vencidos, dos mais atrasados (ou voláteis) para os mais estáveis
+        pending = revisit_scheduler.due(sites, scope=job.id)
+        if not pending:
+            # Nada vencido: o loop interrompido (se houver) já terminou e a próxima passada é um loop novo
+            resuming = False
+            if not job.loop_complete:
+                job.loop_complete = True
+                job.table.notify()
+            job.wait(max(revisit_scheduler.seconds_until_due(sites, scope=job.id), 1))
+            continue
+
+        if not resuming:
+            job.loops += 1
+        resuming = False
+        number_of_loops = job.loops
+        job.loop_complete = False
+        result_store.save_job(job)
+
+        # Só as linhas vencidas mudam: as demais mantêm o último resultado e a
+        # sequência, para o stream e o ?since= não reenviarem a tabela inteira
+        rows = {}
+        for i in pending:
+            rows[i] = new_row(i, number_of_loops)
+            job.table.set(i, rows[i])
+
+        print(f"[Job {job.id}] Loop {number_of_loops}: {len(pending)} de {total_sites} sites vencidos com {pool_size} workers (perfil {job.profile_name}, modo {job.mode})...")
+
+        if shard_pool is not None:
+            tasks = [(i, sites[i], sites[i].get("cep") or job.cep, rows[i]) for i in pending]
+            shard_pool.run(job, tasks, record_shard_result)
+        else:
+            for i in pending:
+                work_queue.put(i)
+            work_queue.join()
+
+        job.loop_complete = True
+        job.table.notify()
+        print(f"[Job {job.id}] Loop {number_of_loops} concluído "
+              f"({loop_fingerprint_hits(job)} de {len(pending)} páginas de resultado inalteradas)")
+
+    # Encerra os workers e os navegadores do job
+    if shard_pool is not None:
+        shard_pool.stop()
+    else:
+        for _ in workers:
+            work_queue.put(None)
+        for worker in workers:
+            worker.join()
+    result_store.save_job(job)
+    print(f"[Job {job.id}] Encerrado")
+
+
+
+
+def ingest_job(job, path):
+    """Lê o upload e grava a lista de sites assim que a leitura termina, para o job poder ser retomado."""
+    ingest_upload(job, path)
+    result_store.save_sites(job)
+
+
+def resume_interrupted_jobs():
+    """Recoloca na fila os jobs que ficaram pela metade quando o servidor parou."""
+    for saved in result_store.interrupted_jobs():
+        # Upload que parou no meio da leitura: a lista de sites gravada está incompleta
+        if saved["ingesting"]:
+            job = Job(saved["sites"], saved["profile"], saved["num_workers"], job_id=saved["job_id"],
+                      loops=saved["loops"], created_at=saved["created_at"], cep=saved["cep"] or DEFAULT_CEP,
+                      mode=saved["mode"] or DEFAULT_MODE)
+            job.state = "failed"
+            job.error = "Leitura da planilha interrompida pela parada do servidor; envie o arquivo de novo"
+            job_manager.register(job)
+            result_store.save_job(job)
+            print(f"[Jobs] Job {job.id} não retomado: {job.error}")
+            continue
 
         try:
-            with sync_playwright() as playwright:
-                # Iniciar o navegador com configurações específicas
-                browser = playwright.chromium.launch(
-                    headless=False,
-                    slow_mo=300,
-                    args=['--start-maximized',
-                          '--disable-notifications',
-                          '--disable-infobars']
-                )
-
-                print(f"Navegador iniciado, processando {total_sites} sites...")
-
-                for i in range(total_sites):
-                    site_data = sites[i]
-                    site_url = site_data.get("url", "")
-                    search_term = site_data.get("term", "Giramille")
-
-                    current_index = i + 1
-                    result = {
-                        "url": site_url,
-                        "worksheetNumber": number_of_loops,
-                        "status": "Processando...",
-                        "status_search_bar": "Processando...",
-                        "status_content_search": "Processando...",
-                        "progress": f"({current_index} de {total_sites})",
-                        "number_of_loops": number_of_loops
-                    }
-
-                    current_results.append(result)
-
-                    try:
-                        page = browser.new_page()
-                        page.set_default_timeout(SITE_PROCESSING_TIMEOUT * 1000)
-                        start_time = time.time()
-
-                        # Ir para DuckDuckGo
-                        page.goto('https://duckduckgo.com', wait_until="load")
-                        page.click('#searchbox_input')
-                        page.fill('#searchbox_input', site_url)
-                        page.press('#searchbox_input', 'Enter')
-
-                        check_timeout(start_time, SITE_PROCESSING_TIMEOUT)
-
-                        page.wait_for_selector('h2', state='visible')
-                        page.click('h2')
-                        page.wait_for_load_state("load")
-
-                        check_timeout(start_time, SITE_PROCESSING_TIMEOUT)
-
-                        # Busca na página
-                        search_field_founded, search_success = search_and_scroll(page, search_term)
-
-                        if not search_field_founded:
-                            result["status_search_bar"] = "Campo de busca não encontrado"
-                            result["status_content_search"] = "Não foi possível realizar a busca"
-                        else:
-                            result["status_search_bar"] = "Campo de busca encontrado"
-                            result["status_content_search"] = "Termo encontrado" if search_success else "Termo não encontrado"
-
-                    except TimeoutError as e:
-                        result["status"] = f"Timeout: {str(e)}"
-                        result["status_search_bar"] = f"Timeout: {str(e)}"
-                        result["status_content_search"] = "-"
-                        print(f"Timeout: {str(e)}")
-
-                    except Exception as e:
-                        result["status"] = f"Erro: {str(e)}"
-                        result["status_search_bar"] = f"Erro: {str(e)}"
-                        result["status_content_search"] = "-"
-                        print(f"Erro: {str(e)}")
-
-                    finally:
-                        current_results[i] = result
-                        if 'page' in locals() and not page.is_closed():
-                            page.close()
-
-                browser.close()
-                print("Navegador fechado, processamento concluído")
-
-        except Exception as e:
-            processing_error = str(e)
-            print(f"Erro global: {str(e)}")
-
-        processing_complete = True
-
-        # 🔄 Recomeça imediatamente
-        print("Reiniciando processamento...")
+            job = job_manager.submit(saved["sites"], saved["profile"], saved["num_workers"],
+                                     job_id=saved["job_id"], loops=saved["loops"],
+                                     created_at=saved["created_at"], cep=saved["cep"] or DEFAULT_CEP,
+                                     mode=saved["mode"] or DEFAULT_MODE)
+        except JobQueueFull as e:
+            print(f"[Jobs] Job {saved['job_id']} não retomado: {str(e)}")
+            continue
+
+        if saved["state"] == "paused":
+            job.pause()
+        print(f"[Jobs] Job {job.id} retomado no loop {job.loops or 1}")
+
+
+def job_options(data):
+    """Perfil, workers, CEP e modo pedidos para um job; devolve (opções, erro)."""
+    mode = data.get('mode', DEFAULT_MODE)
+    workers = data.get('workers')
+    if workers is None or workers == '':
+        workers = PROCESS_WORKERS if mode == "processes" else NUM_WORKERS
+    options = {
+        "profile_name": data.get('profile', DEFAULT_PROFILE),
+        "num_workers": workers,
+        "cep": str(data.get('cep') or DEFAULT_CEP).strip(),
+        "mode": mode
+    }
+
+    try:
+        options["num_workers"] = int(workers)
+    except (TypeError, ValueError):
+        return options, f'Número de workers inválido: {workers}'
+    if options["num_workers"] < 1:
+        return options, f'Número de workers inválido: {workers}'
+    options["num_workers"] = min(options["num_workers"], MAX_WORKERS)
+
+    if options["profile_name"] not in RUN_PROFILES:
+        return options, f'Perfil desconhecido: {options["profile_name"]}'
+    if mode not in EXECUTION_MODES:
+        return options, f'Modo de execução desconhecido: {mode}'
+    if not valid_cep(options["cep"]):
+        return options, f'CEP inválido: {options["cep"]}'
+    return options, None
 
 
 @app.route('/process-column', methods=['POST'])
@@ -141,23 +415,266 @@ def process_column():
             return jsonify({'error': 'Dados ausentes ou formato inválido'}), 400
         
         column_array = data['columnData']
-        
-        # Iniciar o processamento em uma thread separada
-        threading.Thread(target=process_sites, args=(column_array,)).start()
-        
-        return jsonify({"message": "Processamento iniciado"})
-        
+        options, error = job_options(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        # O job entra na fila e começa assim que houver vaga
+        job = job_manager.submit(column_array, **options)
+        result_store.save_job(job)
+
+        return jsonify({"message": "Processamento iniciado", "job_id": job.id,
+                        "profile": job.profile_name, "mode": job.mode})
+
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/upload', methods=['POST'])
+def upload():
+    """Recebe a planilha (.xlsx ou .csv) e começa a processar enquanto ela é lida no servidor."""
+    try:
+        file = request.files.get('file')
+        if file is None or not file.filename:
+            return jsonify({'error': 'Arquivo ausente'}), 400
+
+        extension = os.path.splitext(file.filename)[1].lower()
+        if extension not in UPLOAD_EXTENSIONS:
+            return jsonify({'error': f'Formato não suportado: {extension or file.filename}'}), 400
+        if extension == ".xlsx" and openpyxl is None:
+            return jsonify({'error': 'Leitura de .xlsx no servidor requer o openpyxl (pip install openpyxl)'}), 400
+
+        options, error = job_options(request.form)
+        if error:
+            return jsonify({'error': error}), 400
+
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        path = os.path.join(UPLOAD_DIR, uuid.uuid4().hex + extension)
+        file.save(path)
+
+        try:
+            job = job_manager.submit([], ingesting=True, **options)
+        except JobQueueFull:
+            os.remove(path)
+            raise
+        result_store.save_job(job)
+        threading.Thread(target=ingest_job, args=(job, path), name=f"ingest-{job.id}", daemon=True).start()
+
+        return jsonify({"message": "Processamento iniciado", "job_id": job.id,
+                        "profile": job.profile_name, "mode": job.mode})
+
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+def find_job():
+    """Job indicado em ?job=<id>; sem o parâmetro, o mais recente."""
+    job_id = request.args.get('job')
+    return job_manager.get(job_id) if job_id else job_manager.latest()
+
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify({"jobs": job_manager.list()})
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_details(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job.summary())
+
+
+@app.route('/jobs/<job_id>/export.<file_format>', methods=['GET'])
+def export_job(job_id, file_format):
+    """Histórico completo do job (todos os loops, com tempos por fase), lido do SQLite aos poucos."""
+    if job_manager.get(job_id) is None and not result_store.job_exists(job_id):
+        return jsonify({'error': 'Job não encontrado'}), 404
+
+    if file_format == 'csv':
+        chunks, mimetype = csv_chunks, 'text/csv; charset=utf-8'
+    elif file_format == 'xlsx':
+        if openpyxl is None:
+            return jsonify({'error': 'Exportação em .xlsx requer o openpyxl (pip install openpyxl)'}), 400
+        chunks, mimetype = xlsx_chunks, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        return jsonify({'error': f'Formato não suportado: {file_format}'}), 404
+
+    # Inclui os resultados que ainda estão na fila do gravador
+    result_store.flush()
+    file_name = f"relatorio_{job_id}_{time.strftime('%Y-%m-%d_%H-%M')}.{file_format}"
+    return Response(
+        stream_with_context(chunks(result_store.iter_job_results(job_id))),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{file_name}"'}
+    )
+
+
+@app.route('/jobs/<job_id>/<action>', methods=['POST'])
+def job_action(job_id, action):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+
+    if action == 'pause':
+        job.pause()
+    elif action == 'resume':
+        job.resume()
+    elif action == 'cancel':
+        job.cancel()
+    else:
+        return jsonify({'error': f'Ação desconhecida: {action}'}), 404
+
+    result_store.save_job(job)
+    return jsonify(job.summary())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Métricas no formato de texto do Prometheus."""
+    text = metrics.render({
+        "resolver": url_resolver.stats(),
+        "templates": search_templates.stats(),
+        "cep": cep_memory.stats(),
+        "selectors": selector_memory.stats(),
+        "fingerprints": result_fingerprints.stats(),
+        "schedule": revisit_scheduler.stats()
+    })
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/results/latest', methods=['GET'])
+def results_latest():
+    """Último status de cada site no histórico (?job=<id> para um job só)."""
+    limit = request.args.get('limit', default=RESULT_QUERY_LIMIT, type=int)
+    return jsonify({"results": result_store.latest(request.args.get('job'), limit)})
+
+
+@app.route('/results/history', methods=['GET'])
+def results_history():
+    """Todos os resultados gravados de um site (?url=<url>), do mais recente ao mais antigo."""
+    url = request.args.get('url')
+    if not url:
+        return jsonify({'error': 'Parâmetro url ausente'}), 400
+
+    limit = request.args.get('limit', default=RESULT_QUERY_LIMIT, type=int)
+    return jsonify({"url": url, "results": result_store.history(url, limit)})
+
+
+@app.route('/results/changes', methods=['GET'])
+def results_changes():
+    """Resultados gravados após ?since=<timestamp Unix> (?job=<id> opcional)."""
+    since = request.args.get('since', default=0, type=float)
+    limit = request.args.get('limit', default=RESULT_QUERY_LIMIT, type=int)
+    results = result_store.changes_since(since, request.args.get('job'), limit)
+    return jsonify({"since": since, "now": time.time(), "results": results})
+
+
+def loop_fingerprint_hits(job):
+    """Sites do loop atual cujo veredito veio de uma listagem inalterada (os não vencidos ficam de fora)."""
+    loops = job.table.values("number_of_loops")
+    hits = job.table.values("fingerprint_hit")
+    return sum(1 for loop, hit in zip(loops, hits) if hit and loop == job.loops)
+
+
+def progress_status(job):
+    """Campos de resumo enviados junto com as linhas, no polling e no stream."""
+    # Tempo médio por site no loop atual, para medir o ganho de cada perfil
+    elapsed = [value for value in job.table.values("elapsed") if value is not None]
+    average_site_seconds = round(sum(elapsed) / len(elapsed), 2) if elapsed else None
+
+    return {
+        "job_id": job.id,
+        "state": job.state,
+        "total": len(job.table),
+        "complete": job.loop_complete,
+        # Loop atual do job (as linhas que não venceram trazem o número do loop em que foram verificadas)
+        "loops": job.loops,
+        "error": job.error,
+        "profile": job.profile_name,
+        "mode": job.mode,
+        "ingesting": job.ingesting,
+        "average_site_seconds": average_site_seconds,
+        "fingerprint_hits": loop_fingerprint_hits(job),
+        "resolver": url_resolver.stats(),
+        "templates": search_templates.stats(),
+        "cep": cep_memory.stats(),
+        "selectors": selector_memory.stats(),
+        "fingerprints": result_fingerprints.stats(),
+        "schedule": revisit_scheduler.stats()
+    }
+
+
+def progress_delta(job, since):
+    """Linhas do job alteradas após a sequência ``since`` e o resumo atual."""
+    # Sequência maior que a atual: o servidor reiniciou, manda tudo de novo
+    if since > job.table.seq:
+        since = 0
+
+    seq, changes = job.table.changes_since(since)
+    payload = progress_status(job)
+    payload["seq"] = seq
+    payload["changes"] = [{"index": index, "row": row} for index, row in changes]
+    return payload
+
+
 @app.route('/check-progress', methods=['GET'])
 def check_progress():
-    global current_results, processing_complete, processing_error
-    
-    return jsonify({
-        "results": current_results,
-        "complete": processing_complete,
-        "error": processing_error
+    job = find_job()
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+
+    since = request.args.get('since', type=int)
+
+    # Com ?since=<seq> devolve apenas as linhas alteradas (fallback do stream)
+    if since is not None:
+        return jsonify(progress_delta(job, since))
+
+    payload = progress_status(job)
+    payload["seq"] = job.table.seq
+    payload["results"] = job.table.rows()
+    return jsonify(payload)
+
+
+@app.route('/progress-stream', methods=['GET'])
+def progress_stream():
+    """Server-Sent Events com as linhas alteradas; retoma a partir do Last-Event-ID."""
+    job = find_job()
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+
+    # Na reconexão automática o EventSource manda o Last-Event-ID, que tem prioridade
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', default=0, type=int)
+
+    def stream(last_seq):
+        # Estado inicial (ou o que mudou desde a reconexão)
+        payload = progress_delta(job, last_seq)
+        last_seq = payload["seq"]
+        yield f"id: {last_seq}\nevent: progress\ndata: {json.dumps(payload)}\n\n"
+
+        while True:
+            if not job.table.wait_for_change(last_seq, timeout=PROGRESS_KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+                continue
+
+            # Junta as alterações que chegarem em seguida num único evento
+            time.sleep(PROGRESS_STREAM_BATCH_SECONDS)
+            payload = progress_delta(job, last_seq)
+            last_seq = payload["seq"]
+            yield f"id: {last_seq}\nevent: progress\ndata: {json.dumps(payload)}\n\n"
+
+    return Response(stream(since), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
 # Rota para servir o arquivo HTML principal
@@ -170,6 +687,13 @@ def index():
 def serve_static(path):
     return send_from_directory('static', path)
 
+# Nos processos de shards.py (__mp_main__) nada disso é criado
+if __name__ != '__mp_main__':
+    init_services()
+
 if __name__ == '__main__':
     print("Aplicação inicializada! Acesse http://localhost:5000 no seu navegador.")
+    # Com o reloader do modo debug, só o processo filho (o que atende) retoma os jobs
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resume_interrupted_jobs()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+import threading
+import time
+
+
+# Fases do processamento de um site, na ordem em que acontecem
+PHASES = ["page", "resolve", "navigate", "close_popups", "cep", "settle",
+          "discovery", "submit", "fingerprint", "scroll", "detect"]
+
+# Resultados possíveis de um site, contados em achar_site_outcomes_total
+OUTCOMES = ["found", "not_found", "no_search_bar", "timeout", "error"]
+
+# Limites (segundos) dos buckets dos histogramas de tempo
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+@contextmanager
+def timed(timings, phase):
+    """Soma em ``timings[phase]`` o tempo gasto dentro do bloco (segundos)."""
+    start = time.time()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.time() - start
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Histogram:
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels=""):
+        prefix = labels + "," if labels else ""
+        lines = [
+            f'{name}_bucket{{{prefix}le="{bound}"}} {count}'
+            for bound, count in zip(self.buckets, self.counts)
+        ]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class Metrics:
+    """Histogramas de tempo por fase e contadores de resultado, no formato do Prometheus.
+
+    Cada site processado chama ``observe_site`` com o dicionário de tempos
+    por fase preenchido por ``timed``; ``render`` gera o texto de /metrics.
+    """
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self._lock = threading.Lock()
+        self.phases = {phase: Histogram(buckets) for phase in PHASES}
+        self.sites = Histogram(buckets)
+        self.outcomes = {outcome: 0 for outcome in OUTCOMES}
+        # Tempo total por domínio (soma e quantidade), para achar as lojas lentas
+        self.domains = {}
+
+    def observe_site(self, domain, timings, outcome, elapsed):
+        with self._lock:
+            for phase, seconds in timings.items():
+                if phase not in self.phases:
+                    self.phases[phase] = Histogram(self.sites.buckets)
+                self.phases[phase].observe(seconds)
+            self.sites.observe(elapsed)
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            total, count = self.domains.get(domain, (0.0, 0))
+            self.domains[domain] = (total + elapsed, count + 1)
+
+    def render(self, stats=None):
+        """Texto no formato de exposição do Prometheus.
+
+        ``stats`` é um dicionário {nome: {tipo: valor}} com os contadores dos
+        outros componentes (resolver, templates, ...), exportados como gauges.
+        """
+        lines = [
+            "# HELP achar_phase_seconds Tempo gasto em cada fase do processamento de um site.",
+            "# TYPE achar_phase_seconds histogram",
+        ]
+        with self._lock:
+            for phase, histogram in self.phases.items():
+                lines.extend(histogram.render("achar_phase_seconds", f'phase="{escape_label(phase)}"'))
+
+            lines += [
+                "# HELP achar_site_seconds Tempo total gasto em cada site.",
+                "# TYPE achar_site_seconds histogram",
+            ]
+            lines.extend(self.sites.render("achar_site_seconds"))
+
+            lines += [
+                "# HELP achar_site_outcomes_total Sites processados por resultado.",
+                "# TYPE achar_site_outcomes_total counter",
+            ]
+            for outcome, count in self.outcomes.items():
+                lines.append(f'achar_site_outcomes_total{{outcome="{escape_label(outcome)}"}} {count}')
+
+            lines += [
+                "# HELP achar_domain_seconds Tempo total gasto por domínio.",
+                "# TYPE achar_domain_seconds summary",
+            ]
+            for domain, (total, count) in sorted(self.domains.items()):
+                label = f'domain="{escape_label(domain)}"'
+                lines.append(f"achar_domain_seconds_sum{{{label}}} {total:.6f}")
+                lines.append(f"achar_domain_seconds_count{{{label}}} {count}")
+
+        for name, values in (stats or {}).items():
+            metric = f"achar_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for kind, value in values.items():
+                lines.append(f'{metric}{{kind="{escape_label(kind)}"}} {value}')
+
+        return "\n".join(lines) + "\n"
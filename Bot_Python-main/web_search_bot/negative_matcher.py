@@ -0,0 +1,126 @@
+import re
+from functools import lru_cache
+
+
+# Distância máxima, em caracteres da mesma linha, entre as partes de uma frase.
+# Substitui o ".*" antigo, que podia retroceder por megabytes de texto.
+PHRASE_WINDOW = 80
+
+# Quantos termos diferentes ficam com o padrão compilado em memória
+MATCHER_CACHE_SIZE = 256
+
+# Frases que indicam busca sem resultado. "{gap}" vira a janela limitada e
+# "{term}" o termo buscado (escapado); os grupos internos são não capturantes.
+NEGATIVE_PHRASES = [
+    # Português (more specific patterns)
+    r"(?:não|não temos|não encontramos|0 resultados){gap}{term}",
+    r"nenhum (?:resultado|item){gap}{term}",
+    r"não (?:existe|encontramos|temos){gap}{term}",
+    r"sem resultados{gap}{term}",
+    r"sua busca por{gap}{term}{gap}não retornou",
+    r"não encontramos nada para{gap}{term}",
+    r"não localizamos{gap}{term}",
+    r"não (?:há|existem){gap}{term}",
+    r"lista vazia",
+    r"resultado indisponível",
+    r"nenhum resultado encontrado",
+    r"não encontramos resultados",
+    r"não encontramos",
+    r"busca não retornou resultados",
+
+    # English (more specific patterns)
+    r"no (?:results|items){gap}{term}",
+    r"we don't have{gap}{term}",
+    r"(?:couldn't|didn't) find{gap}{term}",
+    r"0 results for{gap}{term}",
+    r"your search for{gap}{term}{gap}did not match",
+    r"no{gap}{term}{gap}(?:available|found)",
+    r"nothing (?:found|matches){gap}{term}",
+    r"no items found",
+    r"nothing found",
+    r"empty results",
+    r"product not available",
+    r"out of stock",
+    r"not found",
+    r"search returned no",
+    r"we couldn't find any"
+]
+
+
+class NegativeMatcher:
+    """Detector de frases negativas compilado para um termo de busca.
+
+    As frases com o termo viram um único padrão nomeado, aplicado apenas em
+    janelas limitadas ao redor de cada ocorrência do termo; as frases fixas
+    são buscadas como texto literal. Assim o custo cresce com o tamanho da
+    página, e não com (frases x tamanho da página).
+    """
+
+    def __init__(self, search_term):
+        self.term = search_term.lower()
+        gap = "[^\\n]{0,%d}" % PHRASE_WINDOW
+
+        parts = []
+        self.literals = []
+        # Tamanho máximo de uma ocorrência, sem contar o termo: duas janelas + folga
+        self.reach = 2 * PHRASE_WINDOW
+
+        for index, phrase in enumerate(NEGATIVE_PHRASES):
+            if "{term}" in phrase:
+                pattern = phrase.replace("{gap}", gap).replace("{term}", re.escape(self.term))
+                parts.append(f"(?P<p{index}>{pattern})")
+                fixed = phrase.replace("{gap}", "").replace("{term}", "")
+                self.reach = max(self.reach, 2 * PHRASE_WINDOW + len(fixed))
+            else:
+                self.literals.append((phrase, phrase.replace("\\", "")))
+
+        # O texto já chega em minúsculas; sem IGNORECASE o re usa o atalho do primeiro caractere
+        self.pattern = re.compile("|".join(parts))
+
+    def find(self, page_text):
+        text = page_text.lower()
+
+        for start, end in self._term_windows(text):
+            match = self.pattern.search(text, start, end)
+            if match:
+                return NEGATIVE_PHRASES[int(match.lastgroup[1:])]
+
+        for phrase, literal in self.literals:
+            if literal in text:
+                return phrase
+
+        return None
+
+    def _term_windows(self, text):
+        """Janelas (início, fim) ao redor de cada ocorrência do termo, já unidas."""
+        if not self.term:
+            return
+
+        window_start = window_end = None
+        position = text.find(self.term)
+        while position != -1:
+            start = max(0, position - self.reach)
+            end = min(len(text), position + len(self.term) + self.reach)
+
+            if window_end is not None and start <= window_end:
+                window_end = end
+            else:
+                if window_end is not None:
+                    yield window_start, window_end
+                window_start, window_end = start, end
+
+            position = text.find(self.term, position + 1)
+
+        if window_end is not None:
+            yield window_start, window_end
+
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def compile_negative_matcher(search_term):
+    """Matcher compilado uma vez por termo e compartilhado entre sites e loops."""
+    return NegativeMatcher(search_term)
+
+
+def find_negative_phrase(page_text, search_term):
+    """Devolve a frase negativa encontrada no texto, ou None."""
+    return compile_negative_matcher(search_term).find(page_text)
@@ -0,0 +1,498 @@
+# Scripts executados dentro da página com page.evaluate().
+# Cada script resolve numa única ida e volta o que antes exigia uma chamada
+# do Playwright por seletor/elemento.
+
+
+# Recebe a lista de seletores de busca e devolve os candidatos visíveis e
+# habilitados, ordenados do melhor para o pior. Os candidatos ficam marcados
+# com o atributo data-achar-candidate="<posição>" para o Python localizá-los.
+# Além de CSS puro, entende as duas formas do Playwright usadas na lista:
+#   tag:has-text("texto")  e  :text-matches("regex", "flags") >> .. >> seletor
+FIND_SEARCH_CANDIDATES_SCRIPT = """
+([selectors, maxCandidates]) => {
+    const HAS_TEXT = /^(.*):has-text\\("(.*)"\\)$/;
+    const TEXT_MATCHES = /^:text-matches\\("(.*)", "(.*)"\\) >> \\.\\. >> (.*)$/;
+
+    const textOf = (el) => (el.innerText || el.textContent || '').toLowerCase();
+
+    function query(selector) {
+        let match = selector.match(HAS_TEXT);
+        if (match) {
+            const text = match[2].toLowerCase();
+            return [...document.querySelectorAll(match[1] || '*')]
+                .filter(el => textOf(el).includes(text));
+        }
+
+        match = selector.match(TEXT_MATCHES);
+        if (match) {
+            const regex = new RegExp(match[1], match[2]);
+            const found = [];
+            const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+            while (walker.nextNode()) {
+                const parent = walker.currentNode.parentElement;
+                if (parent && parent.parentElement && regex.test(walker.currentNode.nodeValue)) {
+                    found.push(...parent.parentElement.querySelectorAll(match[3]));
+                }
+            }
+            return found;
+        }
+
+        return [...document.querySelectorAll(selector)];
+    }
+
+    function isVisible(el) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0) return false;
+        const style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none' && style.opacity !== '0';
+    }
+
+    function isEnabled(el) {
+        return !el.disabled && !el.readOnly && el.getAttribute('aria-disabled') !== 'true';
+    }
+
+    function isTextField(el) {
+        const tag = el.tagName.toLowerCase();
+        if (tag === 'textarea') return true;
+        if (tag !== 'input') return el.getAttribute('role') === 'combobox';
+        return ['search', 'text', ''].includes((el.getAttribute('type') || '').toLowerCase());
+    }
+
+    document.querySelectorAll('[data-achar-candidate]')
+        .forEach(el => el.removeAttribute('data-achar-candidate'));
+
+    const seen = new Set();
+    const candidates = [];
+
+    selectors.forEach((selector, selectorIndex) => {
+        let elements;
+        try {
+            elements = query(selector);
+        } catch (e) {
+            return;
+        }
+
+        elements.forEach((el) => {
+            if (seen.has(el)) return;
+            seen.add(el);
+            if (!isVisible(el) || !isEnabled(el)) return;
+
+            // Seletores mais específicos (início da lista) valem mais; campos de
+            // texto ganham de botões e ícones, e o cabeçalho da página ganha bônus
+            let score = (selectors.length - selectorIndex) * 10;
+            if (isTextField(el)) score += 500;
+            if ((el.getAttribute('type') || '').toLowerCase() === 'search') score += 50;
+            if (el.getBoundingClientRect().top + window.scrollY < 300) score += 20;
+
+            candidates.push({ el, selector, selectorIndex, score });
+        });
+    });
+
+    candidates.sort((a, b) => b.score - a.score);
+
+    return candidates.slice(0, maxCandidates).map((candidate, rank) => {
+        candidate.el.setAttribute('data-achar-candidate', String(rank));
+        return {
+            rank,
+            selector: candidate.selector,
+            selectorIndex: candidate.selectorIndex,
+            tag: candidate.el.tagName.toLowerCase(),
+            score: candidate.score
+        };
+    });
+}
+"""
+
+
+# Procura o termo descendo só pelos elementos cujo texto o contém e registra
+# o elemento mais profundo que ainda contém o termo inteiro, com os espaços
+# normalizados: "<b>Boneca</b> <b>Giramille</b>" conta no elemento pai, como
+# no :has-text. Para cada ocorrência informa se está visível, se fica dentro
+# de um container de produto e se parece só o eco da busca ("resultados para
+# ..."), com um trecho do texto ao redor. Ocorrências em alt de imagens
+# também contam.
+DETECT_TERM_SCRIPT = """
+([term, containerSelector, maxMatches]) => {
+    const normalize = (text) => (text || '').replace(/\\s+/g, ' ').toLowerCase();
+    const needle = normalize(term).trim();
+    const SKIP_TAGS = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'TEXTAREA', 'OPTION', 'TITLE']);
+    const ECHO = /(resultados?|busca|buscou|pesquis|procurou|search|results? for)/i;
+    const CHROME = 'header, nav, form, [role="search"], [class*="autocomplete" i], [class*="suggest" i]';
+
+    function isVisible(el) {
+        if (el.checkVisibility && !el.checkVisibility({ visibilityProperty: true, opacityProperty: true })) {
+            return false;
+        }
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    }
+
+    function inContainer(el) {
+        try {
+            return !!el.closest(containerSelector);
+        } catch (e) {
+            return false;
+        }
+    }
+
+    const counts = { total: 0, visibleProduct: 0, visibleOther: 0, echo: 0, hidden: 0 };
+    const matches = [];
+
+    function record(el, text, kind) {
+        counts.total += 1;
+        const visible = isVisible(el);
+        const inProduct = inContainer(el);
+        text = normalize(text);
+        const position = text.indexOf(needle);
+        const snippet = text.slice(Math.max(0, position - 40), position + needle.length + 40).trim();
+        const echo = !inProduct && (ECHO.test(snippet) || !!el.closest(CHROME));
+
+        if (!visible) counts.hidden += 1;
+        else if (inProduct) counts.visibleProduct += 1;
+        else if (echo) counts.echo += 1;
+        else counts.visibleOther += 1;
+
+        if (matches.length < maxMatches) {
+            matches.push({ tag: el.tagName.toLowerCase(), kind, visible, inProduct, echo, snippet });
+        }
+    }
+
+    // Texto do elemento sem scripts, estilos e afins (o textContent os inclui)
+    function ownText(el) {
+        let text = '';
+        for (const node of el.childNodes) {
+            if (node.nodeType === Node.TEXT_NODE) text += node.nodeValue;
+            else if (node.nodeType === Node.ELEMENT_NODE && !SKIP_TAGS.has(node.tagName)) text += ownText(node);
+        }
+        return text;
+    }
+
+    // textContent (nativo) descarta rápido as subárvores sem o termo; o ownText
+    // só confirma o elemento mais profundo
+    function visit(el) {
+        if (SKIP_TAGS.has(el.tagName) || !normalize(el.textContent).includes(needle)) return false;
+        let childHit = false;
+        for (const child of el.children) {
+            if (visit(child)) childHit = true;
+        }
+        if (childHit) return true;
+        const text = ownText(el);
+        if (!normalize(text).includes(needle)) return false;
+        record(el, text, 'text');
+        return true;
+    }
+    if (needle && document.body) visit(document.body);
+
+    document.querySelectorAll('img[alt]').forEach(img => {
+        if (normalize(img.alt).includes(needle)) record(img, img.alt, 'alt');
+    });
+
+    return { counts, matches };
+}
+"""
+
+
+# Rola direto até o fim da página e espera ela parar de crescer. Mudanças no
+# DOM (MutationObserver), na altura e novas requisições concluídas (Resource
+# Timing) reiniciam a janela de silêncio; quando ela passa sem nada novo, ou o
+# tempo máximo estoura, o script termina. Com stopTerm, termina assim que o
+# termo aparece dentro de um container de produto.
+SCROLL_TO_END_SCRIPT = """
+async ([quietMs, maxMs, stopTerm, containerSelector]) => {
+    const started = performance.now();
+    const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+    const pageHeight = () => Math.max(
+        document.body ? document.body.scrollHeight : 0,
+        document.documentElement.scrollHeight
+    );
+    const resourceCount = () => performance.getEntriesByType('resource').length;
+    // Mesma normalização de espaços da detecção (DETECT_TERM_SCRIPT)
+    const normalize = (text) => (text || '').replace(/\\s+/g, ' ').toLowerCase();
+    const needle = stopTerm ? normalize(stopTerm).trim() : null;
+
+    function termConfirmed() {
+        try {
+            return [...document.querySelectorAll(containerSelector)]
+                .some(el => normalize(el.textContent).includes(needle));
+        } catch (e) {
+            return false;
+        }
+    }
+
+    if (performance.setResourceTimingBufferSize) performance.setResourceTimingBufferSize(5000);
+
+    let lastChange = performance.now();
+    const observer = new MutationObserver(() => { lastChange = performance.now(); });
+    observer.observe(document.documentElement, { childList: true, subtree: true });
+
+    let height = pageHeight();
+    let resources = resourceCount();
+    let jumps = 0;
+    let reason = 'timeout';
+
+    try {
+        if (needle && termConfirmed()) {
+            reason = 'term';
+        } else {
+            while (performance.now() - started < maxMs) {
+                window.scrollTo(0, pageHeight());
+                jumps += 1;
+                await sleep(100);
+
+                const newHeight = pageHeight();
+                const newResources = resourceCount();
+                if (newHeight !== height || newResources !== resources) {
+                    height = newHeight;
+                    resources = newResources;
+                    lastChange = performance.now();
+                    if (needle && termConfirmed()) {
+                        reason = 'term';
+                        break;
+                    }
+                }
+
+                if (performance.now() - lastChange >= quietMs) {
+                    reason = 'quiet';
+                    break;
+                }
+            }
+        }
+    } finally {
+        observer.disconnect();
+    }
+
+    return { jumps, height, reason, elapsedMs: Math.round(performance.now() - started) };
+}
+"""
+
+
+# Função compartilhada pelo fechamento sob demanda e pelo guarda de popups.
+# Para cada popup visível (elemento fixo na tela ou role="dialog") escolhe o
+# melhor controle de fechar/aceitar, na ordem da lista de seletores, e clica
+# nele. Overlays sem controle que cobrem a maior parte da tela são escondidos.
+# Popups com campo de CEP ficam para o handle_cep_prompt; cabeçalhos fixos e
+# overlays com a busca do site ou candidatos marcados nunca são tocados.
+DISMISS_POPUPS_FUNCTION = """
+function dismissPopups(selectors, overlaySelectors) {
+    const HAS_TEXT = /^(.*):has-text\\("(.*)"\\)$/;
+    // Containers com o campo de CEP, a busca do site ou candidatos marcados não são popups
+    const KEEP = [
+        'input[id*="cep" i]', 'input[name*="cep" i]', 'input[placeholder*="cep" i]',
+        'input[type="search"]', 'input[type="text"]', 'input:not([type])',
+        '[role="search"]', '[data-achar-candidate]'
+    ].join(', ');
+    const MAX_CONTROL_TEXT = 40;
+
+    const textOf = (el) => (el.innerText || el.textContent || '').trim();
+
+    function query(selector) {
+        const match = selector.match(HAS_TEXT);
+        if (match) {
+            const text = match[2].toLowerCase();
+            return [...document.querySelectorAll(match[1] || '*')]
+                .filter(el => textOf(el).toLowerCase().includes(text));
+        }
+        return [...document.querySelectorAll(selector)];
+    }
+
+    function isVisible(el) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0) return false;
+        const style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none' && style.opacity !== '0';
+    }
+
+    function popupOf(el) {
+        for (let node = el; node && node !== document.body; node = node.parentElement) {
+            if (node.getAttribute('role') === 'dialog' || node.getAttribute('aria-modal') === 'true') return node;
+            if (getComputedStyle(node).position === 'fixed') return node;
+        }
+        return null;
+    }
+
+    const chosen = new Map();
+    selectors.forEach((selector, priority) => {
+        let elements;
+        try {
+            elements = query(selector);
+        } catch (e) {
+            return;
+        }
+        for (const el of elements) {
+            // Controles têm pouco texto; isso descarta o próprio container do popup
+            if (textOf(el).length > MAX_CONTROL_TEXT || !isVisible(el)) continue;
+            const popup = popupOf(el);
+            if (!popup || chosen.has(popup) || popup.querySelector(KEEP)) continue;
+            chosen.set(popup, { el, selector, priority });
+        }
+    });
+
+    const clicked = [];
+    chosen.forEach(({ el, selector }) => {
+        try {
+            el.click();
+            clicked.push({ selector, text: textOf(el).slice(0, MAX_CONTROL_TEXT) });
+        } catch (e) {}
+    });
+
+    let hidden = 0;
+    const viewport = window.innerWidth * window.innerHeight;
+    overlaySelectors.forEach((selector) => {
+        let elements;
+        try {
+            elements = document.querySelectorAll(selector);
+        } catch (e) {
+            return;
+        }
+        elements.forEach((el) => {
+            if (chosen.has(el) || !isVisible(el) || el.querySelector(KEEP)) return;
+            const rect = el.getBoundingClientRect();
+            const style = getComputedStyle(el);
+            if (style.position !== 'fixed' || rect.width * rect.height < viewport * 0.5) return;
+            el.style.setProperty('display', 'none', 'important');
+            hidden += 1;
+        });
+    });
+    if (hidden) {
+        // Overlays costumam travar a rolagem da página
+        document.documentElement.style.overflow = '';
+        document.body.style.overflow = '';
+    }
+
+    return { clicked, hidden };
+}
+"""
+
+DISMISS_POPUPS_SCRIPT = """
+([selectors, overlaySelectors]) => {
+""" + DISMISS_POPUPS_FUNCTION + """
+    return dismissPopups(selectors, overlaySelectors);
+}
+"""
+
+
+# Instalado com context.add_init_script(): em cada documento, fecha os popups
+# já presentes no DOMContentLoaded e, por POPUP_GUARD_MS, os que aparecerem
+# depois (MutationObserver com debounce). Os três %s são, em ordem: a lista de
+# seletores, a de overlays (JSON) e o tempo armado em ms.
+POPUP_GUARD_SCRIPT = """
+(() => {
+    if (window.__acharPopupGuard) return;
+    window.__acharPopupGuard = true;
+
+    const SELECTORS = %s;
+    const OVERLAY_SELECTORS = %s;
+    const ARMED_MS = %s;
+""" + DISMISS_POPUPS_FUNCTION + """
+    let timer = null;
+    const run = () => {
+        timer = null;
+        try {
+            dismissPopups(SELECTORS, OVERLAY_SELECTORS);
+        } catch (e) {}
+    };
+
+    const arm = () => {
+        const observer = new MutationObserver(() => {
+            if (!timer) timer = setTimeout(run, 250);
+        });
+        observer.observe(document.documentElement, { childList: true, subtree: true });
+        setTimeout(() => observer.disconnect(), ARMED_MS);
+        run();
+    };
+
+    if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', arm);
+    else arm();
+})();
+"""
+
+
+# Procura, numa única chamada, o primeiro campo de CEP visível e o botão que
+# o confirma. O botão é buscado só perto do campo (mesmo form, diálogo ou
+# elemento fixo), para não clicar no "buscar" do cabeçalho. Os dois ficam
+# marcados com data-achar-cep="field" / "button" para o Python localizá-los.
+FIND_CEP_SCRIPT = """
+([fieldSelectors, buttonSelectors]) => {
+    const HAS_TEXT = /^(.*):has-text\\("(.*)"\\)$/;
+
+    function query(root, selector) {
+        const match = selector.match(HAS_TEXT);
+        if (match) {
+            const text = match[2].toLowerCase();
+            return [...root.querySelectorAll(match[1] || '*')]
+                .filter(el => (el.innerText || el.textContent || '').toLowerCase().includes(text));
+        }
+        return [...root.querySelectorAll(selector)];
+    }
+
+    function isVisible(el) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width === 0 || rect.height === 0) return false;
+        const style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none' && style.opacity !== '0';
+    }
+
+    function first(root, selectors) {
+        for (const selector of selectors) {
+            let elements;
+            try {
+                elements = query(root, selector);
+            } catch (e) {
+                continue;
+            }
+            const el = elements.find(isVisible);
+            if (el) return { el, selector };
+        }
+        return null;
+    }
+
+    function scopeOf(el) {
+        const container = el.closest('form, [role="dialog"], [aria-modal="true"]');
+        if (container) return container;
+        for (let node = el.parentElement; node && node !== document.body; node = node.parentElement) {
+            if (getComputedStyle(node).position === 'fixed') return node;
+        }
+        return el.parentElement && el.parentElement.parentElement || document.body;
+    }
+
+    document.querySelectorAll('[data-achar-cep]').forEach(el => el.removeAttribute('data-achar-cep'));
+
+    const field = first(document, fieldSelectors);
+    if (!field) return { field: null, button: null };
+    field.el.setAttribute('data-achar-cep', 'field');
+
+    const button = first(scopeOf(field.el), buttonSelectors);
+    if (button) button.el.setAttribute('data-achar-cep', 'button');
+
+    return { field: field.selector, button: button ? button.selector : null };
+}
+"""
+
+
+# Texto normalizado dos primeiros cards de produto da listagem, para a
+# impressão digital da página de resultados. Só entram os containers de nível
+# mais alto (um card dentro de outro conta uma vez); números saem do texto
+# para que preço e estoque não mudem a impressão. Sem nenhum card reconhecido
+# o texto volta vazio: o começo do <body> de uma SPA pode ser a casca de antes
+# dos resultados aparecerem e não serve para pular a verificação.
+FINGERPRINT_RESULTS_SCRIPT = """
+([containerSelector, maxItems, maxChars]) => {
+    function normalize(text) {
+        return (text || '').toLowerCase().replace(/[0-9]+/g, '').replace(/\\s+/g, ' ').trim();
+    }
+
+    let containers = [];
+    try {
+        containers = [...document.querySelectorAll(containerSelector)];
+    } catch (e) {
+        containers = [];
+    }
+    const items = containers
+        .filter(el => !el.parentElement || !el.parentElement.closest(containerSelector))
+        .map(el => normalize(el.innerText))
+        .filter(text => text)
+        .slice(0, maxItems);
+
+    return { items: items.length, text: items.join('\\n').slice(0, maxChars) };
+}
+"""
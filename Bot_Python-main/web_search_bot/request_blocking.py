@@ -0,0 +1,96 @@
+from urllib.parse import urlparse
+from search_templates import site_domain
+
+
+# Tipos de recurso que não influenciam o texto da página
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Domínios de anúncios, analytics e rastreamento
+TRACKER_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com",
+    "googlesyndication.com", "doubleclick.net", "adservice.google.com",
+    "connect.facebook.net", "facebook.net", "analytics.tiktok.com",
+    "bat.bing.com", "clarity.ms", "hotjar.com", "hotjar.io",
+    "criteo.com", "criteo.net", "taboola.com", "outbrain.com",
+    "nr-data.net", "newrelic.com", "segment.io", "mixpanel.com",
+    "fullstory.com", "smartlook.com", "rdstation.com.br"
+]
+
+# Lojas que quebram com o bloqueio: domínio da loja -> o que deve ser liberado.
+# Exemplo: {"loja.com.br": {"allow_types": ["font"], "allow_domains": ["googletagmanager.com"]}}
+DOMAIN_OVERRIDES = {}
+
+# Tamanho médio de cada tipo de recurso bloqueado. Uma requisição abortada não
+# chega a informar o tamanho, então os bytes economizados são uma estimativa.
+ESTIMATED_BYTES = {
+    "image": 60 * 1024,
+    "media": 500 * 1024,
+    "font": 40 * 1024,
+    "script": 35 * 1024,
+    "xhr": 5 * 1024,
+    "fetch": 5 * 1024
+}
+DEFAULT_ESTIMATED_BYTES = 10 * 1024
+
+
+def _matches_domain(host, domains):
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class RequestBlocker:
+    """Política de page.route aplicada a cada contexto de um worker.
+
+    Aborta imagens, mídia, fontes e rastreadores, respeitando as exceções de
+    DOMAIN_OVERRIDES, e conta o que foi economizado no site atual.
+    """
+
+    def __init__(self, blocked_types=BLOCKED_RESOURCE_TYPES, tracker_domains=TRACKER_DOMAINS,
+                 overrides=DOMAIN_OVERRIDES):
+        self.blocked_types = set(blocked_types)
+        self.tracker_domains = list(tracker_domains)
+        self.overrides = overrides
+        self.reset()
+
+    def attach(self, context):
+        context.route("**/*", self._handle)
+
+    def reset(self):
+        """Zera os contadores; chamado no início de cada site."""
+        self.blocked_requests = 0
+        self.allowed_requests = 0
+        self.bytes_saved = 0
+        self.blocked_by_type = {}
+
+    def stats(self):
+        return {
+            "blocked_requests": self.blocked_requests,
+            "allowed_requests": self.allowed_requests,
+            "bytes_saved": self.bytes_saved,
+            "blocked_by_type": dict(self.blocked_by_type)
+        }
+
+    def should_block(self, resource_type, request_host, store_domain):
+        override = self.overrides.get(store_domain, {})
+
+        if _matches_domain(request_host, self.tracker_domains):
+            return not _matches_domain(request_host, override.get("allow_domains", []))
+
+        return resource_type in self.blocked_types and resource_type not in override.get("allow_types", [])
+
+    def _handle(self, route):
+        request = route.request
+        try:
+            store_domain = site_domain(request.frame.page.url)
+        except Exception:
+            store_domain = ""
+        request_host = (urlparse(request.url).hostname or "").lower()
+
+        if request.resource_type != "document" and \
+                self.should_block(request.resource_type, request_host, store_domain):
+            self.blocked_requests += 1
+            self.bytes_saved += ESTIMATED_BYTES.get(request.resource_type, DEFAULT_ESTIMATED_BYTES)
+            self.blocked_by_type[request.resource_type] = self.blocked_by_type.get(request.resource_type, 0) + 1
+            route.abort()
+        else:
+            self.allowed_requests += 1
+            route.continue_()
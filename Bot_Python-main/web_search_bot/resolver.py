@@ -0,0 +1,106 @@
+from urllib.parse import urlparse
+from deadline import Deadline
+from metrics import timed
+import re
+import threading
+import time
+
+
+# Por quanto tempo uma URL resolvida pelo DuckDuckGo é reaproveitada (segundos)
+URL_CACHE_TTL = 7 * 24 * 3600
+
+# Entradas como "loja.com.br" ou "www.loja.com/brinquedos" dispensam busca
+DOMAIN_PATTERN = re.compile(
+    r"^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,}(?::\d+)?(?:/\S*)?$",
+    re.IGNORECASE
+)
+
+
+def direct_url(site):
+    """Devolve a URL para navegação direta, ou None se a entrada for um nome."""
+    site = site.strip()
+    if site.lower().startswith(("http://", "https://")):
+        return site
+    if DOMAIN_PATTERN.match(site):
+        return "https://" + site
+    return None
+
+
+def search_duckduckgo(page, site, deadline=None):
+    """Busca o nome no DuckDuckGo e abre o primeiro resultado."""
+    deadline = deadline or Deadline()
+    # Cada chamada recebe só o que sobrou do orçamento de "resolve"
+    page.goto('https://duckduckgo.com', wait_until="load", timeout=deadline.timeout_ms("resolve"))
+    page.click('#searchbox_input', timeout=deadline.timeout_ms("resolve"))
+    page.fill('#searchbox_input', site, timeout=deadline.timeout_ms("resolve"))
+    page.press('#searchbox_input', 'Enter', timeout=deadline.timeout_ms("resolve"))
+
+    page.wait_for_selector('h2', state='visible', timeout=deadline.timeout_ms("resolve"))
+    page.click('h2', timeout=deadline.timeout_ms("resolve"))
+    page.wait_for_load_state("load", timeout=deadline.timeout_ms("resolve"))
+    return page.url
+
+
+def landed(page, response):
+    """A navegação chegou numa página válida da loja?"""
+    if response is not None and response.status >= 400:
+        return False
+    return urlparse(page.url).scheme in ("http", "https")
+
+
+class UrlResolver:
+    """Leva a página até a loja, evitando o DuckDuckGo sempre que possível.
+
+    URLs e domínios são abertos direto; nomes de loja passam pelo DuckDuckGo
+    uma vez e a URL de destino fica em cache no disco por ``ttl`` segundos.
+    """
+
+    def __init__(self, store, ttl=URL_CACHE_TTL):
+        self.store = store
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.counters = {"direct": 0, "hits": 0, "misses": 0, "stale": 0}
+
+    def resolve(self, page, site, timings=None, deadline=None):
+        """Abre a loja na página; o tempo vai para as fases "navigate" e "resolve" de ``timings``."""
+        if timings is None:
+            timings = {}
+        deadline = deadline or Deadline()
+
+        url = direct_url(site)
+        if url:
+            self._count("direct")
+            with timed(timings, "navigate"):
+                response = page.goto(url, wait_until="load", timeout=deadline.timeout_ms("resolve"))
+            if not landed(page, response):
+                raise RuntimeError(f"Falha ao abrir {url} (HTTP {response.status if response else '?'})")
+            return page.url
+
+        cached = self.store.get(site)
+        if cached and time.time() - cached["resolved_at"] < self.ttl:
+            try:
+                with timed(timings, "navigate"):
+                    response = page.goto(cached["url"], wait_until="load", timeout=deadline.timeout_ms("resolve"))
+                if landed(page, response):
+                    self._count("hits")
+                    return page.url
+            except Exception as e:
+                print(f"[Resolver] Cache inválido para {site}: {e}")
+            self._count("stale")
+            self.store.delete(site)
+
+        self._count("misses")
+        with timed(timings, "resolve"):
+            landing_url = search_duckduckgo(page, site, deadline)
+        self.store.set(site, {"url": landing_url, "resolved_at": time.time()})
+        return landing_url
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["cached"] = len(self.store)
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
@@ -0,0 +1,258 @@
+from json_store import DATA_DIR
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+# Quantas linhas o gravador junta numa única transação
+RESULT_BATCH_SIZE = 100
+
+# Tempo máximo que um resultado espera na fila antes de ir para o disco (segundos)
+RESULT_FLUSH_SECONDS = 1.0
+
+# Limite padrão de linhas devolvidas pelas consultas de histórico
+RESULT_QUERY_LIMIT = 1000
+
+# Estados de job que, encontrados na inicialização, indicam execução interrompida
+INTERRUPTED_STATES = ("queued", "running", "paused")
+
+# Colunas devolvidas pelas consultas (a linha completa em JSON fica só para a retomada)
+RESULT_COLUMNS = ("id, job_id, loop, row_index, url, term, status_search_bar, "
+                  "status_content_search, confidence, elapsed, timings, recorded_at")
+
+# Linhas lidas do SQLite de cada vez nas exportações
+EXPORT_CHUNK_SIZE = 500
+
+# Colunas do jobs acrescentadas depois da primeira versão do banco
+JOB_COLUMN_MIGRATIONS = ["cep TEXT", "mode TEXT", "ingesting INTEGER"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    created_at REAL,
+    updated_at REAL,
+    profile TEXT,
+    num_workers INTEGER,
+    state TEXT,
+    loops INTEGER,
+    sites TEXT,
+    cep TEXT,
+    mode TEXT,
+    ingesting INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT,
+    loop INTEGER,
+    row_index INTEGER,
+    url TEXT,
+    term TEXT,
+    status_search_bar TEXT,
+    status_content_search TEXT,
+    confidence REAL,
+    elapsed REAL,
+    timings TEXT,
+    row TEXT,
+    recorded_at REAL
+);
+CREATE INDEX IF NOT EXISTS results_by_url ON results (url, id);
+CREATE INDEX IF NOT EXISTS results_by_job ON results (job_id, loop, row_index);
+CREATE INDEX IF NOT EXISTS results_by_time ON results (recorded_at);
+"""
+
+
+class ResultStore:
+    """Histórico de resultados por site num SQLite em modo WAL.
+
+    As gravações entram numa fila e uma thread própria as grava em lotes,
+    então os workers nunca esperam pelo disco. As consultas abrem a sua
+    própria conexão; com WAL elas leem sem bloquear o gravador.
+    """
+
+    def __init__(self, filename='results.db', data_dir=DATA_DIR,
+                 batch_size=RESULT_BATCH_SIZE, flush_seconds=RESULT_FLUSH_SECONDS):
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, filename)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = queue.Queue()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Bancos criados antes dessas colunas
+            for column in JOB_COLUMN_MIGRATIONS:
+                try:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    pass
+
+        threading.Thread(target=self._writer, name="result-store", daemon=True).start()
+
+    def save_job(self, job):
+        """Grava (ou atualiza) o job, com a lista de sites, para poder retomá-lo."""
+        self._pending.put((
+            "INSERT INTO jobs (job_id, created_at, updated_at, profile, num_workers, state, loops, sites, cep, mode, "
+            "ingesting) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(job_id) DO UPDATE SET updated_at = excluded.updated_at, "
+            "state = excluded.state, loops = excluded.loops",
+            (job.id, job.created_at, time.time(), job.profile_name, job.num_workers,
+             job.state, job.loops, json.dumps(job.sites, ensure_ascii=False), job.cep, job.mode, int(job.ingesting))
+        ))
+
+    def save_sites(self, job):
+        """Regrava a lista de sites de um job cujo upload terminou de ser lido."""
+        self._pending.put((
+            "UPDATE jobs SET sites = ?, ingesting = ?, updated_at = ? WHERE job_id = ?",
+            (json.dumps(job.sites, ensure_ascii=False), int(job.ingesting), time.time(), job.id)
+        ))
+
+    def record(self, job_id, loop, index, term, row):
+        """Enfileira o resultado de um site; a gravação acontece em lote."""
+        self._pending.put((
+            "INSERT INTO results (job_id, loop, row_index, url, term, status_search_bar, "
+            "status_content_search, confidence, elapsed, timings, row, recorded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, loop, index, row.get("url"), term, row.get("status_search_bar"),
+             row.get("status_content_search"), row.get("confidence"), row.get("elapsed"),
+             json.dumps(row.get("timings") or {}), json.dumps(row, ensure_ascii=False), time.time())
+        ))
+
+    def flush(self, timeout=10):
+        """Espera o gravador esvaziar a fila (ex.: antes de consultar o que acabou de ser gravado)."""
+        done = threading.Event()
+        self._pending.put(done)
+        return done.wait(timeout)
+
+    def latest(self, job_id=None, limit=RESULT_QUERY_LIMIT):
+        """Último resultado de cada site, opcionalmente só de um job."""
+        where, params = ("WHERE job_id = ?", [job_id]) if job_id else ("", [])
+        return self._query(
+            f"SELECT {RESULT_COLUMNS} FROM results WHERE id IN ("
+            f"    SELECT MAX(id) FROM results {where} GROUP BY url"
+            ") ORDER BY url LIMIT ?",
+            params + [limit]
+        )
+
+    def history(self, url, limit=RESULT_QUERY_LIMIT):
+        """Resultados de um site, do mais recente para o mais antigo."""
+        return self._query(
+            f"SELECT {RESULT_COLUMNS} FROM results WHERE url = ? ORDER BY id DESC LIMIT ?",
+            [url, limit]
+        )
+
+    def changes_since(self, since, job_id=None, limit=RESULT_QUERY_LIMIT):
+        """Resultados gravados após o instante ``since`` (timestamp Unix)."""
+        sql = f"SELECT {RESULT_COLUMNS} FROM results WHERE recorded_at > ?"
+        params = [since]
+        if job_id:
+            sql += " AND job_id = ?"
+            params.append(job_id)
+        return self._query(sql + " ORDER BY id LIMIT ?", params + [limit])
+
+    def loop_rows(self, job_id, loop):
+        """Linhas já concluídas de um loop do job, como {índice: linha}."""
+        rows = self._query(
+            "SELECT row_index, row FROM results WHERE job_id = ? AND loop = ? ORDER BY id",
+            [job_id, loop]
+        )
+        return {row["row_index"]: json.loads(row["row"]) for row in rows}
+
+    def last_results(self, sites, chunk_size=EXPORT_CHUNK_SIZE):
+        """Última linha gravada de cada site (url, termo) em qualquer job, como {(url, termo): linha}."""
+        urls = sorted({site.get("url", "") for site in sites})
+        latest = {}
+        for start in range(0, len(urls), chunk_size):
+            chunk = urls[start:start + chunk_size]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self._query(
+                f"SELECT url, term, row FROM results WHERE id IN ("
+                f"    SELECT MAX(id) FROM results WHERE url IN ({placeholders}) GROUP BY url, term"
+                f")",
+                chunk
+            )
+            latest.update({(row["url"], row["term"]): json.loads(row["row"]) for row in rows})
+        return latest
+
+    def job_exists(self, job_id):
+        return bool(self._query("SELECT 1 AS found FROM jobs WHERE job_id = ?", [job_id]))
+
+    def iter_job_results(self, job_id, chunk_size=EXPORT_CHUNK_SIZE):
+        """Todos os resultados de um job, loop a loop, lidos do disco aos poucos (memória constante)."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"SELECT {RESULT_COLUMNS} FROM results WHERE job_id = ? ORDER BY loop, row_index, id",
+                [job_id]
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    row = dict(row)
+                    if row.get("timings"):
+                        row["timings"] = json.loads(row["timings"])
+                    yield row
+        finally:
+            conn.close()
+
+    def interrupted_jobs(self):
+        """Jobs que estavam na fila ou rodando quando o processo parou."""
+        placeholders = ", ".join("?" for _ in INTERRUPTED_STATES)
+        jobs = self._query(
+            f"SELECT * FROM jobs WHERE state IN ({placeholders}) ORDER BY created_at",
+            list(INTERRUPTED_STATES)
+        )
+        for job in jobs:
+            job["sites"] = json.loads(job["sites"])
+        return jobs
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _query(self, sql, params):
+        conn = self._connect()
+        try:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+        for row in rows:
+            if row.get("timings"):
+                row["timings"] = json.loads(row["timings"])
+        return rows
+
+    def _writer(self):
+        conn = self._connect()
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.time() + self.flush_seconds
+            while len(batch) < self.batch_size and not isinstance(batch[-1], threading.Event):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                # Um pedido de flush (Event) fecha o lote na hora
+                batch.append(item)
+
+            waiters = [item for item in batch if isinstance(item, threading.Event)]
+            statements = [item for item in batch if not isinstance(item, threading.Event)]
+            try:
+                with conn:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+            except sqlite3.Error as e:
+                print(f"[WARNING] Falha ao gravar {len(statements)} resultados: {e}")
+
+            for waiter in waiters:
+                waiter.set()
@@ -0,0 +1,80 @@
+import threading
+
+
+class ResultTable:
+    """Resultados por linha, cada alteração marcada com um número de sequência.
+
+    O número de sequência cresce a cada mudança em qualquer linha, o que
+    permite enviar aos clientes apenas as linhas alteradas desde a última
+    sequência que eles já viram (SSE e polling com ?since=).
+    """
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._rows = []
+        self._row_seq = []
+        self.seq = 0
+
+    def reset(self, rows):
+        """Troca todas as linhas (início de um novo loop)."""
+        with self._changed:
+            self._rows = [dict(row) for row in rows]
+            self._row_seq = []
+            for _ in self._rows:
+                self.seq += 1
+                self._row_seq.append(self.seq)
+            self._changed.notify_all()
+
+    def extend(self, rows):
+        """Acrescenta linhas ao fim (sites chegando de um upload em andamento)."""
+        with self._changed:
+            for row in rows:
+                self._rows.append(dict(row))
+                self.seq += 1
+                self._row_seq.append(self.seq)
+            self._changed.notify_all()
+
+    def get(self, index):
+        with self._changed:
+            return dict(self._rows[index])
+
+    def set(self, index, row):
+        with self._changed:
+            self._rows[index] = dict(row)
+            self.seq += 1
+            self._row_seq[index] = self.seq
+            self._changed.notify_all()
+
+    def rows(self):
+        with self._changed:
+            return [dict(row) for row in self._rows]
+
+    def values(self, field):
+        """Valores de um campo em todas as linhas, sem copiar as linhas."""
+        with self._changed:
+            return [row.get(field) for row in self._rows]
+
+    def __len__(self):
+        with self._changed:
+            return len(self._rows)
+
+    def changes_since(self, since):
+        """Devolve (sequência atual, [(índice, linha), ...]) alterados após ``since``."""
+        with self._changed:
+            changes = [
+                (index, dict(self._rows[index]))
+                for index, row_seq in enumerate(self._row_seq)
+                if row_seq > since
+            ]
+            return self.seq, changes
+
+    def wait_for_change(self, since, timeout):
+        """Bloqueia até haver alteração após ``since`` ou o timeout passar."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.seq > since, timeout)
+
+    def notify(self):
+        """Acorda os streams sem alterar linhas (ex.: fim de um loop)."""
+        with self._changed:
+            self.seq += 1
+            self._changed.notify_all()
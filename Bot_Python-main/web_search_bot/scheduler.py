@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+
+
+# Intervalo mínimo entre duas verificações do mesmo site (segundos)
+REVISIT_MIN_SECONDS = 30 * 60
+
+# Intervalo máximo: mesmo um site que nunca muda é verificado ao menos uma vez neste prazo
+REVISIT_MAX_SECONDS = 24 * 60 * 60
+
+# Variação aleatória (±fração do intervalo) para não reagendar todos os sites juntos
+REVISIT_JITTER = 0.1
+
+# Peso da última verificação na volatilidade (média móvel exponencial de "mudou")
+VOLATILITY_ALPHA = 0.3
+
+# Primeira nova tentativa após uma falha; dobra a cada falha seguida até o máximo
+FAILURE_RETRY_SECONDS = 5 * 60
+
+# Maior espera entre duas passadas quando nenhum site está vencido (segundos)
+SCHEDULER_IDLE_SECONDS = 60
+
+
+def site_key(url, search_term, scope=None):
+    """Chave do site no agendador; ``scope`` (o id do job) separa a agenda de cada job."""
+    key = f"{url.strip().lower()}|{search_term.strip().lower()}"
+    return f"{scope}|{key}" if scope else key
+
+
+def outcome_of(result):
+    """Resumo do resultado usado para saber se a resposta do site mudou."""
+    return f"{result.get('status_search_bar')}|{result.get('status_content_search')}"
+
+
+def failed(result):
+    return str(result.get("status", "")).startswith(("Timeout", "Erro"))
+
+
+class RevisitScheduler:
+    """Decide quais sites verificar em cada passada do loop contínuo.
+
+    Cada site (URL + termo, dentro de um job) guarda quando foi verificado, a volatilidade da
+    resposta e as falhas seguidas. Sites que mudam com frequência voltam perto
+    do intervalo mínimo; os estáveis se afastam até o máximo; falhas são
+    repetidas logo, com espera crescente. Os vencidos saem na ordem de atraso
+    relativo ao próprio intervalo, e os nunca verificados vêm primeiro.
+
+    A agenda é por job (``scope``): um job novo, mesmo com as mesmas lojas
+    de outro, verifica todos os sites no primeiro loop e tem o próprio
+    histórico; um job retomado continua a agenda dele.
+    """
+
+    def __init__(self, store, min_seconds=REVISIT_MIN_SECONDS, max_seconds=REVISIT_MAX_SECONDS,
+                 jitter=REVISIT_JITTER):
+        self.store = store
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self.counters = {"checks": 0, "changes": 0, "failures": 0}
+
+    def due(self, sites, now=None, scope=None):
+        """Índices dos sites vencidos, do mais prioritário para o menos."""
+        now = time.time() if now is None else now
+        ranked = []
+        for index, site_data in enumerate(sites):
+            entry = self.store.get(site_key(site_data.get("url", ""), site_data.get("term", "Giramille"), scope))
+            if entry is None:
+                ranked.append((float("inf"), index))
+                continue
+
+            if entry["next_due"] <= now:
+                interval = max(entry["next_due"] - entry["last_checked"], 1)
+                ranked.append(((now - entry["last_checked"]) / interval, index))
+
+        ranked.sort(key=lambda item: -item[0])
+        return [index for _, index in ranked]
+
+    def seconds_until_due(self, sites, now=None, scope=None):
+        """Quanto falta para o próximo site vencer, limitado a SCHEDULER_IDLE_SECONDS."""
+        now = time.time() if now is None else now
+        wait = SCHEDULER_IDLE_SECONDS
+        for site_data in sites:
+            entry = self.store.get(site_key(site_data.get("url", ""), site_data.get("term", "Giramille"), scope))
+            if entry is None:
+                return 0
+            wait = min(wait, entry["next_due"] - now)
+        return max(wait, 0)
+
+    def record(self, url, search_term, result, now=None, scope=None):
+        """Atualiza o histórico do site com o resultado e agenda a próxima verificação."""
+        now = time.time() if now is None else now
+        outcome = outcome_of(result)
+        is_failure = failed(result)
+
+        def update(entry):
+            entry = entry or {"volatility": 1.0, "failures": 0, "outcome": None, "checks": 0}
+            entry["checks"] += 1
+            entry["last_checked"] = now
+
+            if is_failure:
+                entry["failures"] += 1
+                interval = min(FAILURE_RETRY_SECONDS * 2 ** (entry["failures"] - 1), self.max_seconds)
+            else:
+                changed = entry["outcome"] is not None and entry["outcome"] != outcome
+                # A primeira resposta não conta como mudança nem como estabilidade
+                if entry["outcome"] is not None:
+                    entry["volatility"] = (VOLATILITY_ALPHA * (1.0 if changed else 0.0)
+                                           + (1 - VOLATILITY_ALPHA) * entry["volatility"])
+                if changed:
+                    entry["last_changed"] = now
+                    self._count("changes")
+                entry["outcome"] = outcome
+                entry["failures"] = 0
+                interval = self.max_seconds - (self.max_seconds - self.min_seconds) * entry["volatility"]
+
+            interval *= 1 + random.uniform(-self.jitter, self.jitter)
+            entry["next_due"] = now + interval
+            return entry
+
+        self.store.update(site_key(url, search_term, scope), update)
+        self._count("checks")
+        if is_failure:
+            self._count("failures")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["tracked"] = len(self.store)
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
@@ -0,0 +1,130 @@
+from urllib.parse import quote, quote_plus, urlparse, urlsplit, urlunsplit
+import re
+import threading
+import time
+
+
+# Formas como o termo costuma aparecer na URL de resultados
+TERM_ENCODINGS = [
+    ("plus", quote_plus),   # /busca?q=boneca+giramille
+    ("quote", quote),       # /search?query=boneca%20giramille
+    ("raw", lambda term: term)
+]
+
+# Falhas seguidas até o template ser marcado como "stale"; uma página de
+# "nenhum produto encontrado" sozinha não prova que a URL mudou
+TEMPLATE_MAX_FAILURES = 3
+
+
+def site_domain(url):
+    """Domínio usado como chave das memórias por loja (sem o "www.")."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def learn_template(url, search_term):
+    """Troca o termo no caminho e na query da URL de resultados por "{term}", ou None se ele não aparecer.
+
+    O domínio fica de fora: em giramille.com.br/busca?q=Giramille só a query é trocada.
+    """
+    parts = urlsplit(url)
+    for encoding, encode in TERM_ENCODINGS:
+        encoded = encode(search_term)
+        pattern = re.compile(re.escape(encoded), re.IGNORECASE)
+        # A query vem primeiro: é onde o termo costuma estar, e decide o "lowercase"
+        found = pattern.search(parts.query) or pattern.search(parts.path)
+        if found:
+            return {
+                "template": urlunsplit(parts._replace(path=pattern.sub("{term}", parts.path),
+                                                      query=pattern.sub("{term}", parts.query))),
+                "encoding": encoding,
+                "lowercase": found.group(0) == encoded.lower() and encoded != encoded.lower()
+            }
+    return None
+
+
+def build_search_url(entry, search_term):
+    encode = dict(TERM_ENCODINGS)[entry["encoding"]]
+    encoded = encode(search_term.lower() if entry["lowercase"] else search_term)
+    return entry["template"].replace("{term}", encoded)
+
+
+class SearchTemplates:
+    """Memória, por domínio, da URL de resultados de busca de cada loja.
+
+    Aprendida após a primeira busca bem-sucedida pela barra; nas visitas
+    seguintes a página de resultados é aberta direto com o novo termo.
+    Templates que falham TEMPLATE_MAX_FAILURES vezes seguidas ficam marcados
+    como "stale" até a próxima busca pela barra aprender um novo. Se a barra
+    levar à mesma URL, o template estava certo e as falhas são esquecidas.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.counters = {"learned": 0, "used": 0, "failed": 0, "stale": 0}
+
+    def get(self, domain):
+        entry = self.store.get(domain)
+        if entry and not entry.get("stale"):
+            return entry
+        return None
+
+    def learn(self, domain, url, search_term):
+        learned = learn_template(url, search_term)
+        if not learned:
+            return None
+
+        previous = self.store.get(domain)
+        if previous and previous["template"] == learned["template"]:
+            # A barra confirmou o template: as falhas eram páginas sem resultados
+            if previous.get("stale") or previous.get("failures"):
+                return self.store.update(domain, self._confirmed)
+            return previous
+
+        learned.update({"learned_at": time.time(), "stale": False, "failures": 0, "uses": 0})
+        self.store.set(domain, learned)
+        self._count("learned")
+        print(f"[Template] {domain}: {learned['template']}")
+        return learned
+
+    def mark_used(self, domain):
+        def used(entry):
+            entry["uses"] = entry.get("uses", 0) + 1
+            entry["last_used_at"] = time.time()
+            entry["failures"] = 0
+            return entry
+        self.store.update(domain, used)
+        self._count("used")
+
+    def mark_failed(self, domain, max_failures=TEMPLATE_MAX_FAILURES):
+        """Conta uma falha do template; na max_failures-ésima seguida ele fica "stale"."""
+        def failed(entry):
+            entry["failures"] = entry.get("failures", 0) + 1
+            if entry["failures"] >= max_failures:
+                entry["stale"] = True
+                entry["stale_at"] = time.time()
+            return entry
+        if not self.store.get(domain):
+            return
+        entry = self.store.update(domain, failed)
+        self._count("failed")
+        if entry["stale"]:
+            self._count("stale")
+            print(f"[Template] {domain}: template parou de funcionar ({entry['failures']} falhas seguidas)")
+
+    @staticmethod
+    def _confirmed(entry):
+        entry["stale"] = False
+        entry["failures"] = 0
+        return entry
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["known"] = len(self.store)
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
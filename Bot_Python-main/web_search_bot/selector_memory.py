@@ -0,0 +1,84 @@
+import threading
+
+
+# Tipos de seletor aprendidos por domínio
+SELECTOR_KINDS = ("search", "popup", "cep_field", "cep_button")
+
+# Quantos seletores que funcionaram são lembrados por domínio e tipo (os mais recentes)
+MAX_SELECTORS_PER_DOMAIN = 3
+
+# Chave da popularidade geral de cada tipo, usada nos domínios ainda não vistos
+GLOBAL_KEY = "*"
+
+
+class SelectorMemory:
+    """Ordem aprendida das listas de seletores, por domínio e por tipo.
+
+    Guarda, para cada domínio, os seletores que funcionaram (barra de busca,
+    controle de popup, campo e botão de CEP) e, para cada tipo, quantas vezes
+    cada seletor funcionou em qualquer loja. ``order`` põe os do domínio na
+    frente e ordena o resto pela popularidade geral, mantendo a ordem original
+    entre os que nunca funcionaram.
+    """
+
+    def __init__(self, store, kinds=SELECTOR_KINDS, max_per_domain=MAX_SELECTORS_PER_DOMAIN):
+        self.store = store
+        self.max_per_domain = max_per_domain
+        self._lock = threading.Lock()
+        self.counters = {
+            kind: {"hits": 0, "misses": 0, "unseen": 0, "round_trips_saved": 0}
+            for kind in kinds
+        }
+
+    def learned(self, kind, domain):
+        return self.store.get(self._key(kind, domain)) or []
+
+    def order(self, kind, domain, selectors):
+        learned = [selector for selector in self.learned(kind, domain) if selector in selectors]
+        popularity = self.store.get(self._key(kind, GLOBAL_KEY)) or {}
+        rest = sorted((selector for selector in selectors if selector not in learned),
+                      key=lambda selector: -popularity.get(selector, 0))
+        return learned + rest
+
+    def record(self, kind, domain, selector, round_trips_saved=0):
+        """Registra o seletor que funcionou; acerto se ele já era conhecido no domínio."""
+        learned = self.learned(kind, domain)
+        if not learned:
+            outcome = "unseen"
+        else:
+            outcome = "hits" if selector in learned else "misses"
+
+        def remember(entry):
+            entry = [known for known in (entry or []) if known != selector]
+            return [selector] + entry[:self.max_per_domain - 1]
+
+        def count(popularity):
+            popularity = popularity or {}
+            popularity[selector] = popularity.get(selector, 0) + 1
+            return popularity
+
+        self.store.update(self._key(kind, domain), remember)
+        self.store.update(self._key(kind, GLOBAL_KEY), count)
+
+        with self._lock:
+            counters = self.counters.setdefault(kind, {"hits": 0, "misses": 0, "unseen": 0, "round_trips_saved": 0})
+            counters[outcome] += 1
+            counters["round_trips_saved"] += round_trips_saved
+        return outcome
+
+    def stats(self):
+        """Contadores por tipo, achatados para o /check-progress e o /metrics."""
+        with self._lock:
+            counters = {kind: dict(values) for kind, values in self.counters.items()}
+
+        stats = {}
+        for kind, values in counters.items():
+            known = values["hits"] + values["misses"]
+            stats.update({f"{kind}_{name}": value for name, value in values.items()})
+            stats[f"{kind}_hit_rate"] = round(values["hits"] / known, 3) if known else 0
+        stats["domains"] = len({key.split("|", 1)[1] for key, _ in self.store.items()} - {GLOBAL_KEY})
+        return stats
+
+    @staticmethod
+    def _key(kind, domain):
+        return f"{kind}|{domain}"
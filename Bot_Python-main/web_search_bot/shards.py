@@ -0,0 +1,211 @@
+from achar import arm_popup_guard
+from browser_pool import BrowserManager
+from cep_memory import CepMemory
+from fingerprints import ResultFingerprints
+from json_store import JsonStore
+from sqlite_store import SqliteStore
+from request_blocking import RequestBlocker
+from resolver import UrlResolver
+from search_templates import SearchTemplates
+from selector_memory import SelectorMemory
+from site_checker import SiteChecker
+from collections import deque
+import multiprocessing
+import queue
+import time
+
+
+# Linhas entregues de uma vez a cada processo; o próximo shard só sai quando ele termina o atual
+SHARD_SIZE = 10
+
+# Intervalo em que o processo do Flask confere pausa, cancelamento e processos mortos (segundos)
+SHARD_POLL_SECONDS = 1
+
+# Tentativas de uma linha cujo processo caiu antes de ela virar erro
+MAX_ROW_ATTEMPTS = 2
+
+# Tempo para os processos saírem sozinhos antes de serem encerrados (segundos)
+SHARD_STOP_SECONDS = 10
+
+
+def shard_worker(worker_id, profile, timeout, tasks, results, resume, stop):
+    """Processo de worker: um navegador próprio, consumindo shards de ``tasks``.
+
+    Cada linha processada volta por ``results`` como (worker_id, índice,
+    linha, tempos, resultado); linhas puladas pelo cancelamento voltam com
+    linha None. Usa os mesmos caches em disco do processo do Flask.
+    """
+    checker = SiteChecker(UrlResolver(JsonStore('url_cache.json')),
+                          SearchTemplates(JsonStore('search_templates.json')),
+                          CepMemory(SqliteStore('cep_domains')),
+                          SelectorMemory(SqliteStore('selectors')),
+                          ResultFingerprints(SqliteStore('fingerprints')), timeout)
+    blocker = RequestBlocker() if profile["block_resources"] else None
+    manager = BrowserManager(profile, blocker, context_hooks=[arm_popup_guard])
+    try:
+        manager.start()
+        print(f"[Shard {worker_id}] Playwright iniciado")
+    except Exception as e:
+        print(f"[Shard {worker_id}] Erro global: {str(e)}")
+
+    while True:
+        shard = tasks.get()
+        if shard is None:
+            break
+        for index, site_data, cep, row in shard:
+            resume.wait()
+            if stop.is_set():
+                results.put((worker_id, index, None, None, None))
+                continue
+            timings = {}
+            outcome = checker.check(manager, site_data, cep, row, timings)
+            results.put((worker_id, index, row, timings, outcome))
+
+    manager.stop()
+    print(f"[Shard {worker_id}] Navegador fechado")
+
+
+class ShardPool:
+    """Processos de worker de um job, cada um com o seu navegador e o seu GIL.
+
+    ``run`` divide as linhas vencidas em shards de ``shard_size`` e entrega
+    um por vez a cada processo livre; os resultados voltam por uma fila e
+    são gravados pelo ``on_result`` no processo do Flask. Se um processo
+    morre, as linhas que ele ainda não devolveu voltam para o início da
+    fila e um processo novo assume o lugar dele.
+    """
+
+    def __init__(self, profile, size, timeout, shard_size=SHARD_SIZE, max_attempts=MAX_ROW_ATTEMPTS):
+        self.profile = profile
+        self.size = size
+        self.timeout = timeout
+        self.shard_size = shard_size
+        self.max_attempts = max_attempts
+
+        # spawn em qualquer sistema: o Playwright e as threads do Flask não sobrevivem a um fork
+        self._ctx = multiprocessing.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._resume = self._ctx.Event()
+        self._stop = self._ctx.Event()
+        self._resume.set()
+        self._workers = {}
+        self._next_id = 0
+        self.crashes = 0
+
+    def start(self):
+        for _ in range(self.size):
+            self._spawn()
+
+    def stop(self):
+        """Encerra os processos; os que não saírem a tempo são terminados."""
+        self._stop.set()
+        self._resume.set()
+        for worker in self._workers.values():
+            worker["tasks"].put(None)
+        deadline = time.time() + SHARD_STOP_SECONDS
+        for worker in self._workers.values():
+            worker["process"].join(max(deadline - time.time(), 0))
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+        self._workers = {}
+
+    def run(self, job, tasks, on_result, feed=None):
+        """Processa ``tasks`` [(índice, site, cep, linha)] e chama ``on_result(índice, linha, tempos, resultado)``.
+
+        ``feed``, se informado, é chamado a cada volta e devolve (novas tarefas,
+        acabou?), para processar um upload enquanto ele ainda é lido.
+        """
+        backlog = deque(tasks)
+        payloads = {task[0]: task for task in tasks}
+        attempts = {}
+        feeding = feed is not None
+        self._stop.clear()
+
+        while feeding or backlog or any(worker["assigned"] for worker in self._workers.values()):
+            self._sync(job)
+            if feeding:
+                new_tasks, finished = feed()
+                backlog.extend(new_tasks)
+                payloads.update((task[0], task) for task in new_tasks)
+                feeding = not finished
+            if job.cancelled:
+                backlog.clear()
+
+            for worker in self._workers.values():
+                if backlog and not worker["assigned"]:
+                    shard = [backlog.popleft() for _ in range(min(self.shard_size, len(backlog)))]
+                    worker["assigned"] = {task[0] for task in shard}
+                    worker["tasks"].put(shard)
+
+            try:
+                message = self._results.get(timeout=SHARD_POLL_SECONDS)
+            except queue.Empty:
+                message = None
+            if message is not None:
+                self._receive(message, on_result)
+
+            self._reap(backlog, payloads, attempts, on_result)
+
+    def _sync(self, job):
+        """Repassa pausa e cancelamento do job para os processos."""
+        if job.cancelled:
+            self._stop.set()
+            self._resume.set()
+        elif job.state == "paused":
+            self._resume.clear()
+        else:
+            self._resume.set()
+
+    def _receive(self, message, on_result):
+        worker_id, index, row, timings, outcome = message
+        worker = self._workers.get(worker_id)
+        # Resposta de um processo já substituído: a linha foi devolvida à fila
+        if worker is None or index not in worker["assigned"]:
+            return
+        worker["assigned"].discard(index)
+        if row is not None:
+            on_result(index, row, timings, outcome)
+
+    def _reap(self, backlog, payloads, attempts, on_result):
+        """Troca os processos mortos e devolve à fila as linhas que eles não terminaram."""
+        for worker_id, worker in list(self._workers.items()):
+            if worker["process"].is_alive():
+                continue
+
+            # O que o processo conseguiu mandar antes de cair ainda está na fila
+            while True:
+                try:
+                    self._receive(self._results.get_nowait(), on_result)
+                except queue.Empty:
+                    break
+
+            self.crashes += 1
+            lost = sorted(worker["assigned"])
+            print(f"[Shard {worker_id}] Processo caiu (código {worker['process'].exitcode}), "
+                  f"{len(lost)} linhas de volta à fila")
+            del self._workers[worker_id]
+
+            for index in reversed(lost):
+                attempts[index] = attempts.get(index, 0) + 1
+                if attempts[index] < self.max_attempts:
+                    backlog.appendleft(payloads[index])
+                    continue
+                _, _, _, row = payloads[index]
+                row["status"] = f"Erro: o processo do worker caiu {attempts[index]} vezes neste site"
+                row["status_search_bar"] = row["status"]
+                row["status_content_search"] = "-"
+                row["elapsed"] = 0.0
+                row["timings"] = {}
+                on_result(index, row, {}, "error")
+
+            self._spawn()
+
+    def _spawn(self):
+        self._next_id += 1
+        tasks = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=shard_worker, name=f"shard-{self._next_id}", daemon=True,
+            args=(self._next_id, self.profile, self.timeout, tasks, self._results, self._resume, self._stop)
+        )
+        process.start()
+        self._workers[self._next_id] = {"process": process, "tasks": tasks, "assigned": set()}
@@ -0,0 +1,94 @@
+from achar import search_and_scroll
+from deadline import Deadline, Watchdog, SITE_DEADLINE_SECONDS
+from metrics import timed
+import time
+
+
+class SiteChecker:
+    """Abre a loja, busca o termo e preenche a linha de resultado de um site.
+
+    Não grava nada: quem chama decide para onde vai o resultado (tabela do
+    job, histórico, agendador, métricas). Assim a mesma verificação roda nos
+    workers em thread do processo do Flask e nos processos de shards.py.
+    """
+
+    def __init__(self, resolver, templates, cep_memory, selector_memory=None, fingerprints=None,
+                 timeout=SITE_DEADLINE_SECONDS):
+        self.resolver = resolver
+        self.templates = templates
+        self.cep_memory = cep_memory
+        self.selector_memory = selector_memory
+        self.fingerprints = fingerprints
+        self.timeout = timeout
+
+    def check(self, manager, site_data, cep, result, timings):
+        """Preenche ``result`` e ``timings`` (segundos por fase) e devolve o resultado para as métricas."""
+        site_url = site_data.get("url", "")
+        search_term = site_data.get("term", "Giramille")
+        start_time = time.time()
+        # Prazo do site repassado a todas as fases; o watchdog derruba o navegador se algo travar
+        deadline = Deadline(self.timeout)
+        watchdog = Watchdog(deadline, manager.kill)
+        outcome = "error"
+
+        if manager.blocker is not None:
+            manager.blocker.reset()
+
+        try:
+            with timed(timings, "page"):
+                page = manager.new_page()
+
+            # Ir até a loja (direto, pelo cache ou pelo DuckDuckGo)
+            with deadline.limit(page, "resolve"):
+                result["resolved_url"] = self.resolver.resolve(page, site_url, timings, deadline)
+
+            # Busca na página
+            details = {"timings": timings}
+            search_field_founded, search_success = search_and_scroll(page, search_term, details,
+                                                                     templates=self.templates, deadline=deadline,
+                                                                     cep=cep, cep_memory=self.cep_memory,
+                                                                     selector_memory=self.selector_memory,
+                                                                     fingerprints=self.fingerprints)
+            result["confidence"] = details.get("confidence")
+            # Veredito reaproveitado de uma listagem igual à da última visita
+            result["fingerprint_hit"] = details.get("fingerprint_hit", False)
+
+            if not search_field_founded:
+                result["status_search_bar"] = "Campo de busca não encontrado"
+                result["status_content_search"] = "Não foi possível realizar a busca"
+                outcome = "no_search_bar"
+            else:
+                result["status_search_bar"] = "Campo de busca encontrado"
+                result["status_content_search"] = "Termo encontrado" if search_success else "Termo não encontrado"
+                outcome = "found" if search_success else "not_found"
+
+        except TimeoutError as e:
+            result["status"] = f"Timeout: {str(e)}"
+            result["status_search_bar"] = f"Timeout: {str(e)}"
+            result["status_content_search"] = "-"
+            outcome = "timeout"
+            print(f"Timeout: {str(e)}")
+
+        except Exception as e:
+            result["status"] = f"Erro: {str(e)}"
+            result["status_search_bar"] = f"Erro: {str(e)}"
+            result["status_content_search"] = "-"
+            print(f"Erro: {str(e)}")
+
+        finally:
+            watchdog.cancel()
+            if watchdog.fired:
+                result["status"] = f"Timeout: navegador encerrado pelo watchdog após {self.timeout}s"
+                result["status_search_bar"] = result["status"]
+                result["status_content_search"] = "-"
+                outcome = "timeout"
+            # Tempo total gasto no site, para comparar os perfis
+            result["elapsed"] = round(time.time() - start_time, 2)
+            result["timings"] = {phase: round(seconds, 2) for phase, seconds in timings.items()}
+            if manager.blocker is not None:
+                result["blocked_requests"] = manager.blocker.blocked_requests
+                result["bytes_saved"] = manager.blocker.bytes_saved
+            if 'page' in locals():
+                manager.release(page)
+
+        return outcome
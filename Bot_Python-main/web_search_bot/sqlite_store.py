@@ -0,0 +1,137 @@
+from json_store import DATA_DIR
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+# Quantas chaves alteradas o gravador junta numa única transação
+STORE_BATCH_SIZE = 200
+
+# Tempo máximo que uma alteração espera na fila antes de ir para o disco (segundos)
+STORE_FLUSH_SECONDS = 1.0
+
+
+class SqliteStore:
+    """Dicionário persistido numa tabela do SQLite, com a mesma interface do JsonStore.
+
+    Para memórias que mudam a cada site (agendador, impressões digitais):
+    o JsonStore regrava o arquivo inteiro a cada alteração, aqui só a chave
+    alterada é gravada. As leituras vêm de uma cópia em memória e as
+    gravações entram numa fila, gravada em lotes por uma thread própria,
+    como no ResultStore. Vários processos podem usar a mesma tabela; cada um
+    vê o que os outros gravaram até a sua própria inicialização.
+    """
+
+    def __init__(self, table, filename='results.db', data_dir=DATA_DIR,
+                 batch_size=STORE_BATCH_SIZE, flush_seconds=STORE_FLUSH_SECONDS):
+        os.makedirs(data_dir, exist_ok=True)
+        self.path = os.path.join(data_dir, filename)
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT, updated_at REAL)")
+            conn.commit()
+            self._data = {key: json.loads(value) for key, value in conn.execute(f"SELECT key, value FROM {table}")}
+        finally:
+            conn.close()
+
+        threading.Thread(target=self._writer, name=f"store-{table}", daemon=True).start()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._pending.put((key, json.dumps(value, ensure_ascii=False)))
+
+    def update(self, key, func, default=None):
+        """Aplica ``func`` ao valor atual da chave e grava o resultado."""
+        with self._lock:
+            value = func(self._data.get(key, default))
+            self._data[key] = value
+            self._pending.put((key, json.dumps(value, ensure_ascii=False)))
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._pending.put((key, None))
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def import_json(self, json_store):
+        """Copia um JsonStore antigo para a tabela vazia (migração dos arquivos .json)."""
+        with self._lock:
+            if self._data:
+                return 0
+        items = json_store.items()
+        for key, value in items:
+            self.set(key, value)
+        return len(items)
+
+    def flush(self, timeout=10):
+        """Espera o gravador esvaziar a fila."""
+        done = threading.Event()
+        self._pending.put(done)
+        return done.wait(timeout)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _writer(self):
+        conn = self._connect()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Só o último valor de cada chave do lote vai para o disco
+            changes = {}
+            waiters = []
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    changes[item[0]] = item[1]
+
+            try:
+                now = time.time()
+                with conn:
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO {self.table} (key, value, updated_at) VALUES (?, ?, ?)",
+                        [(key, value, now) for key, value in changes.items() if value is not None]
+                    )
+                    conn.executemany(
+                        f"DELETE FROM {self.table} WHERE key = ?",
+                        [(key,) for key, value in changes.items() if value is None]
+                    )
+            except sqlite3.Error as e:
+                print(f"[WARNING] Falha ao gravar {len(changes)} chaves em {self.table}: {e}")
+
+            for waiter in waiters:
+                waiter.set()
@@ -1,5 +1,18 @@
 let pollingInterval = null;
-let columnArrayLength = 0;
+let progressSource = null;
+let currentResults = [];
+let lastSeq = 0;
+let currentJobId = null;
+
+// Tabela virtualizada: só as linhas visíveis (mais uma margem) ficam no DOM
+const TABLE_OVERSCAN_ROWS = 10;
+const TABLE_DEFAULT_ROW_HEIGHT = 41;
+let rowHeight = 0;
+let dirtyRows = new Set();
+let renderScheduled = false;
+
+// Contagens mantidas a cada linha alterada, sem percorrer a tabela inteira
+let rowCounts = emptyRowCounts();
 
 async function extractColumn() {
     const statusElement = document.getElementById("status");
@@ -20,6 +33,12 @@ async function extractColumn() {
     outputElement.innerText = "";
     loadingIndicator.style.display = "none";
 
+    // .xlsx e .csv são lidos no servidor, que começa a processar antes do fim da leitura
+    if (/\.(xlsx|csv)$/i.test(file.name)) {
+        await uploadSpreadsheet(file);
+        return;
+    }
+
     const reader = new FileReader();
 
     reader.onload = async (e) => {
@@ -53,7 +72,6 @@ async function extractColumn() {
             }
 
             if (columnArray.length > 0) {
-                columnArrayLength = columnArray.length;
                 outputElement.innerText = JSON.stringify(columnArray, null, 2);
 
                 //document.getElementById('resultsBody').innerHTML = '';
@@ -67,19 +85,15 @@ async function extractColumn() {
                     const response = await fetch("/process-column", {
                         method: "POST",
                         headers: { "Content-Type": "application/json" },
-                        body: JSON.stringify({ columnData: columnArray })
+                        body: JSON.stringify({
+                            columnData: columnArray,
+                            profile: document.getElementById("profileSelect").value,
+                            mode: document.getElementById("modeSelect").value,
+                            cep: document.getElementById("cepInput").value.trim()
+                        })
                     });
 
-                    const responseData = await response.json();
-
-                    if (responseData.error) {
-                        loadingIndicator.style.display = "none";
-                        statusElement.className = "error";
-                        statusElement.innerText = "Erro no servidor: " + responseData.error;
-                    } else {
-                        document.getElementById('resultsTable').style.display = 'table';
-                        startPolling();
-                    }
+                    handleJobStart(await response.json());
                 } catch (error) {
                     loadingIndicator.style.display = "none";
                     statusElement.className = "error";
@@ -106,6 +120,84 @@ async function extractColumn() {
     reader.readAsArrayBuffer(file);
 }
 
+function handleJobStart(responseData) {
+    const statusElement = document.getElementById("status");
+
+    if (responseData.error) {
+        document.getElementById("loadingIndicator").style.display = "none";
+        statusElement.className = "error";
+        statusElement.innerText = "Erro no servidor: " + responseData.error;
+    } else {
+        currentJobId = responseData.job_id;
+        document.getElementById('resultsTable').style.display = 'table';
+        startProgressUpdates();
+    }
+}
+
+async function uploadSpreadsheet(file) {
+    const statusElement = document.getElementById("status");
+    const loadingIndicator = document.getElementById("loadingIndicator");
+
+    const formData = new FormData();
+    formData.append("file", file);
+    formData.append("profile", document.getElementById("profileSelect").value);
+    formData.append("mode", document.getElementById("modeSelect").value);
+    formData.append("cep", document.getElementById("cepInput").value.trim());
+
+    document.getElementById('resultsTable').style.display = 'none';
+    document.getElementById("progressText").innerText = `Enviando ${file.name}...`;
+    statusElement.innerText = "Iniciando o processamento...";
+    loadingIndicator.style.display = "block";
+
+    try {
+        const response = await fetch("/upload", { method: "POST", body: formData });
+        handleJobStart(await response.json());
+    } catch (error) {
+        loadingIndicator.style.display = "none";
+        statusElement.className = "error";
+        statusElement.innerText = "Erro ao enviar a planilha para o servidor: " + error.message;
+    }
+}
+
+function startProgressUpdates() {
+    stopProgressUpdates();
+    currentResults = [];
+    lastSeq = 0;
+    rowCounts = emptyRowCounts();
+    dirtyRows = new Set();
+    scheduleRender();
+
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+
+    // Stream com apenas as linhas alteradas; o navegador reconecta sozinho
+    // enviando o Last-Event-ID, e o servidor retoma a partir dele
+    progressSource = new EventSource(`/progress-stream?job=${currentJobId}&since=${lastSeq}`);
+    progressSource.addEventListener("progress", (event) => {
+        handleProgress(JSON.parse(event.data));
+    });
+    progressSource.onerror = () => {
+        if (progressSource && progressSource.readyState === EventSource.CLOSED) {
+            // O navegador desistiu do stream: cai para o polling com ?since=
+            progressSource = null;
+            startPolling();
+        }
+    };
+}
+
+function stopProgressUpdates() {
+    if (progressSource) {
+        progressSource.close();
+        progressSource = null;
+    }
+    if (pollingInterval) {
+        clearInterval(pollingInterval);
+        pollingInterval = null;
+    }
+}
+
 function startPolling() {
     if (pollingInterval) clearInterval(pollingInterval);
     pollingInterval = setInterval(checkProgress, 1000);
@@ -113,106 +205,227 @@ function startPolling() {
 
 async function checkProgress() {
     try {
-        const response = await fetch("/check-progress");
-        const data = await response.json();
+        const response = await fetch(`/check-progress?job=${currentJobId}&since=${lastSeq}`);
+        handleProgress(await response.json());
+    } catch (error) {
+        console.error("Erro ao verificar progresso:", error);
+    }
+}
 
-        updateResultsTable(data.results);
+async function jobAction(action) {
+    if (!currentJobId) return;
+    try {
+        const response = await fetch(`/jobs/${currentJobId}/${action}`, { method: "POST" });
+        const job = await response.json();
+        document.getElementById("status").innerText = `Job ${job.job_id}: ${job.state}`;
+        if (job.state === "cancelled") stopProgressUpdates();
+    } catch (error) {
+        console.error("Erro ao controlar o job:", error);
+    }
+}
 
-        const processedCount = data.results.filter(r => r.status_search_bar !== "Processando...").length;
-        const numberOfLoops = data.results[0].number_of_loops;
+function emptyRowCounts() {
+    return { loaded: 0, processed: 0, found: 0, noSearchBar: 0, timeout: 0, error: 0 };
+}
 
-        document.getElementById('progressText').innerText = 
-            `${processedCount} de ${columnArrayLength} sites processados - Loop numero: ${numberOfLoops}`;
+function countRow(row, sign) {
+    if (!row) return;
+    rowCounts.loaded += sign;
+    if (row.status_search_bar !== "Processando...") rowCounts.processed += sign;
 
-        // Pegar o número do loop (vem igual para todos os resultados, então basta pegar do primeiro)
-        if (data.results.length > 0) {
-            const numberOfLoops = data.results[0].number_of_loops;
-            document.getElementById('loopCounter').innerText = 
-                `Loop número: ${numberOfLoops}`;
-        }
+    if (row.status_content_search === "Termo encontrado") rowCounts.found += sign;
+    else if (row.status_search_bar === "Campo de busca não encontrado") rowCounts.noSearchBar += sign;
+    else if (row.status_search_bar.startsWith("Timeout")) rowCounts.timeout += sign;
+    else if (row.status_search_bar.startsWith("Erro")) rowCounts.error += sign;
+}
 
-        if (data.complete) {
-            clearInterval(pollingInterval);
-            document.getElementById("loadingIndicator").style.display = "none";
+function setResult(index, row) {
+    countRow(currentResults[index], -1);
+    currentResults[index] = row;
+    countRow(row, 1);
+    dirtyRows.add(index);
+}
 
-            let successCount = 0, failCount = 0, timeoutCount = 0, errorCount = 0;
+function handleProgress(data) {
+    if (data.error && data.seq === undefined) return;
+    lastSeq = data.seq;
 
-            data.results.forEach(({ status }) => {
-                if (status === "Busca realizada") successCount++;
-                else if (status === "Campo de busca não encontrado") failCount++;
-                else if (status.startsWith("Timeout")) timeoutCount++;
-                else if (status.startsWith("Erro")) errorCount++;
-            });
+    // Aplica só as linhas que mudaram desde a última sequência recebida
+    if (data.total < currentResults.length) {
+        for (let i = data.total; i < currentResults.length; i++) countRow(currentResults[i], -1);
+    }
+    currentResults.length = data.total;
+    data.changes.forEach(({ index, row }) => setResult(index, row));
 
-            const statusElement = document.getElementById("status");
-            statusElement.className = "success";
-            statusElement.innerText = `Processamento concluído! ${data.status_search_bar.length} sites verificados. Sucessos: ${successCount}, Falhas: ${failCount}, Timeouts: ${timeoutCount}, Erros: ${errorCount}`;
+    scheduleRender();
 
-            if (data.error) {
-                const errorElement = document.createElement("p");
-                errorElement.className = "error";
-                errorElement.innerText = `Erro durante o processamento: ${data.error}`;
-                document.getElementById("results").prepend(errorElement);
-            }
+    const numberOfLoops = data.loops;
+    const averageText = data.average_site_seconds !== null
+        ? ` - Perfil ${data.profile}: ${data.average_site_seconds}s por site`
+        : "";
+
+    const stateText = data.state !== "running" ? ` (${data.state})` : "";
+    const ingestingText = data.ingesting ? " (lendo a planilha...)" : "";
+
+    document.getElementById('progressText').innerText = 
+        `${rowCounts.processed} de ${data.total}${ingestingText} sites processados - Loop numero: ${numberOfLoops}${averageText}${stateText}`;
+
+    if (data.complete) {
+        // O processamento é contínuo: mostra o resumo do loop e segue acompanhando
+        const statusElement = document.getElementById("status");
+        statusElement.className = "success";
+        statusElement.innerText = `Loop ${numberOfLoops} concluído! ${rowCounts.loaded} sites verificados. Encontrados: ${rowCounts.found}, Sem barra de busca: ${rowCounts.noSearchBar}, Timeouts: ${rowCounts.timeout}, Erros: ${rowCounts.error}, Resultados inalterados: ${data.fingerprint_hits}`;
+
+        if (data.error) {
+            const errorElement = document.createElement("p");
+            errorElement.className = "error";
+            errorElement.innerText = `Erro durante o processamento: ${data.error}`;
+            document.getElementById("results").prepend(errorElement);
         }
-    } catch (error) {
-        console.error("Erro ao verificar progresso:", error);
     }
 }
 
-function updateResultsTable(results) {
+function scheduleRender() {
+    if (renderScheduled) return;
+    renderScheduled = true;
+    requestAnimationFrame(() => {
+        renderScheduled = false;
+        renderVisibleRows();
+    });
+}
+
+function spacerRow(className) {
+    const row = document.createElement('tr');
+    row.className = className;
+    const cell = document.createElement('td');
+    cell.colSpan = 7;
+    row.appendChild(cell);
+    return row;
+}
+
+function renderVisibleRows() {
+    const viewport = document.getElementById('resultsViewport');
     const resultsBody = document.getElementById('resultsBody');
-    resultsBody.innerHTML = '';
+    let topSpacer = resultsBody.querySelector('tr.spacer-top');
+    let bottomSpacer = resultsBody.querySelector('tr.spacer-bottom');
+    if (!topSpacer) {
+        resultsBody.innerHTML = '';
+        topSpacer = resultsBody.appendChild(spacerRow('spacer-top'));
+        bottomSpacer = resultsBody.appendChild(spacerRow('spacer-bottom'));
+    }
 
-    results.forEach((result, i) => {
-        const row = document.createElement('tr');
+    const height = rowHeight || TABLE_DEFAULT_ROW_HEIGHT;
+    const total = currentResults.length;
+    const first = Math.max(0, Math.floor(viewport.scrollTop / height) - TABLE_OVERSCAN_ROWS);
+    const visible = Math.ceil(viewport.clientHeight / height) + 2 * TABLE_OVERSCAN_ROWS;
+    const last = Math.min(total, first + visible);
+
+    // Reaproveita as <tr> da janela: cada uma lembra a linha que mostra e
+    // só é reescrita quando passa a mostrar outra linha ou a linha mudou
+    const pool = Array.from(resultsBody.querySelectorAll('tr.result-row'));
+    while (pool.length < last - first) {
+        const row = createResultRow();
+        resultsBody.insertBefore(row, bottomSpacer);
+        pool.push(row);
+    }
+    while (pool.length > last - first) {
+        pool.pop().remove();
+    }
 
-        const indexCell = document.createElement('td');
-        indexCell.textContent = i + 1;
-        row.appendChild(indexCell);
+    pool.forEach((row, offset) => {
+        const index = first + offset;
+        if (row.dataset.index !== String(index) || dirtyRows.has(index)) {
+            fillResultRow(row, index, currentResults[index]);
+        }
+    });
+    dirtyRows.clear();
 
-        const urlCell = document.createElement('td');
-        urlCell.textContent = result.url;
+    topSpacer.firstChild.style.height = `${first * height}px`;
+    bottomSpacer.firstChild.style.height = `${(total - last) * height}px`;
 
-        const worksheetNumber = document.createElement('td');
-        worksheetNumber.textContent = result.worksheetNumber;
+    if (!rowHeight && pool.length > 0 && currentResults[first]) {
+        rowHeight = pool[0].getBoundingClientRect().height || TABLE_DEFAULT_ROW_HEIGHT;
+        if (rowHeight !== height) scheduleRender();
+    }
+}
 
-        row.appendChild(urlCell);
-        row.appendChild(worksheetNumber);
+function createResultRow() {
+    const row = document.createElement('tr');
+    row.className = 'result-row';
+    for (let i = 0; i < 7; i++) {
+        row.appendChild(document.createElement('td'));
+    }
+    return row;
+}
 
-        const statusFindSearchBar = document.createElement('td');
-        statusFindSearchBar.textContent = result.status_search_bar;
+function searchBarClass(status) {
+    if (status === "Campo de busca encontrado") return "success";
+    if (status === "Campo de busca não encontrado") return "warning";
+    if (status.startsWith("Timeout")) return "warning";
+    if (status.startsWith("Erro")) return "error";
+    if (status === "Processando...") return "processing";
+    return "";
+}
 
-        if (result.status_search_bar === "Campo de busca encontrado") statusFindSearchBar.className = "success";
-        else if (result.status_search_bar === "Campo de busca não encontrado") statusFindSearchBar.className = "warning";
-        else if (result.status_search_bar.startsWith("Timeout")) statusFindSearchBar.className = "warning";
-        else if (result.status_search_bar.startsWith("Erro")) statusFindSearchBar.className = "error";
-        else if (result.status_search_bar === "Processando...") statusFindSearchBar.className = "processing";
-        
-        row.appendChild(statusFindSearchBar);
+function contentSearchClass(status) {
+    if (status === "Termo encontrado") return "success";
+    if (status === "Termo não encontrado") return "warning";
+    if (status === "Não foi possível realizar a busca") return "warning";
+    if (status.startsWith("Timeout")) return "warning";
+    if (status.startsWith("Erro")) return "error";
+    if (status === "Processando...") return "processing";
+    return "";
+}
 
-        const statusFindSearchTerm = document.createElement('td');
-        statusFindSearchTerm.textContent = result.status_content_search;
+function fillResultRow(row, index, result) {
+    row.dataset.index = index;
+    row.classList.toggle('even', index % 2 === 1);
+    const [indexCell, urlCell, loopCell, searchBarCell, contentCell, elapsedCell, progressCell] = row.cells;
+
+    indexCell.textContent = index + 1;
+    if (!result) {
+        // Linha ainda não recebida do servidor
+        for (const cell of [urlCell, loopCell, searchBarCell, contentCell, elapsedCell, progressCell]) {
+            cell.textContent = "";
+            cell.className = "";
+            cell.title = "";
+        }
+        return;
+    }
 
+    urlCell.textContent = result.url;
+    urlCell.title = result.url;
+    loopCell.textContent = result.worksheetNumber;
 
-        if (result.status_content_search === "Termo encontrado") statusFindSearchTerm.className = "success";
-        else if (result.status_content_search === "Termo não encontrado") statusFindSearchTerm.className = "warning";
-        else if (result.status_content_search === "Não foi possível realizar a busca") statusFindSearchTerm.className = "warning";        
-        else if (result.status_content_search.startsWith("Timeout")) statusFindSearchTerm.className = "warning";
-        else if (result.status_content_search.startsWith("Erro")) statusFindSearchTerm.className = "error";
-        else if (result.status_content_search === "Processando...") statusFindSearchTerm.className = "processing";
+    searchBarCell.textContent = result.status_search_bar;
+    searchBarCell.className = searchBarClass(result.status_search_bar);
+    searchBarCell.title = result.status_search_bar;
 
-        row.appendChild(statusFindSearchTerm);
+    contentCell.textContent = result.status_content_search;
+    contentCell.className = contentSearchClass(result.status_content_search);
 
-        const progressCell = document.createElement('td');
-        progressCell.textContent = result.progress;
-        row.appendChild(progressCell);
+    elapsedCell.textContent = result.elapsed !== null ? result.elapsed : "-";
+    // Tempo por fase ao passar o mouse, para achar a fase lenta do site
+    elapsedCell.title = result.timings
+        ? Object.entries(result.timings).map(([phase, seconds]) => `${phase}: ${seconds}s`).join("\n")
+        : "";
 
-        resultsBody.appendChild(row);
-    });
+    progressCell.textContent = result.progress;
 }
 
-function generate_report() {
+document.addEventListener("DOMContentLoaded", () => {
+    document.getElementById('resultsViewport').addEventListener('scroll', scheduleRender, { passive: true });
+    window.addEventListener('resize', scheduleRender);
+});
+
+function generate_report(format = "xlsx") {
+    // Com um job em andamento o servidor gera o relatório a partir do histórico
+    // completo (todos os loops, com os tempos por fase), sem depender da tabela da página
+    if (currentJobId) {
+        window.location.href = `/jobs/${encodeURIComponent(currentJobId)}/export.${format}`;
+        return;
+    }
+
     // Pega a tabela pelo ID
     const table = document.getElementById("resultsTable");
     if (!table || table.style.display === "none") {